@@ -4,18 +4,63 @@ import sys
 import base64
 import traceback
 import time
+from contextlib import asynccontextmanager
 from typing import Dict, Any, Optional, List
 from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
 # Ajout du dossier courant au path pour garantir l'import du module functions
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from functions.generator_service import JobSwipeGeneratorService
-from functions.matcher_engine import batch_match_offers
+from functions.async_generator_service import AsyncJobSwipeGeneratorService
+from functions.score_cache import get_score_cache
+from functions.skill_vocabulary import get_skill_vocabulary_stats
+from functions.llm_gateway import get_llm_gateway, get_llm_gateway_stats
+from functions.llm_policy import llm_budget
+from functions.cascade import rank_offers_cascade
+from functions.matcher_engine import (
+    rank_offers,
+    iter_offer_scores,
+    vectorize_cv,
+    index_offers,
+    search,
+    upsert_profiles,
+    remove_profiles,
+    rank_profiles,
+    invalidate_profile,
+    warm_up,
+    get_readiness,
+    POOL_WARMUP,
+    ENGINES,
+    get_vectorization_stats,
+    get_offer_store_stats,
+    get_offer_index_stats,
+    get_profile_matrix_stats,
+    get_bm25_stats,
+    get_profile_cache_stats,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Charge et préchauffe le moteur NLP (modèle spaCy, magasin de vecteurs,
+    index d'offres) avant que le serveur n'accepte du trafic.
+    """
+    state = await run_in_threadpool(warm_up, POOL_WARMUP)
+    if state["ready"]:
+        print(f"[INFO] Moteur NLP prêt (chargement {state['load_seconds']}s, warm-up {state['warmup_seconds']}s)")
+    else:
+        print(f"[WARN] Moteur NLP indisponible : {state['error']}")
+    yield
+    # Fermeture des connexions Gemini gardées ouvertes et du pool de rendu
+    await get_llm_gateway().aclose()
+    async_service.shutdown()
 
-app = FastAPI(title="JobSwipe Generator API", version="1.0")
+app = FastAPI(title="JobSwipe Generator API", version="1.0", lifespan=lifespan)
 
 # Configuration des origines autorisées pour CORS
 origins = [
@@ -44,6 +89,20 @@ app.add_middleware(
 # Les fichiers seront générés dans un dossier 'output_api' par défaut
 OUTPUT_DIR = os.path.join(os.getcwd(), "output_api")
 service = JobSwipeGeneratorService(output_dir=OUTPUT_DIR)
+async_service = AsyncJobSwipeGeneratorService(output_dir=OUTPUT_DIR)
+
+# Appels Gemini asyncio et rendu hors de la boucle d'événements (défaut) ;
+# GENERATOR_ASYNC_LLM=0 revient au service synchrone, exécuté dans la boucle
+GENERATOR_ASYNC_LLM = os.getenv("GENERATOR_ASYNC_LLM", "1") == "1"
+
+async def call_service(method: str, *args, **kwargs):
+    """
+    Appelle une méthode du service de génération (même nom et mêmes
+    arguments dans les deux variantes).
+    """
+    if GENERATOR_ASYNC_LLM:
+        return await getattr(async_service, method)(*args, **kwargs)
+    return getattr(service, method)(*args, **kwargs)
 
 class ApplicationRequest(BaseModel):
     cv_data: Dict[str, Any]
@@ -53,6 +112,46 @@ class ApplicationRequest(BaseModel):
 class BatchScoreRequest(BaseModel):
     cv_data: Dict[str, Any]
     offers: List[Dict[str, Any]]
+    top_k: Optional[int] = None  # None = toutes les offres
+    engine: str = "spacy"  # "spacy" (sémantique) ou "bm25" (lexical, plus rapide, scores propres à la réponse)
+
+class BatchApplicationRequest(BaseModel):
+    cv_data: Dict[str, Any]
+    offers: List[Dict[str, Any]]
+
+class CascadeScoreRequest(BaseModel):
+    cv_data: Dict[str, Any]
+    offers: List[Dict[str, Any]]
+    prefilter: str = "heuristic"  # "heuristic" (compétences + titre) ou "bm25"
+    prefilter_k: Optional[int] = None  # offres rerankées par spaCy (défaut : CASCADE_PREFILTER_K)
+    llm_k: Optional[int] = None  # offres analysées par Gemini (défaut : CASCADE_LLM_K, 0 sans clé)
+    budgets_ms: Optional[Dict[str, float]] = None  # {"prefilter", "rerank", "llm"}
+    top_k: Optional[int] = None
+
+class IndexOffersRequest(BaseModel):
+    offers: List[Dict[str, Any]]
+
+class CorpusSearchRequest(BaseModel):
+    cv_data: Dict[str, Any]
+    k: int = 20
+    filters: Optional[Dict[str, Any]] = None  # ex: {"contract_type": ["internship", "apprenticeship"]}
+    n_probe: Optional[int] = None
+    exact: bool = False
+
+class IndexProfilesRequest(BaseModel):
+    profiles: Dict[str, Dict[str, Any]]  # {profile_id: cv_data}
+    removed: List[str] = []
+
+class ProfileMatchRequest(BaseModel):
+    offer_data: Dict[str, Any]
+    k: int = 50
+
+class InvalidateProfileRequest(BaseModel):
+    profile_id: Optional[str] = None
+    cv_data: Optional[Dict[str, Any]] = None
+
+class ExtractSkillsRequest(BaseModel):
+    offers: List[Dict[str, Any]]
 
 class JobTextRequest(BaseModel):
     text: str
@@ -67,7 +166,8 @@ async def generate_cv(
     Génère uniquement le CV optimisé (PDF).
     """
     try:
-        results = service.process_cv(request.cv_data, request.offer_data, api_key=x_gemini_api_key, model_name=x_gemini_model_name)
+        with llm_budget("generate-cv"):
+            results = await call_service("process_cv", request.cv_data, request.offer_data, api_key=x_gemini_api_key, model_name=x_gemini_model_name)
         
         response_data = {"files": {}}
         # Encodage du CV PDF
@@ -92,9 +192,10 @@ async def generate_cover_letter(
     Génère uniquement la lettre de motivation (PDF).
     """
     try:
-        results = service.process_motivation(
-            request.cv_data, request.offer_data, gender=request.gender, api_key=x_gemini_api_key, model_name=x_gemini_model_name
-        )
+        with llm_budget("generate-cover-letter"):
+            results = await call_service(
+                "process_motivation", request.cv_data, request.offer_data, gender=request.gender, api_key=x_gemini_api_key, model_name=x_gemini_model_name
+            )
         
         response_data = {"files": {}}
         # Encodage de la Lettre PDF
@@ -121,13 +222,82 @@ async def score_application(
     Calcule le score de compatibilité et fournit une analyse détaillée.
     """
     try:
-        results = service.process_scoring(request.cv_data, request.offer_data, api_key=x_gemini_api_key, model_name=x_gemini_model_name)
+        with llm_budget("score-application"):
+            results = await call_service("process_scoring", request.cv_data, request.offer_data, api_key=x_gemini_api_key, model_name=x_gemini_model_name)
         return results
     except Exception as e:
         print(f"ERREUR 500 dans /score-application : {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/score-application/stream")
+async def score_application_stream(
+    request: ApplicationRequest,
+    http_request: Request,
+    x_gemini_api_key: str = Header(..., alias="x-gemini-api-key"),
+    x_gemini_model_name: str = Header("gemini-2.5-flash", alias="x-gemini-model-name")
+):
+    """
+    Variante streaming (SSE) de /score-application :
+    - événements "partial" {"field", "value"} : score global, sous-scores et
+      résumé, dès qu'ils apparaissent dans la réponse de Gemini,
+    - événement "result" {"analysis", "cached"} : l'analyse complète,
+    - événement "error" {"error"} en cas d'échec.
+    Si le client se déconnecte, la génération est abandonnée.
+    """
+    def encode(record: Dict[str, Any]) -> str:
+        event = record.pop("event")
+        return f"event: {event}\ndata: {json.dumps(record, ensure_ascii=False)}\n\n"
+
+    async def generate():
+        events = service.process_scoring_stream(request.cv_data, request.offer_data, api_key=x_gemini_api_key, model_name=x_gemini_model_name)
+        try:
+            while True:
+                if await http_request.is_disconnected():
+                    print("[INFO] /score-application/stream : client déconnecté, arrêt de la génération.")
+                    return
+                # La lecture du flux Gemini est bloquante : exécutée hors de la boucle d'événements.
+                # Le budget borne l'ouverture du flux (reprises comprises), au premier morceau
+                with llm_budget("score-application"):
+                    record = await run_in_threadpool(next, events, None)
+                if record is None:
+                    break
+                yield encode(record)
+        except Exception as e:
+            print(f"ERREUR dans /score-application/stream : {e}")
+            yield encode({"event": "error", "error": str(e)})
+        finally:
+            events.close()
+
+    return StreamingResponse(generate(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/score-application/batch")
+async def score_application_batch(
+    request: BatchApplicationRequest,
+    x_gemini_api_key: str = Header(..., alias="x-gemini-api-key"),
+    x_gemini_model_name: str = Header("gemini-2.5-flash", alias="x-gemini-model-name")
+):
+    """
+    Analyse détaillée d'un CV contre plusieurs offres : le CV n'est envoyé
+    qu'une fois par appel Gemini, les offres sont regroupées en lots selon le
+    budget de tokens. Retourne {"analyses": {offer_id: analyse}, "failed": [ids]}.
+    """
+    offers_dict = {
+        offer.get("id"): offer 
+        for offer in request.offers 
+        if offer.get("id")
+    }
+    try:
+        with llm_budget("score-application-batch"):
+            analyses = await run_in_threadpool(
+                service.process_scoring_batch, request.cv_data, offers_dict, api_key=x_gemini_api_key, model_name=x_gemini_model_name
+            )
+        return {"analyses": analyses, "failed": [key for key in offers_dict if key not in analyses]}
+    except Exception as e:
+        print(f"ERREUR 500 dans /score-application/batch : {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/score-fast")
 async def score_fast(request: ApplicationRequest):
     """
@@ -135,11 +305,10 @@ async def score_fast(request: ApplicationRequest):
     Retourne un entier entre 0 et 100.
     """
     try:
-        # Utilisation de batch_match_offers pour un seul élément pour garantir la cohérence
-        offer_id = "current"
-        offers_dict = {offer_id: request.offer_data}
-        scores = batch_match_offers(request.cv_data, offers_dict)
-        score = scores.get(offer_id, 0)
+        # Utilisation de rank_offers pour un seul élément pour garantir la cohérence
+        offers_dict = {"current": request.offer_data}
+        ranked = rank_offers(request.cv_data, offers_dict, k=1)
+        score = ranked[0][1] if ranked else 0
         return {"score": score}
     except Exception as e:
         print(f"ERREUR 500 dans /score-fast : {e}")
@@ -150,9 +319,11 @@ async def score_batch(request: BatchScoreRequest):
     """
     Calcule les scores pour une liste d'offres (NLP).
     Retourne un dictionnaire {offer_id: score}.
+    Avec engine="bm25", idf et longueur moyenne viennent des offres vues par
+    le worker : les scores ne sont comparables qu'au sein d'une même réponse
+    (pas d'une requête ou d'un worker à l'autre).
     """
     try:
-        scores = {}
         # Conversion de la liste en dictionnaire pour le moteur NLP {id: data}
         offers_dict = {
             offer.get("id"): offer 
@@ -160,14 +331,200 @@ async def score_batch(request: BatchScoreRequest):
             if offer.get("id")
         }
         
-        # Utilisation du moteur NLP (spaCy) pour le matching sémantique
-        scores = batch_match_offers(request.cv_data, offers_dict)
+        # Utilisation du moteur NLP choisi (spaCy sémantique par défaut),
+        # les offres sont retournées de la plus à la moins compatible.
+        # Calcul bloquant (spaCy, pool de processus) : hors de la boucle d'événements
+        ranked = await run_in_threadpool(rank_offers, request.cv_data, offers_dict, k=request.top_k, engine=request.engine)
         
-        return {"scores": scores}
+        return {"scores": dict(ranked)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"ERREUR 500 dans /score-batch : {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/invalidate-profile")
+async def invalidate_profile_endpoint(request: InvalidateProfileRequest):
+    """
+    Invalide le vecteur en cache d'un profil après édition (par id ou par contenu).
+    """
+    if request.profile_id is None and request.cv_data is None:
+        raise HTTPException(status_code=400, detail="profile_id ou cv_data requis")
+    removed = invalidate_profile(cv_input=request.cv_data, profile_id=request.profile_id)
+    return {"invalidated": removed}
+
+@app.post("/score-batch/stream")
+async def score_batch_stream(request: BatchScoreRequest, http_request: Request, format: str = "ndjson"):
+    """
+    Variante streaming de /score-batch (même moteur, ids en chaînes) : les
+    scores sont émis lot par lot, dans l'ordre des offres, dès qu'ils sont
+    calculés.
+    - format=ndjson (défaut) : une ligne JSON {"id", "score"} par offre.
+    - format=sse : un événement "data:" par offre.
+    Une dernière ligne/événement {"done": true, "count": n} clôt le flux.
+    Si le client se déconnecte, le calcul des lots restants est abandonné.
+    top_k n'est pas accepté : un classement demande tous les scores (utiliser /score-batch).
+    Avec engine="bm25", les scores ne sont comparables qu'au sein d'un même lot.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format doit valoir 'ndjson' ou 'sse'")
+    if request.top_k is not None:
+        raise HTTPException(status_code=400, detail="top_k n'est pas supporté en streaming (utiliser /score-batch)")
+    if request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Moteur inconnu : '{request.engine}' (disponibles : {', '.join(ENGINES)}).")
+
+    offers_dict = {
+        offer.get("id"): offer 
+        for offer in request.offers 
+        if offer.get("id")
+    }
+
+    def encode(record: Dict[str, Any], event: Optional[str] = None) -> str:
+        payload = json.dumps(record, ensure_ascii=False)
+        if format == "ndjson":
+            return payload + "\n"
+        return (f"event: {event}\n" if event else "") + f"data: {payload}\n\n"
+
+    async def generate():
+        chunks = iter_offer_scores(request.cv_data, offers_dict, engine=request.engine)
+        count = 0
+        try:
+            while True:
+                if await http_request.is_disconnected():
+                    print("[INFO] /score-batch/stream : client déconnecté, arrêt du calcul.")
+                    return
+                # Le calcul d'un lot est bloquant (spaCy) : exécuté hors de la boucle d'événements
+                chunk = await run_in_threadpool(next, chunks, None)
+                if chunk is None:
+                    break
+                count += len(chunk)
+                # Ids en chaînes, comme les clés du dictionnaire renvoyé par /score-batch
+                yield "".join(encode({"id": str(offer_id), "score": score}) for offer_id, score in chunk)
+            yield encode({"done": True, "count": count}, event="done")
+        except Exception as e:
+            print(f"ERREUR dans /score-batch/stream : {e}")
+            yield encode({"error": str(e)}, event="error")
+        finally:
+            chunks.close()
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(generate(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+@app.post("/score-cascade")
+async def score_cascade(
+    request: CascadeScoreRequest,
+    x_gemini_api_key: Optional[str] = Header(None, alias="x-gemini-api-key"),
+    x_gemini_model_name: str = Header("gemini-2.5-flash", alias="x-gemini-model-name")
+):
+    """
+    Classement en cascade : préfiltre (heuristique ou BM25) sur tout le deck,
+    rerank spaCy des meilleures offres, puis analyse Gemini des toutes
+    premières si une clé API est fournie. Retourne le classement et le
+    rapport de temps par étape.
+    """
+    offers_dict = {
+        offer.get("id"): offer 
+        for offer in request.offers 
+        if offer.get("id")
+    }
+    try:
+        return await run_in_threadpool(
+            rank_offers_cascade,
+            request.cv_data,
+            offers_dict,
+            prefilter=request.prefilter,
+            prefilter_k=request.prefilter_k,
+            llm_k=request.llm_k,
+            api_key=x_gemini_api_key,
+            model_name=x_gemini_model_name,
+            budgets_ms=request.budgets_ms,
+            top_k=request.top_k,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"ERREUR 500 dans /score-cascade : {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/index-offers")
+async def index_offers_endpoint(request: IndexOffersRequest):
+    """
+    Ajoute des offres au corpus interrogeable par /search-offers.
+    Retourne le nombre d'offres indexées.
+    """
+    try:
+        offers_dict = {
+            offer.get("id"): offer 
+            for offer in request.offers 
+            if offer.get("id")
+        }
+        indexed = await run_in_threadpool(index_offers, offers_dict)
+        return {"indexed": indexed, "index": get_offer_index_stats()}
+    except Exception as e:
+        print(f"ERREUR 500 dans /index-offers : {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/search-offers")
+async def search_offers(request: CorpusSearchRequest):
+    """
+    Cherche les offres du corpus indexé les plus compatibles avec le profil (index ANN).
+    Retourne une liste [{id, score}] triée par score décroissant.
+    """
+    try:
+        cv_vec = vectorize_cv(request.cv_data)
+        results = search(cv_vec, k=request.k, filters=request.filters, n_probe=request.n_probe, exact=request.exact)
+        return {"results": [{"id": offer_id, "score": score} for offer_id, score in results]}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"ERREUR 500 dans /search-offers : {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/index-profiles")
+async def index_profiles_endpoint(request: IndexProfilesRequest):
+    """
+    Ajoute, met à jour ou retire des profils pour le matching inverse (/match-profiles).
+    La matrice est partagée entre workers via PROFILE_MATRIX_PATH (vide : un seul worker).
+    """
+    try:
+        indexed = await run_in_threadpool(upsert_profiles, request.profiles)
+        await run_in_threadpool(remove_profiles, request.removed)
+        return {"indexed": indexed, **get_profile_matrix_stats()}
+    except Exception as e:
+        print(f"ERREUR 500 dans /index-profiles : {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/match-profiles")
+async def match_profiles(request: ProfileMatchRequest):
+    """
+    Matching inverse : classe les profils indexés par compatibilité avec une offre.
+    Retourne une liste [{id, score}] triée par score décroissant.
+    """
+    try:
+        ranked = await run_in_threadpool(rank_profiles, request.offer_data, k=request.k)
+        return {"results": [{"id": profile_id, "score": score} for profile_id, score in ranked]}
+    except Exception as e:
+        print(f"ERREUR 500 dans /match-profiles : {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/extract-skills")
+async def extract_skills_endpoint(request: ExtractSkillsRequest):
+    """
+    Extrait localement (gazetteer, sans Gemini) les compétences de chaque offre.
+    Retourne un dictionnaire {offer_id: [compétences]}.
+    """
+    try:
+        skills = {
+            offer.get("id"): service.extract_offer_skills(offer)
+            for offer in request.offers
+            if offer.get("id")
+        }
+        return {"hard_skills": skills}
+    except Exception as e:
+        print(f"ERREUR 500 dans /extract-skills : {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/parse-job")
 async def parse_job(
     request: JobTextRequest,
@@ -178,7 +535,8 @@ async def parse_job(
     Parse un texte d'offre d'emploi brut en JSON structuré.
     """
     try:
-        result = service.parse_only_offer(request.text, api_key=x_gemini_api_key, model_name=x_gemini_model_name)
+        with llm_budget("parse-job"):
+            result = await call_service("parse_only_offer", request.text, api_key=x_gemini_api_key, model_name=x_gemini_model_name)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -202,12 +560,45 @@ async def parse_cv_upload(
             except:
                 pass # Ignore if invalid JSON
         
-        result = service.parse_cv_document(content, file.filename, api_key=x_gemini_api_key, model_name=x_gemini_model_name, current_profile=profile_data)
+        with llm_budget("parse-cv-upload"):
+            result = await call_service("parse_cv_document", content, file.filename, api_key=x_gemini_api_key, model_name=x_gemini_model_name, current_profile=profile_data)
         return result
     except Exception as e:
         print(f"ERREUR dans /parse-cv-upload : {e}")
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analyse du CV : {str(e)}")
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness : 200 si le moteur NLP est chaud, 503 sinon (état + temps de chargement).
+    Tant que le moteur n'est pas chaud (échec du warm-up, modèle chargé
+    paresseusement par une requête), le warm-up est relancé : il est idempotent
+    une fois le modèle chargé, et après un échec le chargement n'est retenté
+    qu'au plus toutes les SPACY_RETRY_SECONDS. Le worker redevient prêt sans
+    redémarrage.
+    """
+    state = get_readiness()
+    if state["status"] not in ("warm", "loading"):
+        state = await run_in_threadpool(warm_up, POOL_WARMUP)
+    return JSONResponse(status_code=200 if state["ready"] else 503, content=state)
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Statistiques internes des moteurs (débit de vectorisation, etc.).
+    """
+    return {
+        "matcher": get_vectorization_stats(),
+        "offer_vector_store": get_offer_store_stats(),
+        "offer_index": get_offer_index_stats(),
+        "profile_matrix": get_profile_matrix_stats(),
+        "bm25_index": get_bm25_stats(),
+        "profile_vector_cache": get_profile_cache_stats(),
+        "score_cache": get_score_cache().stats(),
+        "skill_vocabulary": get_skill_vocabulary_stats(),
+        "llm_gateway": get_llm_gateway_stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+bench_ann_index.py
+
+Benchmark de l'index IVF (functions/ann_index.py) contre la recherche exacte.
+
+Génère un corpus synthétique de vecteurs regroupés en thèmes (comme des offres
+d'un même métier), puis mesure pour plusieurs valeurs de n_probe :
+- la latence moyenne / p99 d'une recherche,
+- le rappel@k par rapport à la recherche brute-force.
+
+Usage :
+    python benchmarks/bench_ann_index.py --n 100000 --dim 96 --k 10
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.ann_index import IVFIndex
+
+
+def make_corpus(n: int, dim: int, n_topics: int, seed: int):
+    """Vecteurs = centre de thème + bruit (proche de la structure des doc.vector)."""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    labels = rng.integers(0, n_topics, size=n)
+    vectors = topics[labels] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    queries = topics[rng.integers(0, n_topics, size=200)] + 0.6 * rng.normal(size=(200, dim)).astype(np.float32)
+    return vectors, queries
+
+
+def time_searches(fn, queries) -> tuple[float, float]:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(latencies)), float(np.percentile(latencies, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100_000, help="Taille du corpus")
+    parser.add_argument("--dim", type=int, default=96, help="Dimension des vecteurs (96 pour fr_core_news_sm)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors, queries = make_corpus(args.n, args.dim, args.topics, args.seed)
+
+    index = IVFIndex(args.dim)
+    index.add(list(range(args.n)), vectors)
+    start = time.perf_counter()
+    index.train()
+    print(f"Entraînement : {time.perf_counter() - start:.2f}s ({index.n_lists} cellules, {args.n} vecteurs)")
+
+    mean_ms, p99_ms = time_searches(lambda q: index.exact_search(q, args.k), queries)
+    print(f"\n{'mode':<14}{'moy (ms)':>10}{'p99 (ms)':>10}{'rappel@' + str(args.k):>12}")
+    print(f"{'exact':<14}{mean_ms:>10.2f}{p99_ms:>10.2f}{1.0:>12.3f}")
+
+    for n_probe in (1, 2, 4, 8, 16, 32, 64):
+        if n_probe > index.n_lists:
+            break
+        mean_ms, p99_ms = time_searches(lambda q: index.search(q, args.k, n_probe=n_probe), queries)
+        recall = index.recall_at_k(queries, args.k, n_probe=n_probe)
+        print(f"{'n_probe=' + str(n_probe):<14}{mean_ms:>10.2f}{p99_ms:>10.2f}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+bench_async_load.py
+
+Test de charge des endpoints Gemini de l'API, contre un faux serveur Gemini
+local (réponses JSON canned après --llm-latency-ms), dans les deux modes :
+- "bloquant" (GENERATOR_ASYNC_LLM=0) : service synchrone exécuté dans la
+  boucle d'événements, comme avant,
+- "asyncio" (défaut) : client asyncio du SDK et rendu hors de la boucle.
+
+Pendant que --concurrency requêtes /score-application tournent en parallèle
+(profils distincts : pas de hit de cache), une sonde appelle /score-fast en
+boucle. On mesure le débit des analyses et la latence de la sonde : en mode
+bloquant, chaque appel Gemini fige la boucle et la sonde attend.
+
+Chaque mode tourne dans un interpréteur neuf (l'app lit sa configuration à
+l'import), en ASGI direct (httpx.ASGITransport, sans serveur HTTP).
+
+Usage :
+    python benchmarks/bench_async_load.py --requests 40 --concurrency 10 --llm-latency-ms 300
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+GENERATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FAKE_ANALYSIS = {
+    "overall_score": 72,
+    "scores": {"skills_match": 80, "experience_match": 60, "education_match": 70, "language_match": 90},
+    "summary": "Profil cohérent avec l'offre.",
+    "key_strengths": ["Python"],
+    "key_gaps": [],
+    "missing_hard_skills": [],
+    "missing_soft_skills": [],
+    "recommended_improvements": [],
+    "recommended_projects_or_experiences": [],
+    "recommended_courses_or_certifications": [],
+}
+
+
+def start_fake_llm(latency_ms: float) -> ThreadingHTTPServer:
+    """Faux endpoint generateContent (API REST Gemini), un thread par requête."""
+    body = json.dumps({
+        "candidates": [{"content": {"role": "model", "parts": [{"text": json.dumps(FAKE_ANALYSIS)}]}, "finishReason": "STOP"}],
+    }).encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("content-length", 0)))
+            time.sleep(latency_ms / 1000)
+            self.send_response(200)
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_load(args) -> dict:
+    """Charge mesurée dans le sous-processus (app importée avec l'env du mode)."""
+    import httpx
+    sys.path.append(GENERATOR_DIR)
+    import app as api
+    from functions.matcher_engine import warm_up
+
+    warm_up()
+    transport = httpx.ASGITransport(app=api.app)
+    headers = {"x-gemini-api-key": "bench-key", "x-gemini-model-name": "bench-model"}
+    offer = {"id": "o1", "title": "Data Scientist (H/F)", "description": "Python, SQL et machine learning."}
+    cv = {"skills": {"hard_skills": ["Python", "SQL"]}, "raw_summary": "Étudiant en data science."}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        await client.post("/score-fast", json={"cv_data": cv, "offer_data": offer})
+        semaphore = asyncio.Semaphore(args.concurrency)
+        done = asyncio.Event()
+        probe_latencies = []
+
+        async def analysis(i: int):
+            async with semaphore:
+                response = await client.post(
+                    "/score-application",
+                    json={"cv_data": {**cv, "id": f"profile_{i}"}, "offer_data": offer},
+                    headers=headers,
+                )
+                response.raise_for_status()
+
+        async def probe():
+            # Latence vue par un client qui envoie une requête toutes les
+            # 10 ms : le retard du réveil (boucle figée) compte aussi
+            while not done.is_set():
+                scheduled = time.perf_counter() + 0.01
+                await asyncio.sleep(0.01)
+                await client.post("/score-fast", json={"cv_data": cv, "offer_data": offer})
+                probe_latencies.append(time.perf_counter() - scheduled)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(analysis(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    return {
+        "seconds": round(elapsed, 2),
+        "analyses_per_sec": round(args.requests / elapsed, 2),
+        "probe_calls": len(probe_latencies),
+        "probe_p50_ms": round(float(np.percentile(probe_latencies, 50)) * 1000, 1),
+        "probe_p99_ms": round(float(np.percentile(probe_latencies, 99)) * 1000, 1),
+        "probe_max_ms": round(max(probe_latencies) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=40, help="Requêtes /score-application")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requêtes /score-application simultanées")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="Latence du faux serveur Gemini")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_load(args))))
+        return
+
+    server = start_fake_llm(args.llm_latency_ms)
+    results = {}
+    for mode, flag in (("bloquant", "0"), ("asyncio", "1")):
+        env = {
+            **os.environ,
+            "LLM_BASE_URL": f"http://127.0.0.1:{server.server_port}",
+            "GENERATOR_ASYNC_LLM": flag,
+            "SCORE_CACHE_PATH": "",
+            "OFFER_VECTOR_STORE_DIR": "",
+            "MATCHER_POOL_WORKERS": "1",
+            # Une seule clé API : la limite de débit par clé fausserait la mesure
+            "LLM_RATE_LIMIT_PER_MINUTE": "0",
+        }
+        command = [sys.executable, os.path.abspath(__file__), "--worker",
+                   "--requests", str(args.requests), "--concurrency", str(args.concurrency)]
+        result = subprocess.run(command, cwd=GENERATOR_DIR, env=env, capture_output=True, text=True, timeout=600)
+        lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+        if result.returncode != 0 or not lines:
+            sys.exit(f"Échec du mode {mode} :\n{result.stderr[-2000:]}")
+        results[mode] = json.loads(lines[-1])
+    server.shutdown()
+
+    print(f"{args.requests} analyses, {args.concurrency} simultanées, Gemini factice à {args.llm_latency_ms:.0f} ms\n")
+    print(f"{'mode':<10}{'analyses/s':>12}{'durée (s)':>11}{'sonde p50':>11}{'sonde p99':>11}{'sonde max':>11}")
+    for mode, stats in results.items():
+        print(f"{mode:<10}{stats['analyses_per_sec']:>12.2f}{stats['seconds']:>11.2f}"
+              f"{stats['probe_p50_ms']:>9.1f}ms{stats['probe_p99_ms']:>9.1f}ms{stats['probe_max_ms']:>9.1f}ms")
+    speedup = results["asyncio"]["analyses_per_sec"] / results["bloquant"]["analyses_per_sec"]
+    print(f"\nDébit des analyses : x{speedup:.1f} ; latence p99 de /score-fast : "
+          f"{results['bloquant']['probe_p99_ms']:.0f} ms -> {results['asyncio']['probe_p99_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+bench_bm25.py
+
+Compare les moteurs de scoring de /score-batch : "spacy" (doc vectors) et
+"bm25" (index inversé lexical).
+
+Mesure pour chaque moteur le débit (offres/s) sur un deck d'offres, index
+BM25 froid (offres inédites) puis chaud (offres déjà indexées), et l'accord
+de classement entre les deux moteurs :
+- corrélation de Spearman des scores,
+- recouvrement du top-k.
+
+Usage :
+    python benchmarks/bench_bm25.py --offers 500 --profiles 20 --model fr_core_news_sm
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DOMAINS = {
+    "data": "python sql pandas machine learning statistiques modèle données tableau de bord spark",
+    "web": "javascript react typescript api node css front-end back-end django docker",
+    "finance": "comptabilité audit excel contrôle de gestion reporting budget fiscalité analyse",
+    "marketing": "seo campagne réseaux sociaux contenu communication marque analytics crm",
+    "industrie": "maintenance production qualité lean automatisme sécurité mécanique supply chain",
+}
+FILLER = "nous recherchons un profil motivé pour rejoindre notre équipe dans le cadre d'une mission en alternance".split()
+
+
+def make_text(rng: random.Random, domain: str, n_words: int) -> str:
+    words = DOMAINS[domain].split()
+    return " ".join(rng.choice(words) if rng.random() < 0.6 else rng.choice(FILLER) for _ in range(n_words))
+
+
+def spearman(a, b) -> float:
+    ra = np.argsort(np.argsort(a)).astype(float)
+    rb = np.argsort(np.argsort(b)).astype(float)
+    if ra.std() == 0 or rb.std() == 0:
+        return 0.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, default=500)
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--words", type=int, default=120, help="Mots par offre")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--model", default=None, help="Modèle spaCy (paquet ou chemin), défaut : SPACY_MODEL")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.model:
+        os.environ["SPACY_MODEL"] = args.model
+    # Pas de magasin persistant : on mesure le calcul, pas le disque
+    os.environ["OFFER_VECTOR_STORE_DIR"] = ""
+    from functions import matcher_engine
+
+    rng = random.Random(args.seed)
+    domains = list(DOMAINS)
+    offers = {f"offer_{i}": {"description": make_text(rng, rng.choice(domains), args.words)} for i in range(args.offers)}
+    profiles = [make_text(rng, rng.choice(domains), 60) for _ in range(args.profiles)]
+    if matcher_engine.warm_up()["status"] != "warm":
+        sys.exit("Modèle spaCy indisponible.")
+
+    timings = {"spacy": [], "bm25 (froid)": [], "bm25 (chaud)": []}
+    correlations, overlaps = [], []
+    for i, cv_text in enumerate(profiles):
+        start = time.perf_counter()
+        spacy_scores = dict(matcher_engine.rank_offers(cv_text, offers, engine="spacy"))
+        timings["spacy"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        bm25_scores = dict(matcher_engine.rank_offers(cv_text, offers, engine="bm25"))
+        timings["bm25 (froid)" if i == 0 else "bm25 (chaud)"].append(time.perf_counter() - start)
+
+        keys = list(offers)
+        a = np.array([spacy_scores[key] for key in keys])
+        b = np.array([bm25_scores[key] for key in keys])
+        correlations.append(spearman(a, b))
+        top_a = set(np.argsort(-a)[:args.k])
+        top_b = set(np.argsort(-b)[:args.k])
+        overlaps.append(len(top_a & top_b) / args.k)
+
+    print(f"{args.offers} offres x {args.profiles} profils\n")
+    print(f"{'moteur':<16}{'ms / deck':>12}{'offres/s':>12}")
+    for name, values in timings.items():
+        if values:
+            mean = float(np.mean(values))
+            print(f"{name:<16}{mean * 1000:>12.1f}{args.offers / mean:>12.0f}")
+    print(f"\nAccord spaCy / BM25 : Spearman moyen {np.mean(correlations):.3f}, "
+          f"recouvrement top-{args.k} moyen {np.mean(overlaps):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+bench_heuristic.py
+
+Score heuristique d'un deck d'offres pour un profil :
+- "référence" : la fonction par paire d'origine (copiée ci-dessous, commit
+  de base), appelée pour chaque offre,
+- "par paire" : compute_heuristic_score actuel appelé pour chaque offre,
+- "par lots"  : compute_heuristic_scores (CV préparé une fois, un score de
+  titre par titre distinct).
+
+Les scores de la référence diffèrent quand l'offre n'a pas de hard_skills :
+elle ne note pas de compétences là où les modes actuels les extraient du texte
+(gazetteer), ce qui explique l'écart du mode par paire. Le taux d'accord est
+affiché à titre indicatif ; avec --parsed-only, seules les offres parsées sont
+gardées (même travail dans les trois modes).
+
+Usage :
+    python benchmarks/bench_heuristic.py --offers 2000 --profiles 20
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import make_corpus
+
+# Mots vides du titre de la fonction d'origine
+_BASELINE_STOP_WORDS = {"h/f", "(h/f)", "f/h", "m/f", "-", "de", "le", "la", "les", "et", "ou", "pour", "stage", "alternance", "cdi", "cdd"}
+
+
+def baseline_heuristic_score(offer_parsed: dict, cv_parsed: dict) -> int:
+    """compute_heuristic_score tel qu'au commit de base (ensembles de chaînes)."""
+    def normalize_set(items):
+        if not items: return set()
+        return {str(i).lower().strip() for i in items if i}
+
+    offer_skills = normalize_set(offer_parsed.get("hard_skills", []))
+    cv_skills_data = cv_parsed.get("skills", {})
+    if isinstance(cv_skills_data, dict):
+        cv_skills = normalize_set(cv_skills_data.get("hard_skills", []))
+    elif isinstance(cv_skills_data, list):
+        cv_skills = normalize_set(cv_skills_data)
+    else:
+        cv_skills = set()
+
+    skill_score = 0.0
+    if offer_skills:
+        skill_score = (len(offer_skills.intersection(cv_skills)) / len(offer_skills)) * 100
+    else:
+        skill_score = 50.0
+
+    title_score = 0.0
+    offer_title = str(offer_parsed.get("title", "")).lower()
+    if offer_title:
+        offer_keywords = {w for w in offer_title.split() if w not in _BASELINE_STOP_WORDS and len(w) > 2}
+        cv_text = str(cv_parsed.get("raw_summary", "")).lower()
+        experiences = cv_parsed.get("professional_experiences", [])
+        if isinstance(experiences, list):
+            for exp in experiences:
+                cv_text += " " + str(exp.get("title", "")).lower()
+        if offer_keywords:
+            matches = sum(1 for w in offer_keywords if w in cv_text)
+            title_score = (matches / len(offer_keywords)) * 100
+
+    if not offer_skills:
+        final_score = title_score
+    elif not offer_title:
+        final_score = skill_score
+    else:
+        final_score = (skill_score * 0.7) + (title_score * 0.3)
+    return int(min(100, max(0, final_score)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, default=2000)
+    parser.add_argument("--profiles", type=int, default=20)
+    parser.add_argument("--parsed-only", action="store_true", help="Seulement les offres avec hard_skills")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from functions.compatibility import compute_heuristic_score, compute_heuristic_scores
+
+    offers, profiles = make_corpus(args.offers, args.profiles, seed=args.seed)
+    if args.parsed_only:
+        offers = {offer_id: offer for offer_id, offer in offers.items() if offer.get("hard_skills")}
+    # Compétences des offres non parsées extraites (gazetteer) hors mesure
+    compute_heuristic_scores(profiles[0], offers)
+
+    timings = {"référence": [], "par paire": [], "par lots": []}
+    agreement = []
+    for i, profile in enumerate(profiles):
+        start = time.perf_counter()
+        baseline_scores = {offer_id: baseline_heuristic_score(offer, profile) for offer_id, offer in offers.items()}
+        timings["référence"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        pair_scores = {offer_id: compute_heuristic_score(offer, profile) for offer_id, offer in offers.items()}
+        timings["par paire"].append(time.perf_counter() - start)
+        agreement.append(np.mean([baseline_scores[key] == pair_scores[key] for key in offers]))
+
+        start = time.perf_counter()
+        batch_scores = compute_heuristic_scores(profile, offers)
+        timings["par lots"].append(time.perf_counter() - start)
+        assert pair_scores == batch_scores, f"Scores différents pour le profil {i}"
+
+    print(f"{len(offers)} offres x {args.profiles} profils\n")
+    print(f"{'mode':<12}{'ms / deck':>12}{'p99 (ms)':>11}{'offres/s':>12}")
+    for name, values in timings.items():
+        mean = float(np.mean(values))
+        print(f"{name:<12}{mean * 1000:>12.1f}{np.percentile(values, 99) * 1000:>11.1f}{len(offers) / mean:>12.0f}")
+    reference = np.mean(timings["référence"])
+    print(f"\nAccélération vs référence : par paire x{reference / np.mean(timings['par paire']):.1f}, "
+          f"par lots x{reference / np.mean(timings['par lots']):.1f} "
+          f"(par paire et par lots identiques, accord avec la référence : {np.mean(agreement):.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+bench_long_texts.py
+
+Latence de la vectorisation (matcher_engine.vectorize_text_spacy) en fonction
+de la longueur du texte, avec et sans le mode par fenêtres :
+- "brut" : texte entier passé à spaCy (MATCHER_MAX_TEXT_CHARS=0, MATCHER_CHUNK_CHARS=0),
+- "fenêtres" : découpage en fenêtres de phrases, troncature et budget de temps.
+
+Pour chaque taille : p50 / p99 (ms), pic mémoire alloué (tracemalloc) et
+cosinus entre le vecteur par fenêtres et le vecteur brut. Avec le mode par
+fenêtres, le p99 doit rester plat au-delà de MATCHER_MAX_TEXT_CHARS.
+
+Usage :
+    python benchmarks/bench_long_texts.py --sizes 1000 10000 50000 200000 --runs 20
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENTENCES = [
+    "Nous recherchons un développeur Python pour rejoindre notre équipe data.",
+    "Vous participerez à la conception des pipelines de données et des modèles de machine learning.",
+    "Maîtrise de SQL, de Docker et des outils cloud appréciée.",
+    "Le poste est basé à Lyon avec deux jours de télétravail par semaine.",
+    "Vous travaillerez en méthode agile avec les équipes produit et les clients.",
+    "Une première expérience en stage ou en alternance est un plus.",
+]
+
+
+def make_text(rng: random.Random, n_chars: int) -> str:
+    parts, length = [], 0
+    while length < n_chars:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+        if rng.random() < 0.1:
+            parts.append("\n")
+    return " ".join(parts)[:n_chars]
+
+
+def measure(matcher_engine, text: str, runs: int):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        vec = matcher_engine.vectorize_text_spacy(text)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    matcher_engine.vectorize_text_spacy(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return vec, np.percentile(timings, 50) * 1000, np.percentile(timings, 99) * 1000, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 100000, 300000], help="Tailles de texte (caractères)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--model", default=None, help="Modèle spaCy (paquet ou chemin), défaut : SPACY_MODEL")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.model:
+        os.environ["SPACY_MODEL"] = args.model
+    os.environ["OFFER_VECTOR_STORE_DIR"] = ""
+    from functions import matcher_engine
+
+    if matcher_engine.warm_up()["status"] != "warm":
+        sys.exit("Modèle spaCy indisponible.")
+    nlp = matcher_engine._get_spacy_model()
+    nlp.max_length = max(nlp.max_length, max(args.sizes) + 1)
+    limits = (matcher_engine.MAX_TEXT_CHARS, matcher_engine.CHUNK_CHARS)
+
+    rng = random.Random(args.seed)
+    print(f"Fenêtres : {limits[1]} caractères, troncature à {limits[0]}, budget {matcher_engine.TEXT_BUDGET_MS:.0f} ms\n")
+    print(f"{'caractères':>10} | {'brut p50':>9}{'p99':>9}{'Mo':>8} | {'fenêtres p50':>13}{'p99':>9}{'Mo':>8} | {'cosinus':>8}")
+    for size in args.sizes:
+        text = make_text(rng, size)
+
+        matcher_engine.MAX_TEXT_CHARS, matcher_engine.CHUNK_CHARS = 0, 0
+        raw_vec, raw_p50, raw_p99, raw_mem = measure(matcher_engine, text, args.runs)
+        matcher_engine.MAX_TEXT_CHARS, matcher_engine.CHUNK_CHARS = limits
+        vec, p50, p99, mem = measure(matcher_engine, text, args.runs)
+
+        cosine = float(vec @ raw_vec / (np.linalg.norm(vec) * np.linalg.norm(raw_vec)))
+        print(f"{size:>10} | {raw_p50:>9.1f}{raw_p99:>9.1f}{raw_mem:>8.1f} | {p50:>13.1f}{p99:>9.1f}{mem:>8.1f} | {cosine:>8.4f}")
+
+    stats = matcher_engine.get_vectorization_stats()
+    print(f"\nTextes découpés : {stats['chunked_texts']}, tronqués : {stats['truncated_texts']}, "
+          f"fenêtres ignorées (budget) : {stats['budget_skipped_chunks']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+bench_quantization.py
+
+Stockage quantifié des vecteurs (functions/quantization.py) contre float32.
+
+Sur un corpus synthétique regroupé en thèmes (cf. bench_ann_index.py), mesure
+pour chaque format (float32, float16, int8) :
+- la mémoire occupée par la matrice (et le gain par rapport à float32),
+- la latence moyenne / p99 d'un scoring brute-force de tout le corpus,
+- la dérive des scores : erreur absolue moyenne et maximale,
+- la dérive du classement : rappel@k et corrélation de Spearman sur le
+  top-100 de référence (float32).
+
+Usage :
+    python benchmarks/bench_quantization.py --n 100000 --dim 96 --k 10
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.quantization import VECTOR_DTYPES, quantize_rows, quantized_scores
+
+
+def make_corpus(n: int, dim: int, n_topics: int, seed: int):
+    """Vecteurs = centre de thème + bruit (proche de la structure des doc.vector)."""
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(n_topics, dim)).astype(np.float32)
+    labels = rng.integers(0, n_topics, size=n)
+    vectors = topics[labels] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    queries = topics[rng.integers(0, n_topics, size=200)] + 0.6 * rng.normal(size=(200, dim)).astype(np.float32)
+    return vectors, queries
+
+
+def normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32)
+
+
+def spearman(a, b) -> float:
+    ra = np.argsort(np.argsort(a)).astype(float)
+    rb = np.argsort(np.argsort(b)).astype(float)
+    if ra.std() == 0 or rb.std() == 0:
+        return 1.0
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100_000, help="Taille du corpus")
+    parser.add_argument("--dim", type=int, default=96, help="Dimension des vecteurs (96 pour fr_core_news_sm, 300 pour md/lg)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--topics", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vectors, queries = make_corpus(args.n, args.dim, args.topics, args.seed)
+    matrix = normalize(vectors)
+    queries = normalize(queries)
+    reference = [matrix @ q for q in queries]
+    reference_top = [np.argsort(-scores)[:100] for scores in reference]
+    base_bytes = matrix.nbytes
+
+    print(f"{args.n} vecteurs x {args.dim} dimensions, {len(queries)} requêtes\n")
+    print(f"{'format':<10}{'Mo':>8}{'gain':>8}{'moy (ms)':>10}{'p99 (ms)':>10}"
+          f"{'err moy':>10}{'err max':>10}{'rappel@' + str(args.k):>11}{'spearman@100':>14}")
+    for dtype in VECTOR_DTYPES:
+        data, scales = quantize_rows(matrix, dtype)
+        nbytes = data.nbytes + (0 if scales is None else scales.nbytes)
+
+        latencies, errors, recalls, correlations = [], [], [], []
+        max_error = 0.0
+        for query, ref_scores, ref_top in zip(queries, reference, reference_top):
+            start = time.perf_counter()
+            scores = quantized_scores(data, scales, query)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            diff = np.abs(scores - ref_scores)
+            errors.append(float(diff.mean()))
+            max_error = max(max_error, float(diff.max()))
+            top = np.argpartition(-scores, args.k - 1)[:args.k]
+            recalls.append(len(set(top) & set(ref_top[:args.k])) / args.k)
+            correlations.append(spearman(ref_scores[ref_top], scores[ref_top]))
+
+        print(f"{dtype:<10}{nbytes / 1e6:>8.1f}{base_bytes / nbytes:>7.1f}x"
+              f"{np.mean(latencies):>10.2f}{np.percentile(latencies, 99):>10.2f}"
+              f"{np.mean(errors):>10.5f}{max_error:>10.5f}{np.mean(recalls):>11.3f}{np.mean(correlations):>14.4f}")
+
+
+if __name__ == "__main__":
+    main()
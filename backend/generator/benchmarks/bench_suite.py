@@ -0,0 +1,200 @@
+"""
+bench_suite.py
+
+Suite de benchmarks reproductible du matching local, sur un corpus synthétique
+(benchmarks/synthetic_corpus.py, graine fixe) :
+
+- cold_start : import du moteur + warm_up, mesuré dans un interpréteur neuf,
+- rank_offers_spacy_cold : premier deck, magasin de vecteurs vide,
+- rank_offers_spacy : decks suivants (vecteurs d'offres déjà calculés),
+- rank_offers_bm25 : moteur lexical,
+- heuristic_score : compatibility.compute_heuristic_score par paire (profil, offre),
+- missing_keywords : matcher_engine.analyze_missing_keywords_spacy par paire.
+
+Pour chaque scénario : débit (offres/s), latences p50/p99 par appel (ms) et
+pic de RSS du processus. Les résultats sont écrits en JSON pour comparer des
+exécutions (--compare ancien.json affiche les écarts).
+
+Usage :
+    python benchmarks/bench_suite.py --offers 1000 --profiles 20 --output bench.json
+    python benchmarks/bench_suite.py --compare bench.json --output bench_new.json
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Windows : pas de getrusage, le pic de RSS n'est pas mesuré
+    resource = None
+
+GENERATOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(GENERATOR_DIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_corpus import make_corpus
+
+COLD_START_CODE = """
+import json, time
+start = time.perf_counter()
+from functions import matcher_engine
+imported = time.perf_counter()
+state = matcher_engine.warm_up()
+print(json.dumps({
+    "import_seconds": round(imported - start, 3),
+    "warm_up_seconds": round(time.perf_counter() - imported, 3),
+    "total_seconds": round(time.perf_counter() - start, 3),
+    "model_load_seconds": state["load_seconds"],
+    "status": state["status"],
+}))
+"""
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sur macOS, kilo-octets sur Linux
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies: list, items: int) -> dict:
+    total = float(sum(latencies))
+    return {
+        "calls": len(latencies),
+        "items": items,
+        "seconds": round(total, 4),
+        "offers_per_sec": round(items / total, 1) if total > 0 else None,
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3) if latencies else None,
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3) if latencies else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def measure_cold_start() -> dict:
+    """Import + warm_up dans un sous-processus (cache disque de l'OS déjà chaud)."""
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_START_CODE],
+        cwd=GENERATOR_DIR, env=os.environ.copy(), capture_output=True, text=True, timeout=600,
+    )
+    lines = [line for line in result.stdout.splitlines() if line.startswith("{")]
+    if result.returncode != 0 or not lines:
+        return {"error": (result.stderr or result.stdout).strip()[-500:]}
+    return json.loads(lines[-1])
+
+
+def run_suite(args) -> dict:
+    from functions import matcher_engine
+    from functions.compatibility import compute_heuristic_score
+
+    offers, profiles = make_corpus(args.offers, args.profiles, seed=args.seed, n_sentences=args.sentences)
+    results = {"cold_start": measure_cold_start()}
+
+    if matcher_engine.warm_up()["status"] != "warm":
+        sys.exit("Modèle spaCy indisponible.")
+    scenarios = {}
+
+    # 1. Scoring sémantique : premier deck à froid, puis régime permanent
+    cold = timed(matcher_engine.rank_offers, profiles[0], offers)
+    scenarios["rank_offers_spacy_cold"] = summarize([cold], len(offers))
+    latencies = [timed(matcher_engine.rank_offers, profile, offers) for profile in profiles[1:]]
+    scenarios["rank_offers_spacy"] = summarize(latencies, len(offers) * len(latencies))
+
+    # 2. Scoring lexical BM25 (l'index est alimenté au premier deck)
+    latencies = [timed(matcher_engine.rank_offers, profile, offers, None, None, "bm25") for profile in profiles]
+    scenarios["rank_offers_bm25"] = summarize(latencies, len(offers) * len(latencies))
+
+    # 3-4. Heuristique et mots-clés manquants, paire par paire
+    offer_list = list(offers.values())[:args.pairs_per_profile]
+    latencies = [
+        timed(compute_heuristic_score, offer, profile)
+        for profile in profiles for offer in offer_list
+    ]
+    scenarios["heuristic_score"] = summarize(latencies, len(latencies))
+
+    latencies = [
+        timed(matcher_engine.analyze_missing_keywords_spacy, matcher_engine._build_cv_text(profile), offer["description"])
+        for profile in profiles for offer in offer_list
+    ]
+    scenarios["missing_keywords"] = summarize(latencies, len(latencies))
+
+    results["scenarios"] = scenarios
+    results["matcher_stats"] = matcher_engine.get_vectorization_stats()
+    return results
+
+
+def print_report(results: dict, baseline: dict = None):
+    cold = results["cold_start"]
+    if "error" in cold:
+        print(f"Démarrage à froid : erreur ({cold['error']})")
+    else:
+        print(f"Démarrage à froid : {cold['total_seconds']}s (import {cold['import_seconds']}s, warm-up {cold['warm_up_seconds']}s)")
+    print(f"\n{'scénario':<26}{'offres/s':>12}{'p50 (ms)':>11}{'p99 (ms)':>11}{'RSS (Mo)':>10}")
+    for name, stats in results["scenarios"].items():
+        line = f"{name:<26}{stats['offers_per_sec'] or 0:>12.1f}{stats['p50_ms']:>11.2f}{stats['p99_ms']:>11.2f}{stats['peak_rss_mb'] or 0:>10.1f}"
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old and old.get("offers_per_sec") and stats["offers_per_sec"]:
+            line += f"   débit {stats['offers_per_sec'] / old['offers_per_sec'] - 1:+.1%}, p99 {stats['p99_ms'] / old['p99_ms'] - 1:+.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--offers", type=int, default=1000, help="Offres par deck")
+    parser.add_argument("--profiles", type=int, default=20, help="Profils (un deck chacun)")
+    parser.add_argument("--sentences", type=int, default=8, help="Phrases par description d'offre")
+    parser.add_argument("--pairs-per-profile", type=int, default=200, help="Offres par profil pour l'heuristique et les mots-clés")
+    parser.add_argument("--model", default=None, help="Modèle spaCy (paquet ou chemin), défaut : SPACY_MODEL")
+    parser.add_argument("--disk-cache", action="store_true", help="Cache de scores sur disque (défaut : mémoire seule)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="bench_results.json", help="Fichier JSON des résultats")
+    parser.add_argument("--compare", default=None, help="Résultats JSON d'une exécution précédente")
+    args = parser.parse_args()
+
+    # Magasins isolés dans un dossier temporaire : chaque exécution part de zéro
+    workdir = tempfile.mkdtemp(prefix="jobswipe_bench_")
+    if args.model:
+        os.environ["SPACY_MODEL"] = args.model
+    os.environ["OFFER_VECTOR_STORE_DIR"] = os.path.join(workdir, "vector_store")
+    os.environ["SCORE_CACHE_PATH"] = os.path.join(workdir, "score_cache.sqlite3") if args.disk_cache else ""
+    os.environ.setdefault("MATCHER_POOL_WORKERS", "1")
+
+    results = run_suite(args)
+    results["meta"] = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "spacy_model": os.getenv("SPACY_MODEL", "fr_core_news_sm"),
+        "args": vars(args),
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\nRésultats écrits dans {args.output}")
+
+
+if __name__ == "__main__":
+    main()
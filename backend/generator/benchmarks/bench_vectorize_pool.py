@@ -0,0 +1,74 @@
+"""
+bench_vectorize_pool.py
+
+Benchmark de la vectorisation des offres : en processus vs pool de processus
+(matcher_engine.vectorize_texts_spacy), pour plusieurs nombres de workers.
+
+Le pool est démarré et préchauffé avant la mesure : on mesure le régime
+permanent d'un serveur, pas le coût de lancement des workers.
+
+Usage :
+    python benchmarks/bench_vectorize_pool.py --n 2000 --workers 1 2 4 8
+    python benchmarks/bench_vectorize_pool.py --model /chemin/vers/modele
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORDS = (
+    "développeur python data analyste stage alternance équipe projet client api cloud "
+    "données modèle machine learning sql docker kubernetes react agile scrum produit "
+    "mission profil expérience compétences formation master ingénieur paris lyon"
+).split()
+
+
+def make_texts(n: int, words_per_text: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_text)).capitalize() + "." for _ in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=2000, help="Nombre d'offres")
+    parser.add_argument("--words", type=int, default=150, help="Mots par offre")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--model", default=None, help="Modèle spaCy (paquet ou chemin), défaut : SPACY_MODEL")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.model:
+        os.environ["SPACY_MODEL"] = args.model
+    from functions import matcher_engine
+
+    texts = make_texts(args.n, args.words, args.seed)
+    if matcher_engine._get_spacy_model() is None:
+        sys.exit("Modèle spaCy indisponible.")
+    print(f"{args.n} offres de {args.words} mots, {os.cpu_count()} cœurs\n")
+    print(f"{'workers':<10}{'secondes':>10}{'offres/s':>12}{'speedup':>10}")
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        matcher_engine.POOL_WORKERS = workers
+        matcher_engine.POOL_THRESHOLD = 1
+        if matcher_engine._pool is not None:
+            matcher_engine._pool.shutdown()
+            matcher_engine._pool = None
+        # Préchauffage : lancement des workers et chargement du modèle
+        matcher_engine.vectorize_texts_spacy(texts[: workers * 4])
+
+        start = time.perf_counter()
+        vectors = matcher_engine.vectorize_texts_spacy(texts)
+        elapsed = time.perf_counter() - start
+        assert len(vectors) == len(texts) and all(v is not None for v in vectors)
+
+        baseline = baseline or elapsed
+        print(f"{workers:<10}{elapsed:>10.2f}{len(texts) / elapsed:>12.1f}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
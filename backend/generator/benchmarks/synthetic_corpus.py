@@ -0,0 +1,154 @@
+"""
+synthetic_corpus.py
+
+Générateur reproductible (graine fixe) d'offres et de profils synthétiques en
+français, au format des données réelles :
+- offres brutes type Adzuna : id, title, company_name, location, contract_type,
+  description (parfois hard_skills, comme une offre déjà parsée),
+- profils parsés type parse_cv_with_gemini : skills, raw_summary,
+  professional_experiences.
+
+Les offres et les profils sont tirés de quelques métiers (data, web, finance...)
+pour que les scores aient une structure réaliste (profils proches de certaines
+offres, éloignés des autres).
+"""
+
+import random
+
+DOMAINS = {
+    "data": {
+        "titles": ["Data Scientist", "Data Analyst", "Data Engineer", "Ingénieur Machine Learning"],
+        "skills": ["Python", "SQL", "Pandas", "Machine Learning", "Spark", "Power BI", "Airflow", "Docker", "Statistiques"],
+        "missions": [
+            "Concevoir et industrialiser des modèles de machine learning",
+            "Construire des pipelines de données fiables et documentés",
+            "Réaliser des analyses statistiques pour les équipes métier",
+            "Mettre en place des tableaux de bord de suivi de l'activité",
+        ],
+    },
+    "web": {
+        "titles": ["Développeur Full Stack", "Développeur Front-End", "Développeur Back-End", "Ingénieur DevOps"],
+        "skills": ["JavaScript", "TypeScript", "React", "Node.js", "Django", "Docker", "Kubernetes", "PostgreSQL", "Git"],
+        "missions": [
+            "Développer de nouvelles fonctionnalités sur notre application web",
+            "Concevoir des API REST performantes et sécurisées",
+            "Participer aux revues de code et à l'amélioration continue",
+            "Automatiser les déploiements et la supervision de la plateforme",
+        ],
+    },
+    "finance": {
+        "titles": ["Contrôleur de Gestion", "Analyste Financier", "Auditeur Junior", "Comptable"],
+        "skills": ["Excel", "SAP", "VBA", "Power BI", "SQL"],
+        "missions": [
+            "Préparer le reporting mensuel et les prévisions budgétaires",
+            "Analyser les écarts entre le budget et le réalisé",
+            "Participer aux clôtures mensuelles et annuelles",
+            "Contribuer aux missions d'audit auprès de nos clients",
+        ],
+    },
+    "marketing": {
+        "titles": ["Chargé de Marketing Digital", "Chef de Projet SEO", "Community Manager", "Growth Marketer"],
+        "skills": ["SEO", "Google Analytics", "CRM", "Figma", "Excel", "Salesforce"],
+        "missions": [
+            "Piloter les campagnes d'acquisition sur les réseaux sociaux",
+            "Optimiser le référencement naturel de nos sites",
+            "Analyser la performance des campagnes et proposer des actions",
+            "Créer des contenus engageants pour notre communauté",
+        ],
+    },
+    "industrie": {
+        "titles": ["Ingénieur Méthodes", "Technicien de Maintenance", "Ingénieur Qualité", "Responsable Supply Chain"],
+        "skills": ["AutoCAD", "SolidWorks", "SAP", "Excel", "Agile"],
+        "missions": [
+            "Améliorer la performance des lignes de production",
+            "Assurer la maintenance préventive et curative des équipements",
+            "Déployer les démarches lean et qualité sur le site",
+            "Optimiser les flux logistiques avec les fournisseurs",
+        ],
+    },
+}
+
+COMPANIES = ["Airbus", "Capgemini", "BNP Paribas", "Decathlon", "Orange", "Thales", "Doctolib", "Michelin", "L'Oréal", "Ubisoft"]
+CITIES = ["Paris", "Lyon", "Toulouse", "Nantes", "Bordeaux", "Lille", "Marseille", "Rennes"]
+CONTRACTS = ["Alternance", "Stage", "CDI", "CDD"]
+FILLER = [
+    "Rejoignez une équipe dynamique et bienveillante.",
+    "Vous serez accompagné par un tuteur expérimenté tout au long de votre parcours.",
+    "Nous offrons un environnement de travail stimulant avec du télétravail partiel.",
+    "Vous êtes curieux, rigoureux et avez le goût du travail en équipe.",
+    "Une première expérience en stage ou en alternance est appréciée.",
+    "Le poste est à pourvoir dès que possible.",
+]
+SCHOOLS = ["IMT Atlantique", "Université de Lyon", "EPITA", "Sorbonne Université", "INSA Toulouse", "NEOMA"]
+
+
+def _pick_domain(rng: random.Random) -> str:
+    return rng.choice(list(DOMAINS))
+
+
+def make_offer(rng: random.Random, offer_id: str, n_sentences: int = 8, parsed_ratio: float = 0.2) -> dict:
+    """Une offre brute ; une part `parsed_ratio` porte aussi des hard_skills (offre déjà parsée)."""
+    domain = DOMAINS[_pick_domain(rng)]
+    title = rng.choice(domain["titles"])
+    skills = rng.sample(domain["skills"], k=min(len(domain["skills"]), rng.randint(3, 6)))
+    city = rng.choice(CITIES)
+    contract = rng.choice(CONTRACTS)
+
+    sentences = [f"{rng.choice(COMPANIES)} recrute un(e) {title} en {contract.lower()} à {city}."]
+    for _ in range(n_sentences):
+        if rng.random() < 0.5:
+            sentences.append(rng.choice(domain["missions"]) + ".")
+        elif rng.random() < 0.5:
+            sentences.append(f"Vous maîtrisez {', '.join(rng.sample(skills, k=min(2, len(skills))))}.")
+        else:
+            sentences.append(rng.choice(FILLER))
+    sentences.append(f"Compétences attendues : {', '.join(skills)}.")
+
+    offer = {
+        "id": offer_id,
+        "title": f"{title} (H/F)",
+        "company_name": rng.choice(COMPANIES),
+        "location": city,
+        "contract_type": contract,
+        "description": " ".join(sentences),
+    }
+    if rng.random() < parsed_ratio:
+        offer["hard_skills"] = skills
+    return offer
+
+
+def make_profile(rng: random.Random, profile_id: str) -> dict:
+    """Un profil parsé (format de parse_cv_with_gemini, champs utiles au matching)."""
+    domain_name = _pick_domain(rng)
+    domain = DOMAINS[domain_name]
+    skills = rng.sample(domain["skills"], k=min(len(domain["skills"]), rng.randint(3, 6)))
+    # Quelques compétences d'un autre métier, comme dans un vrai parcours
+    other = DOMAINS[_pick_domain(rng)]["skills"]
+    skills += [s for s in rng.sample(other, k=2) if s not in skills]
+
+    experiences = []
+    for _ in range(rng.randint(1, 3)):
+        experiences.append({
+            "title": rng.choice(domain["titles"]) + rng.choice([" (stage)", " (alternance)", ""]),
+            "company": rng.choice(COMPANIES),
+            "location": rng.choice(CITIES),
+            "description": " ".join(rng.sample(domain["missions"], k=2)) + f" Outils : {', '.join(rng.sample(skills, k=2))}.",
+        })
+
+    return {
+        "id": profile_id,
+        "skills": {"hard_skills": skills, "soft_skills": ["Travail en équipe", "Rigueur"], "languages": ["Français", "Anglais"]},
+        "raw_summary": f"Étudiant en {domain_name} à {rng.choice(SCHOOLS)}, à la recherche d'une alternance. "
+                       f"{rng.choice(domain['missions'])}.",
+        "professional_experiences": experiences,
+    }
+
+
+def make_corpus(n_offers: int, n_profiles: int, seed: int = 0, n_sentences: int = 8) -> tuple[dict, list]:
+    """
+    Corpus reproductible : ({id: offre}, [profils]).
+    """
+    rng = random.Random(seed)
+    offers = {f"offer_{i}": make_offer(rng, f"offer_{i}", n_sentences) for i in range(n_offers)}
+    profiles = [make_profile(rng, f"profile_{i}") for i in range(n_profiles)]
+    return offers, profiles
@@ -0,0 +1,387 @@
+"""
+ann_index.py
+
+Index de plus proches voisins approché (IVF) en NumPy pur, pour matcher un CV
+contre tout le corpus d'offres ingérées (100k+) en quelques millisecondes.
+
+Principe (Inverted File Index) :
+- Les vecteurs (normalisés) sont répartis en `n_lists` cellules par un k-means
+  sphérique entraîné sur un échantillon.
+- Une recherche ne compare la requête qu'aux vecteurs des `n_probe` cellules
+  dont le centroïde est le plus proche : `n_probe` règle le compromis
+  rappel / latence (n_probe = n_lists équivaut à la recherche exacte).
+- `exact_search` fournit la référence brute-force pour mesurer le rappel.
+- Les vecteurs peuvent être stockés en float16 ou int8 (cf. quantization.py),
+  les centroïdes restent en float32.
+- L'entraînement et le compactage des lignes supprimées se font hors de la
+  recherche, dans `maintain` (appelé à l'ingestion) et `save`.
+"""
+
+import os
+import uuid
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .quantization import check_dtype, quantize_rows, dequantize_rows, quantized_scores
+except ImportError:
+    from quantization import check_dtype, quantize_rows, dequantize_rows, quantized_scores
+
+# En dessous de ce volume, la recherche exacte est aussi rapide que l'IVF
+MIN_TRAIN_SIZE = 2048
+
+# Nombre de points d'entraînement du k-means par cellule
+TRAIN_POINTS_PER_LIST = 64
+
+# Part de lignes supprimées (ids remplacés) au-delà de laquelle maintain() compacte
+MAX_DEAD_RATIO = 0.25
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(scores, k: int):
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Index IVF sur des vecteurs de documents, avec filtres sur métadonnées.
+    """
+
+    def __init__(self, dim: int, n_lists: int = None, n_probe: int = 8, filter_fields: tuple = (), seed: int = 0, dtype: str = "float32"):
+        self.dim = dim
+        self.dtype = check_dtype(dtype)
+        self.n_lists = n_lists
+        self._requested_lists = n_lists
+        self.n_probe = n_probe
+        self.filter_fields = tuple(filter_fields)
+        self.seed = seed
+
+        self._ids = []
+        self._id_to_row = {}
+        self._blocks = []
+        self._vectors, self._scales = quantize_rows(np.zeros((0, dim), dtype=np.float32), self.dtype)
+        self._alive = np.zeros(0, dtype=bool)
+        self._columns = {field: [] for field in self.filter_fields}
+        self._column_arrays = None
+
+        self.centroids = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._list_order = None
+        self._list_offsets = None
+        self._trained_size = 0
+
+    # ------------------------------------------------------------------
+    # Alimentation
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._id_to_row)
+
+    def add(self, ids: list, vectors, metadata: list = None):
+        """
+        Ajoute des vecteurs. Un id déjà présent est remplacé (l'ancienne ligne
+        est marquée supprimée, puis retirée au prochain compactage).
+        Appeler maintain() après l'ingestion pour entraîner l'index.
+        """
+        if not len(ids):
+            return
+        block = _normalize(vectors)
+        if block.shape != (len(ids), self.dim):
+            raise ValueError(f"Attendu {len(ids)} vecteurs de dimension {self.dim}, reçu {block.shape}.")
+        metadata = metadata or [{}] * len(ids)
+
+        # Les vecteurs restent en attente dans self._blocks jusqu'à la prochaine recherche
+        first_row = len(self._ids)
+        for offset, (offer_id, meta) in enumerate(zip(ids, metadata)):
+            old_row = self._id_to_row.get(offer_id)
+            if old_row is not None and old_row < len(self._alive):
+                self._alive[old_row] = False
+            self._id_to_row[offer_id] = first_row + offset
+            self._ids.append(offer_id)
+            for field in self.filter_fields:
+                value = meta.get(field)
+                self._columns[field].append(None if value is None else str(value))
+        self._blocks.append(block)
+        self._column_arrays = None
+
+    def _consolidate(self):
+        """Fusionne les blocs ajoutés et les affecte aux cellules existantes."""
+        if not self._blocks:
+            return
+        new = np.vstack(self._blocks)
+        self._blocks = []
+        data, scales = quantize_rows(new, self.dtype)
+        self._vectors = np.vstack([self._vectors, data])
+        if scales is not None:
+            self._scales = np.concatenate([self._scales, scales])
+        alive = np.ones(len(new), dtype=bool)
+        # Un id ré-ajouté dans le même lot : seule la dernière ligne reste vivante
+        start = len(self._alive)
+        for row in range(start, start + len(new)):
+            if self._id_to_row[self._ids[row]] != row:
+                alive[row - start] = False
+        self._alive = np.concatenate([self._alive, alive])
+
+        if self.centroids is not None:
+            self._assignments = np.concatenate([self._assignments, self._assign(new)])
+            self._rebuild_lists()
+
+    def _columns_as_arrays(self) -> dict:
+        if self._column_arrays is None:
+            self._column_arrays = {field: np.array(values, dtype=object) for field, values in self._columns.items()}
+        return self._column_arrays
+
+    # ------------------------------------------------------------------
+    # Entraînement (k-means sphérique)
+    # ------------------------------------------------------------------
+
+    def train(self, n_iter: int = 10):
+        """
+        Entraîne les centroïdes sur un échantillon des vecteurs vivants puis
+        réaffecte toutes les lignes.
+        """
+        self._consolidate()
+        rows = np.flatnonzero(self._alive)
+        if not len(rows):
+            return
+        n_lists = self._requested_lists or int(np.clip(np.sqrt(len(rows)), 1, 4096))
+        n_lists = min(n_lists, len(rows))
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(rows), n_lists * TRAIN_POINTS_PER_LIST)
+        sample = self._rows_as_float(rng.choice(rows, size=sample_size, replace=False))
+        if self.dtype != "float32":
+            sample = _normalize(sample)
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+        for _ in range(n_iter):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            # Cellule vide : on la réinitialise sur un point aléatoire
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = _normalize(sums)
+
+        self.centroids = centroids
+        self.n_lists = n_lists
+        self._assignments = self._assign(self._vectors, self._scales)
+        self._rebuild_lists()
+        self._trained_size = len(rows)
+
+    def _rows_as_float(self, rows):
+        return dequantize_rows(self._vectors[rows], None if self._scales is None else self._scales[rows])
+
+    def _assign(self, vectors, scales=None):
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        # Par blocs pour borner la mémoire du produit (n, n_lists) et de la déquantification
+        for start in range(0, len(vectors), 65536):
+            chunk = dequantize_rows(vectors[start:start + 65536], None if scales is None else scales[start:start + 65536])
+            assignments[start:start + len(chunk)] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assignments
+
+    def _rebuild_lists(self):
+        """Listes inversées au format CSR : lignes triées par cellule + offsets."""
+        self._list_order = np.argsort(self._assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(self._assignments, minlength=self.n_lists)
+        self._list_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    # ------------------------------------------------------------------
+    # Maintenance (hors du chemin des requêtes)
+    # ------------------------------------------------------------------
+
+    def compact(self):
+        """
+        Retire les lignes supprimées (ids remplacés) : vecteurs, métadonnées
+        et affectations aux cellules ne gardent que les lignes vivantes.
+        """
+        self._consolidate()
+        keep = np.flatnonzero(self._alive)
+        if len(keep) == len(self._alive):
+            return
+        self._vectors = self._vectors[keep]
+        if self._scales is not None:
+            self._scales = self._scales[keep]
+        self._ids = [self._ids[row] for row in keep]
+        self._id_to_row = {offer_id: row for row, offer_id in enumerate(self._ids)}
+        for field, values in self._columns.items():
+            self._columns[field] = [values[row] for row in keep]
+        self._column_arrays = None
+        self._alive = np.ones(len(keep), dtype=bool)
+        if self.centroids is not None:
+            self._assignments = self._assignments[keep]
+            self._rebuild_lists()
+
+    def maintain(self):
+        """
+        À appeler après une ingestion : intègre les vecteurs en attente,
+        compacte au-delà de MAX_DEAD_RATIO lignes supprimées, puis entraîne
+        l'index la première fois (MIN_TRAIN_SIZE vecteurs) et à chaque fois
+        que le corpus a quadruplé depuis le dernier entraînement.
+        """
+        self._consolidate()
+        if len(self._alive) and 1.0 - len(self) / len(self._alive) > MAX_DEAD_RATIO:
+            self.compact()
+        alive = len(self)
+        if alive < MIN_TRAIN_SIZE:
+            return
+        if self.centroids is None or alive > 4 * self._trained_size:
+            self.train()
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def _filter_mask(self, rows, filters: dict):
+        mask = self._alive[rows]
+        if filters:
+            columns = self._columns_as_arrays()
+            for field, wanted in filters.items():
+                if field not in columns:
+                    raise ValueError(f"Filtre non indexé : '{field}' (champs disponibles : {list(self.filter_fields)}).")
+                values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+                mask &= np.isin(columns[field][rows], [str(v) for v in values])
+        return mask
+
+    def exact_search(self, query, k: int = 10, filters: dict = None) -> list[tuple]:
+        """
+        Recherche brute-force (référence pour mesurer le rappel).
+        """
+        self._consolidate()
+        rows = np.arange(len(self._alive))
+        return self._score_rows(query, rows[self._filter_mask(rows, filters)], k)
+
+    def search(self, query, k: int = 10, filters: dict = None, n_probe: int = None) -> list[tuple]:
+        """
+        Recherche approchée des k vecteurs les plus proches (cosinus).
+
+        Args:
+            query (numpy.ndarray): Vecteur requête (non nécessairement normalisé).
+            k (int): Nombre de résultats.
+            filters (dict): {champ: valeur | [valeurs]} sur les champs indexés.
+            n_probe (int): Nombre de cellules visitées (défaut : self.n_probe).
+
+        Returns:
+            list[tuple]: [(id, score), ...] triés par score décroissant.
+            Tant que l'index n'est pas entraîné (cf. maintain), la recherche
+            est exacte.
+        """
+        self._consolidate()
+        if self.centroids is None:
+            return self.exact_search(query, k, filters)
+
+        q = _normalize(query)[0]
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        cells = _top_k(self.centroids @ q, n_probe)
+        rows = np.concatenate([
+            self._list_order[self._list_offsets[c]:self._list_offsets[c + 1]] for c in cells
+        ])
+        rows = rows[self._filter_mask(rows, filters)]
+        if len(rows) < k and filters:
+            # Filtre très sélectif : les cellules visitées ne suffisent pas
+            return self.exact_search(query, k, filters)
+        return self._score_rows(query, rows, k)
+
+    def _score_rows(self, query, rows, k: int) -> list[tuple]:
+        if not len(rows) or k <= 0:
+            return []
+        q = _normalize(query)[0]
+        scores = np.clip(quantized_scores(self._vectors, self._scales, q, rows), 0.0, 1.0)
+        top = _top_k(scores, k)
+        return [(self._ids[rows[i]], round(float(scores[i]), 4)) for i in top]
+
+    def recall_at_k(self, queries, k: int = 10, n_probe: int = None) -> float:
+        """
+        Rappel moyen de `search` par rapport à `exact_search` sur des requêtes.
+        """
+        total = 0.0
+        for query in queries:
+            exact = {offer_id for offer_id, _ in self.exact_search(query, k)}
+            approx = {offer_id for offer_id, _ in self.search(query, k, n_probe=n_probe)}
+            total += len(exact & approx) / max(1, len(exact))
+        return total / max(1, len(queries))
+
+    def stats(self) -> dict:
+        return {
+            "vectors": len(self),
+            "n_lists": self.n_lists if self.centroids is not None else 0,
+            "n_probe": self.n_probe,
+            "trained": self.centroids is not None,
+            "dtype": self.dtype,
+            "vector_bytes": int(self._vectors.nbytes + (0 if self._scales is None else self._scales.nbytes)),
+        }
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def save(self, path: str):
+        """
+        Sauvegarde l'index (format .npz, sans pickle), après compactage : les
+        lignes supprimées ne sont pas persistées. Les ids entiers sont relus
+        en int, tous les autres en str.
+        """
+        self.compact()
+        arrays = {
+            "vectors": self._vectors,
+            "alive": self._alive,
+            "ids": np.array([str(i) for i in self._ids], dtype=str),
+            "int_ids": np.array([isinstance(i, (int, np.integer)) and not isinstance(i, bool) for i in self._ids], dtype=bool),
+            "params": np.array([self.dim, self._requested_lists or 0, self.n_probe, self.seed, self._trained_size]),
+            "filter_fields": np.array(self.filter_fields, dtype=str),
+            "dtype": np.array(self.dtype),
+        }
+        if self._scales is not None:
+            arrays["scales"] = self._scales
+        for field, values in self._columns.items():
+            arrays[f"col_{field}"] = np.array(["" if v is None else v for v in values], dtype=str)
+            arrays[f"isnull_{field}"] = np.array([v is None for v in values], dtype=bool)
+        if self.centroids is not None:
+            arrays["centroids"] = self.centroids
+            arrays["assignments"] = self._assignments
+        # Nom temporaire propre à l'écriture : plusieurs processus peuvent sauvegarder
+        tmp_path = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        data = np.load(path, allow_pickle=False)
+        dim, n_lists, n_probe, seed, trained_size = (int(v) for v in data["params"])
+        # Index sauvegardé avant la quantification : float32
+        dtype = str(data["dtype"]) if "dtype" in data else "float32"
+        index = cls(dim, n_lists=n_lists or None, n_probe=n_probe, filter_fields=tuple(data["filter_fields"].tolist()), seed=seed, dtype=dtype)
+        index._vectors = data["vectors"]
+        index._scales = data["scales"] if "scales" in data else None
+        index._alive = data["alive"]
+        index._ids = data["ids"].tolist()
+        # Index sauvegardé sans le type des ids : tous en str
+        if "int_ids" in data:
+            index._ids = [int(i) if is_int else i for i, is_int in zip(index._ids, data["int_ids"])]
+        index._id_to_row = {offer_id: row for row, offer_id in enumerate(index._ids) if index._alive[row]}
+        for field in index.filter_fields:
+            values = data[f"col_{field}"].tolist()
+            nulls = data[f"isnull_{field}"]
+            index._columns[field] = [None if nulls[i] else v for i, v in enumerate(values)]
+        if "centroids" in data:
+            index.centroids = data["centroids"]
+            index.n_lists = len(index.centroids)
+            index._assignments = data["assignments"]
+            index._rebuild_lists()
+            index._trained_size = trained_size
+        return index
@@ -0,0 +1,134 @@
+import os
+import uuid
+import asyncio
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+
+# Imports robustes (gère l'exécution directe ou via package)
+try:
+    from .generator_service import JobSwipeGeneratorService
+    from .cv_parsing import aparse_cv_with_gemini, extract_text_from_file
+    from .job_offer_parser import aparse_job_offer_gemini
+    from .compatibility import ascore_profile_with_gemini
+    from .experience_generator import agenerate_full_cv_content
+    from .cover_letter_generator import agenerate_letter_structure_with_gemini, render_cover_letter_files
+except ImportError:
+    from generator_service import JobSwipeGeneratorService
+    from cv_parsing import aparse_cv_with_gemini, extract_text_from_file
+    from job_offer_parser import aparse_job_offer_gemini
+    from compatibility import ascore_profile_with_gemini
+    from experience_generator import agenerate_full_cv_content
+    from cover_letter_generator import agenerate_letter_structure_with_gemini, render_cover_letter_files
+
+# Threads dédiés au travail CPU/disque du générateur (rendu PDF xhtml2pdf,
+# DOCX, extraction du texte des CV) : la boucle d'événements reste libre
+GENERATOR_CPU_WORKERS = int(os.getenv("GENERATOR_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+class AsyncJobSwipeGeneratorService:
+    """
+    Variante asyncio de JobSwipeGeneratorService, pour les endpoints async :
+    - les appels Gemini passent par le client asyncio du SDK (aucun thread
+      bloqué pendant l'attente de la réponse),
+    - le rendu des fichiers et l'extraction de texte tournent dans un pool de
+      threads dédié.
+    Les méthodes ont les mêmes noms et arguments que le service synchrone.
+    """
+
+    def __init__(self, output_dir: str = "output", cpu_workers: int = GENERATOR_CPU_WORKERS):
+        self.sync = JobSwipeGeneratorService(output_dir=output_dir)
+        self.output_dir = self.sync.output_dir
+        self._executor = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="generator-cpu")
+
+    async def _run_cpu(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def process_cv(
+        self,
+        cv_parsed: Dict[str, Any],
+        offer_parsed: Dict[str, Any],
+        api_key: str,
+        model_name: str
+    ) -> Dict[str, Any]:
+        """
+        Génère uniquement le CV (Content -> PDF).
+        Suppose que le parsing est déjà fait.
+        """
+        user_data = self.sync.build_cv_user_data(cv_parsed)
+        generated_content = await agenerate_full_cv_content(offer_parsed, user_data, api_key=api_key, model_name=model_name)
+        paths = await self._run_cpu(self.sync.render_cv_files, cv_parsed, generated_content)
+        return {
+            'cv_parsed': cv_parsed,
+            'offer_parsed': offer_parsed,
+            'generated_content': generated_content,
+            'paths': paths,
+        }
+
+    async def process_motivation(
+        self,
+        cv_parsed: Dict[str, Any],
+        offer_parsed: Dict[str, Any],
+        gender: str = "M",
+        api_key: str = "",
+        model_name: str = "gemini-1.5-flash"
+    ) -> Dict[str, Any]:
+        """
+        Génère uniquement la lettre de motivation.
+        Suppose que le parsing est déjà fait.
+        """
+        chunks = await agenerate_letter_structure_with_gemini(
+            offer_parsed=offer_parsed,
+            cv_parsed=cv_parsed,
+            gender=gender,
+            api_key=api_key,
+            model_name=model_name
+        )
+        cl_result = await self._run_cpu(
+            render_cover_letter_files, chunks, self.output_dir, f"cover_letter_{uuid.uuid4().hex}.docx"
+        )
+        return {
+            'cv_parsed': cv_parsed,
+            'offer_parsed': offer_parsed,
+            'paths': {
+                'cl_docx': cl_result['docx_path'],
+                'cl_pdf': cl_result['pdf_path']
+            },
+            'generated_content': cl_result['chunks'],
+        }
+
+    async def process_scoring(
+        self,
+        cv_data: Dict[str, Any],
+        offer_data: Dict[str, Any],
+        api_key: str,
+        model_name: str
+    ) -> Dict[str, Any]:
+        """
+        Calcule le score de compatibilité via Gemini.
+        """
+        return await ascore_profile_with_gemini(offer_data, cv_data, api_key=api_key, model_name=model_name)
+
+    async def parse_only_offer(self, offer_text: str, api_key: str, model_name: str) -> Dict[str, Any]:
+        """
+        Parse uniquement le texte d'une offre d'emploi.
+        """
+        return await aparse_job_offer_gemini(offer_text, api_key=api_key, model_name=model_name)
+
+    async def parse_only_cv(self, cv_text: str, api_key: str, model_name: str, current_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Parse uniquement le texte d'un CV.
+        """
+        return await aparse_cv_with_gemini(cv_text, api_key=api_key, model_name=model_name, current_profile=current_profile)
+
+    async def parse_cv_document(self, file_content: bytes, filename: str, api_key: str, model_name: str, current_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Parse un CV depuis un fichier (PDF, DOCX, TXT).
+        """
+        cv_text = await self._run_cpu(extract_text_from_file, file_content, filename)
+        return await self.parse_only_cv(cv_text, api_key=api_key, model_name=model_name, current_profile=current_profile)
+
+    def shutdown(self):
+        """Arrête le pool de threads (arrêt de l'application)."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
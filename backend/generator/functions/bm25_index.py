@@ -0,0 +1,142 @@
+"""
+bm25_index.py
+
+Index BM25 sur les tokens lemmatisés des offres.
+
+- Alimentation incrémentale : chaque offre est indexée une seule fois (clé de
+  contenu), au fil de son arrivée ; les statistiques de corpus (df, longueur
+  moyenne) sont mises à jour en continu.
+- Taille bornée : au-delà de `max_docs` documents, les moins récemment
+  utilisés sont évincés (et retirés des statistiques de corpus).
+- Scoring : seuls les documents demandés sont lus (comptes de termes par
+  document), le coût d'une requête ne dépend pas de la taille de l'index.
+
+Les statistiques de corpus sont celles des documents vus par ce processus
+(dans la limite de max_docs) : un même couple requête/document peut recevoir
+un score différent d'un worker à l'autre, ou dans le temps selon le trafic.
+Seuls les scores calculés en un même appel à score() sont comparables.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def term_counts(tokens: list[str]) -> dict:
+    """Comptes {terme: tf} d'une liste de tokens."""
+    counts = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+class BM25Index:
+    """
+    Index BM25 (Okapi) incrémental, borné par éviction LRU.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_docs: int = 50000):
+        self.k1 = k1
+        self.b = b
+        self.max_docs = max_docs
+        self._lock = threading.Lock()
+        self._docs = OrderedDict()  # clé -> {terme: tf}, du moins au plus récent
+        self._df = {}
+        self._total_len = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, key) -> bool:
+        return key in self._docs
+
+    def add(self, key, tokens: list[str]) -> dict:
+        """
+        Indexe un document (ignoré si la clé est déjà connue) et évince les
+        documents les moins récents au-delà de max_docs.
+        Retourne ses comptes de termes.
+        """
+        counts = term_counts(tokens)
+        with self._lock:
+            existing = self._docs.get(key)
+            if existing is not None:
+                self._docs.move_to_end(key)
+                return existing
+            self._docs[key] = counts
+            self._total_len += len(tokens)
+            for term in counts:
+                self._df[term] = self._df.get(term, 0) + 1
+            while self.max_docs and len(self._docs) > self.max_docs:
+                self._evict()
+        return counts
+
+    def _evict(self):
+        _, counts = self._docs.popitem(last=False)
+        self._total_len -= sum(counts.values())
+        for term in counts:
+            df = self._df[term] - 1
+            if df:
+                self._df[term] = df
+            else:
+                del self._df[term]
+        self._evictions += 1
+
+    def get_many(self, keys: list) -> list:
+        """Comptes de termes des clés demandées (None si non indexée)."""
+        with self._lock:
+            found = []
+            for key in keys:
+                counts = self._docs.get(key)
+                if counts is not None:
+                    self._docs.move_to_end(key)
+                found.append(counts)
+            return found
+
+    def score(self, query_tokens: list[str], docs: list[dict]):
+        """
+        Scores BM25 de la requête pour les documents demandés, avec les
+        statistiques (df, longueur moyenne) du corpus indexé.
+
+        Args:
+            query_tokens (list[str]): Tokens de la requête (les doublons sont ignorés).
+            docs (list[dict]): Comptes de termes des documents à scorer
+                (cf. get_many, add ou term_counts pour un document non indexé).
+
+        Returns:
+            numpy.ndarray: Un score (>= 0) par document.
+        """
+        totals = np.zeros(len(docs), dtype=np.float32)
+        if not docs:
+            return totals
+        doc_lens = [sum(counts.values()) for counts in docs]
+        with self._lock:
+            n_docs = max(len(self._docs), 1)
+            # Index vide : longueur moyenne des documents demandés
+            avg_len = self._total_len / len(self._docs) if self._docs else sum(doc_lens) / len(docs)
+            idfs = {}
+            for term in set(query_tokens):
+                df = self._df.get(term, 0)
+                idfs[term] = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+        for i, (counts, doc_len) in enumerate(zip(docs, doc_lens)):
+            norm = self.k1 * (1.0 - self.b + self.b * doc_len / max(avg_len, 1e-9))
+            # Seuls les termes communs au document et à la requête contribuent
+            terms = counts.keys() & idfs.keys()
+            totals[i] = sum(idfs[t] * counts[t] * (self.k1 + 1.0) / (counts[t] + norm) for t in terms)
+        return totals
+
+    def stats(self) -> dict:
+        n_docs = len(self._docs)
+        return {
+            "documents": n_docs,
+            "max_documents": self.max_docs,
+            "evictions": self._evictions,
+            "terms": len(self._df),
+            "avg_doc_len": round(self._total_len / n_docs, 1) if n_docs else 0.0,
+        }
@@ -0,0 +1,242 @@
+"""
+cascade.py
+
+Classement en cascade d'un deck d'offres pour un profil :
+
+1. Préfiltre peu coûteux sur toutes les offres : score heuristique
+   (compétences + titre, cf. compute_heuristic_score) ou BM25 lexical.
+2. Rerank sémantique spaCy (cosinus des doc vectors) des `prefilter_k`
+   meilleures offres.
+3. Optionnel : analyse Gemini (score_profile_with_gemini_batch, plusieurs
+   offres par appel) des `llm_k` premières offres seulement.
+
+Chaque étape a un budget de latence. Une étape qui l'épuise s'arrête et les
+offres qu'elle n'a pas traitées gardent le classement de l'étape précédente.
+Le rapport indique, par étape, le temps passé, le budget et le nombre d'offres
+traitées ou laissées de côté.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from .matcher_engine import rank_offers, _score_offers, top_k_indices, DEFAULT_BATCH_SIZE
+    from .compatibility import compute_heuristic_scores, score_profile_with_gemini_batch, split_compat_batches
+except ImportError:
+    from matcher_engine import rank_offers, _score_offers, top_k_indices, DEFAULT_BATCH_SIZE
+    from compatibility import compute_heuristic_scores, score_profile_with_gemini_batch, split_compat_batches
+
+PREFILTERS = ("heuristic", "bm25")
+
+# Offres scorées entre deux vérifications du budget du préfiltre heuristique
+PREFILTER_CHUNK = 256
+
+# Nombre d'offres gardées par le préfiltre (rerankées par spaCy) et analysées par Gemini
+CASCADE_PREFILTER_K = int(os.getenv("CASCADE_PREFILTER_K", "300"))
+CASCADE_LLM_K = int(os.getenv("CASCADE_LLM_K", "5"))
+
+# Budgets de latence par étape (ms)
+CASCADE_BUDGETS_MS = {
+    "prefilter": float(os.getenv("CASCADE_PREFILTER_BUDGET_MS", "300")),
+    "rerank": float(os.getenv("CASCADE_RERANK_BUDGET_MS", "800")),
+    "llm": float(os.getenv("CASCADE_LLM_BUDGET_MS", "20000")),
+}
+
+# Appels Gemini (lots d'offres) simultanés pendant l'étape LLM
+CASCADE_LLM_CONCURRENCY = int(os.getenv("CASCADE_LLM_CONCURRENCY", "5"))
+
+
+class _Stage:
+    """Chronomètre et rapport d'une étape de la cascade."""
+
+    def __init__(self, name: str, budget_ms: float, n_input: int):
+        self.name = name
+        self.budget_ms = budget_ms
+        self.n_input = n_input
+        self.start = time.perf_counter()
+        self.deadline = self.start + budget_ms / 1000 if budget_ms else None
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    def report(self, processed: int, **extra) -> dict:
+        elapsed_ms = (time.perf_counter() - self.start) * 1000
+        return {
+            "stage": self.name,
+            "ms": round(elapsed_ms, 1),
+            "budget_ms": self.budget_ms,
+            "over_budget": bool(self.budget_ms) and elapsed_ms > self.budget_ms,
+            "input": self.n_input,
+            "processed": processed,
+            "skipped": self.n_input - processed,
+            **extra,
+        }
+
+
+def _prefilter(cv_input, offers_dict: dict, method: str, budget_ms: float):
+    """
+    Étape 1 : scores de préfiltre (0-1) ; les offres non scorées à temps
+    valent None.
+    """
+    stage = _Stage("prefilter", budget_ms, len(offers_dict))
+    if method == "bm25" or not isinstance(cv_input, dict):
+        # BM25 est un seul passage vectorisé : pas d'arrêt en cours de route
+        scores = dict(rank_offers(cv_input, offers_dict, engine="bm25"))
+        return scores, stage.report(len(scores), method="bm25")
+
+    # Heuristique par lots (CV préparé une fois), budget vérifié entre deux lots
+    keys = [key for key, offer in offers_dict.items() if isinstance(offer, dict)]
+    scores = {}
+    for start in range(0, len(keys), PREFILTER_CHUNK):
+        if stage.expired():
+            break
+        chunk = {key: offers_dict[key] for key in keys[start:start + PREFILTER_CHUNK]}
+        scores.update((key, score / 100) for key, score in compute_heuristic_scores(cv_input, chunk).items())
+    return scores, stage.report(len(scores), method="heuristic")
+
+
+def _rerank(cv_input, offers_dict: dict, candidates: list, budget_ms: float):
+    """
+    Étape 2 : cosinus spaCy des candidats, lot par lot tant que le budget le permet.
+    """
+    stage = _Stage("rerank", budget_ms, len(candidates))
+    scores = {}
+    for start in range(0, len(candidates), DEFAULT_BATCH_SIZE):
+        if stage.expired():
+            break
+        chunk = candidates[start:start + DEFAULT_BATCH_SIZE]
+        keys, chunk_scores = _score_offers(cv_input, {key: offers_dict[key] for key in chunk})
+        if chunk_scores is None:
+            break
+        scores.update((key, round(float(score), 2)) for key, score in zip(keys, chunk_scores))
+    return scores, stage.report(len(scores))
+
+
+def _llm_analyses(cv_input, offers_dict: dict, candidates: list, api_key: str, model_name: str, budget_ms: float):
+    """
+    Étape 3 : analyses Gemini des meilleurs candidats, par lots (un appel
+    pour plusieurs offres) lancés en parallèle. Les lots encore en cours à
+    l'échéance du budget sont abandonnés.
+    """
+    stage = _Stage("llm", budget_ms, len(candidates))
+    analyses, errors = {}, {}
+    if not candidates:
+        return analyses, stage.report(0, errors=0, calls=0)
+
+    batches = split_compat_batches({key: offers_dict[key] for key in candidates}, cv_input)
+    executor = ThreadPoolExecutor(max_workers=min(len(batches), CASCADE_LLM_CONCURRENCY))
+    try:
+        futures = {
+            executor.submit(score_profile_with_gemini_batch, batch, cv_input, api_key, model_name): batch
+            for batch in batches
+        }
+        done, _ = wait(futures, timeout=budget_ms / 1000 if budget_ms else None)
+        for future in done:
+            batch = futures[future]
+            try:
+                analyses.update(future.result())
+            except Exception as e:
+                errors.update((key, str(e)) for key in batch)
+                continue
+            # Offres du lot dont l'analyse a échoué (déjà signalées par le lot)
+            errors.update((key, "analyse absente") for key in batch if key not in analyses)
+    finally:
+        # Ne pas attendre les appels hors budget : leur résultat sera ignoré
+        executor.shutdown(wait=False, cancel_futures=True)
+    for key, error in errors.items():
+        print(f"[WARN] Cascade : analyse Gemini de l'offre {key} impossible : {error}")
+    return analyses, stage.report(len(analyses), errors=len(errors), calls=len(batches))
+
+
+def rank_offers_cascade(
+    cv_input,
+    offers_dict: dict,
+    prefilter: str = "heuristic",
+    prefilter_k: int = None,
+    llm_k: int = None,
+    api_key: Optional[str] = None,
+    model_name: str = "gemini-2.5-flash",
+    budgets_ms: Optional[Dict[str, float]] = None,
+    top_k: int = None,
+) -> Dict[str, Any]:
+    """
+    Classe des offres en cascade : préfiltre -> rerank spaCy -> analyse Gemini.
+
+    Args:
+        cv_input (str | dict): Le texte du CV ou le profil structuré (le
+            préfiltre heuristique demande un profil structuré, sinon BM25).
+        offers_dict (dict): {id: offre}.
+        prefilter (str): "heuristic" ou "bm25".
+        prefilter_k (int): Offres gardées par le préfiltre (défaut : CASCADE_PREFILTER_K).
+        llm_k (int): Offres analysées par Gemini (défaut : CASCADE_LLM_K, 0 si pas de clé API).
+        api_key (str): Clé Gemini ; sans clé, l'étape LLM est sautée.
+        model_name (str): Modèle Gemini.
+        budgets_ms (dict): Budgets par étape {"prefilter", "rerank", "llm"} (0 = illimité).
+        top_k (int): Nombre de résultats retournés (défaut : tous les candidats).
+
+    Returns:
+        dict: {"results": [{"id", "stage", "prefilter_score", "spacy_score",
+        "llm_score", "analysis"}, ...] dans l'ordre final, "stages": [rapports],
+        "total_ms"}.
+    """
+    if prefilter not in PREFILTERS:
+        raise ValueError(f"Préfiltre inconnu : '{prefilter}' (disponibles : {', '.join(PREFILTERS)}).")
+    budgets = {**CASCADE_BUDGETS_MS, **(budgets_ms or {})}
+    prefilter_k = CASCADE_PREFILTER_K if prefilter_k is None else prefilter_k
+    llm_k = (CASCADE_LLM_K if llm_k is None else llm_k) if api_key else 0
+    start = time.perf_counter()
+    stages = []
+
+    # 1. Préfiltre : les offres non scorées à temps passent après les autres
+    pre_scores, report = _prefilter(cv_input, offers_dict, prefilter, budgets["prefilter"])
+    stages.append(report)
+    keys = list(offers_dict.keys())
+    order = sorted(range(len(keys)), key=lambda i: 1.0 if pre_scores.get(keys[i]) is None else -pre_scores[keys[i]])
+    candidates = [keys[i] for i in order[:prefilter_k]]
+
+    # 2. Rerank spaCy : les candidats rerankés d'abord, les autres dans l'ordre du préfiltre
+    spacy_scores, report = _rerank(cv_input, offers_dict, candidates, budgets["rerank"])
+    stages.append(report)
+    reranked = [key for key in candidates if key in spacy_scores]
+    ranked = [reranked[i] for i in top_k_indices(np.array([spacy_scores[key] for key in reranked], dtype=np.float32))]
+    ranked += [key for key in candidates if key not in spacy_scores]
+
+    # 3. Analyse Gemini du haut du classement, reclassé par score global
+    analyses = {}
+    if llm_k > 0:
+        analyses, report = _llm_analyses(cv_input, offers_dict, ranked[:llm_k], api_key, model_name, budgets["llm"])
+        stages.append(report)
+        head = sorted(
+            (key for key in ranked[:llm_k] if key in analyses),
+            key=lambda key: -_llm_score(analyses[key]),
+        )
+        ranked = head + [key for key in ranked if key not in analyses]
+
+    if top_k is not None:
+        ranked = ranked[:top_k]
+    results = []
+    for key in ranked:
+        analysis = analyses.get(key)
+        results.append({
+            "id": key,
+            "stage": "llm" if analysis is not None else "rerank" if key in spacy_scores else "prefilter",
+            "prefilter_score": None if pre_scores.get(key) is None else round(pre_scores[key], 2),
+            "spacy_score": spacy_scores.get(key),
+            "llm_score": None if analysis is None else _llm_score(analysis),
+            "analysis": analysis,
+        })
+    return {"results": results, "stages": stages, "total_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+
+def _llm_score(analysis: Dict[str, Any]) -> float:
+    try:
+        return float(analysis.get("overall_score", 0))
+    except (TypeError, ValueError):
+        return 0.0
@@ -13,18 +13,49 @@ from __future__ import annotations
 import os
 import json
 import re
-from typing import Dict, Any
+import hashlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Iterator
 
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 
+try:
+    from .skill_extractor import extract_offer_skills
+    from .score_cache import get_score_cache, payload_hash
+    from .lru_cache import LRUCache
+    from .json_stream import IncrementalJSONParser
+    from .llm_gateway import generate_content, agenerate_content, generate_content_stream
+except ImportError:
+    from skill_extractor import extract_offer_skills
+    from score_cache import get_score_cache, payload_hash
+    from lru_cache import LRUCache
+    from json_stream import IncrementalJSONParser
+    from llm_gateway import generate_content, agenerate_content, generate_content_stream
+
 load_dotenv()
 
 # ============================================================================
 # 1. CONFIG GEMINI
 # ============================================================================
 
+# Compétences extraites des offres non parsées (empreinte des champs lus ->
+# compétences), pour ne pas repasser le gazetteer sur la même offre à chaque CV
+_offer_skills_cache = LRUCache(max_entries=int(os.getenv("HEURISTIC_OFFER_CACHE_SIZE", "50000")))
+
+# Analyse Gemini par lots (un CV + plusieurs offres par appel) :
+# - budget de tokens du prompt (estimé) et nombre maximum d'offres par appel,
+# - tokens de sortie réservés par offre (2048 en mode unitaire),
+# - appels simultanés quand le lot doit être découpé.
+COMPAT_BATCH_MAX_PROMPT_TOKENS = int(os.getenv("COMPAT_BATCH_MAX_PROMPT_TOKENS", "30000"))
+COMPAT_BATCH_MAX_OFFERS = int(os.getenv("COMPAT_BATCH_MAX_OFFERS", "8"))
+COMPAT_BATCH_OUTPUT_TOKENS_PER_OFFER = int(os.getenv("COMPAT_BATCH_OUTPUT_TOKENS_PER_OFFER", "2048"))
+COMPAT_BATCH_CONCURRENCY = int(os.getenv("COMPAT_BATCH_CONCURRENCY", "4"))
+
+# Estimation grossière des tokens Gemini (texte JSON FR/EN : ~3,5 caractères par token)
+CHARS_PER_TOKEN = 3.5
+
 
 # ============================================================================
 # 2. OUTIL : extraction du JSON renvoyé par le modèle
@@ -95,6 +126,57 @@ def extract_json_from_output(output: str) -> Dict[str, Any]:
 # 3. PROMPT DE COMPATIBILITÉ
 # ============================================================================
 
+# Champs attendus pour une analyse (une par offre en mode lots)
+_COMPAT_OUTPUT_FIELDS = """  "overall_score": 0,
+
+  "scores": {
+    "skills_match": 0,
+    "experience_match": 0,
+    "education_match": 0,
+    "language_match": 0
+  },
+
+  "summary": "string",
+
+  "key_strengths": [
+    "string"
+  ],
+
+  "key_gaps": [
+    "string"
+  ],
+
+  "missing_hard_skills": [
+    "string"
+  ],
+
+  "missing_soft_skills": [
+    "string"
+  ],
+
+  "recommended_improvements": [
+    "string"
+  ],
+
+  "recommended_projects_or_experiences": [
+    "string"
+  ],
+
+  "recommended_courses_or_certifications": [
+    "string"
+  ]"""
+
+_COMPAT_RULES = """- The response for all string fields in the JSON output (summary, strengths, gaps, etc.) MUST be in French.
+- You MUST return ONLY the JSON object, with no markdown or extra text.
+- Each score must be in the range [0,100].
+- Do NOT include comments in the JSON output.
+- Be realistic and fair: do not give 95+ unless the match is extremely strong.
+- "missing_hard_skills" and "missing_soft_skills" must be based on the job offer vs the CV.
+- "recommended_improvements" must be concrete and actionable (CV bullets, skills to add, etc.).
+- Do NOT invent fake job titles or degrees; strictly base your reasoning on the JSON inputs.
+- If a section (e.g. Experience, Education) is empty in the CV, the corresponding score MUST be low (or 0). Do NOT assume the candidate has experience if it is not listed."""
+
+
 def build_compat_prompt(offer_parsed: Dict[str, Any], cv_parsed: Dict[str, Any]) -> str:
     """
     Construis le prompt envoyé à Gemini pour calculer le score + conseils.
@@ -129,56 +211,68 @@ OUTPUT JSON SPEC
 You MUST return a JSON object with EXACTLY these fields:
 
 {{
-  "overall_score": 0,
+{_COMPAT_OUTPUT_FIELDS}
+}}
 
-  "scores": {{
-    "skills_match": 0,
-    "experience_match": 0,
-    "education_match": 0,
-    "language_match": 0
-  }},
+VERY IMPORTANT RULES:
+{_COMPAT_RULES}
+"""
 
-  "summary": "string",
 
-  "key_strengths": [
-    "string"
-  ],
+def build_compat_batch_prompt(offers: List[Dict[str, Any]], cv_parsed: Dict[str, Any]) -> str:
+    """
+    Prompt d'analyse d'un CV contre plusieurs offres en un seul appel : le CV
+    n'est envoyé qu'une fois, les offres sont numérotées ("offer_index") et
+    le modèle renvoie une analyse par offre (même schéma qu'en mode unitaire).
+    """
+    cv_json = json.dumps(cv_parsed, ensure_ascii=False, indent=2)
+    offers_block = "\n\n".join(
+        f"--- JOB OFFER {i} ---\n{json.dumps(offer, ensure_ascii=False, indent=2)}"
+        for i, offer in enumerate(offers)
+    )
 
-  "key_gaps": [
-    "string"
-  ],
+    return f"""
+You are an expert recruiter and career coach.
 
-  "missing_hard_skills": [
-    "string"
-  ],
+Your task:
+Evaluate, INDEPENDENTLY for each job offer below, how well THIS CANDIDATE
+matches it, based on their parsed JSON representations, and return a
+detailed compatibility analysis per offer.
 
-  "missing_soft_skills": [
-    "string"
-  ],
+You MUST return STRICTLY a valid JSON object, with NO explanation, NO text
+before, and NO text after.
 
-  "recommended_improvements": [
-    "string"
-  ],
+====================
+CANDIDATE PROFILE (parsed CV JSON)
+====================
+{cv_json}
 
-  "recommended_projects_or_experiences": [
-    "string"
-  ],
+====================
+JOB OFFERS (parsed JSON, {len(offers)} offers)
+====================
+{offers_block}
 
-  "recommended_courses_or_certifications": [
-    "string"
-  ]
+====================
+OUTPUT JSON SPEC
+====================
+
+You MUST return a JSON object with a single "analyses" array containing
+EXACTLY one entry per job offer, in the same order, each with EXACTLY these fields:
+
+{{
+"analyses": [
+{{
+  "offer_index": 0,
+
+{_COMPAT_OUTPUT_FIELDS}
+}}
+]
 }}
 
 VERY IMPORTANT RULES:
-- The response for all string fields in the JSON output (summary, strengths, gaps, etc.) MUST be in French.
-- You MUST return ONLY the JSON object, with no markdown or extra text.
-- Each score must be in the range [0,100].
-- Do NOT include comments in the JSON output.
-- Be realistic and fair: do not give 95+ unless the match is extremely strong.
-- "missing_hard_skills" and "missing_soft_skills" must be based on the job offer vs the CV.
-- "recommended_improvements" must be concrete and actionable (CV bullets, skills to add, etc.).
-- Do NOT invent fake job titles or degrees; strictly base your reasoning on the JSON inputs.
-- If a section (e.g. Experience, Education) is empty in the CV, the corresponding score MUST be low (or 0). Do NOT assume the candidate has experience if it is not listed.
+- "offer_index" is the number of the JOB OFFER the analysis refers to.
+- Each offer is evaluated on its own: do NOT compare offers with each other.
+{_COMPAT_RULES}
 """
 
 
@@ -186,19 +280,30 @@ VERY IMPORTANT RULES:
 # 4. APPEL À GEMINI
 # ============================================================================
 
-def generate_with_gemini(prompt: str, api_key: str, model_name: str) -> str:
+def generate_with_gemini(prompt: str, api_key: str, model_name: str, max_output_tokens: int = 2048) -> str:
     """
     Call Gemini with the given prompt and return the raw text output.
     """
-    client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.2,
-            max_output_tokens=2048,
-        ),
+    response = generate_content(prompt, api_key, model_name, config=_compat_config(max_output_tokens), caller="compatibility")
+    return _response_text(response)
+
+
+async def agenerate_with_gemini(prompt: str, api_key: str, model_name: str, max_output_tokens: int = 2048) -> str:
+    """
+    Asyncio variant of generate_with_gemini.
+    """
+    response = await agenerate_content(prompt, api_key, model_name, config=_compat_config(max_output_tokens), caller="compatibility")
+    return _response_text(response)
+
+
+def _compat_config(max_output_tokens: int):
+    return types.GenerateContentConfig(
+        temperature=0.2,
+        max_output_tokens=max_output_tokens,
     )
+
+
+def _response_text(response) -> str:
     try:
         return response.text
     except AttributeError:
@@ -214,6 +319,18 @@ def generate_with_gemini(prompt: str, api_key: str, model_name: str) -> str:
         raise RuntimeError(f"Réponse Gemini inattendue : {response!r}")
 
 
+def generate_with_gemini_stream(prompt: str, api_key: str, model_name: str, max_output_tokens: int = 2048) -> Iterator[str]:
+    """
+    Streaming variant of generate_with_gemini: yields the text chunks as the
+    model produces them.
+    """
+    stream = generate_content_stream(prompt, api_key, model_name, config=_compat_config(max_output_tokens), caller="compatibility")
+    for chunk in stream:
+        text = getattr(chunk, "text", None)
+        if text:
+            yield text
+
+
 def score_profile_with_gemini(
     offer_parsed: Dict[str, Any],
     cv_parsed: Dict[str, Any],
@@ -224,12 +341,215 @@ def score_profile_with_gemini(
     High-level: prend l'offre parsée + le CV parsé,
     appelle Gemini pour obtenir score + conseils.
     """
+    # Les analyses sont mises en cache par (modèle + version du prompt, CV, offre)
+    cache = get_score_cache()
+    version = f"{model_name}-{_get_prompt_version()}"
+    profile_key, offer_key = payload_hash(cv_parsed), payload_hash(offer_parsed)
+    cached = cache.get("gemini", version, profile_key, offer_key)
+    if cached is not None:
+        return cached
+
     prompt = build_compat_prompt(offer_parsed, cv_parsed)
     raw_output = generate_with_gemini(prompt, api_key, model_name)
     parsed_json = extract_json_from_output(raw_output)
+    cache.set("gemini", version, profile_key, offer_key, parsed_json)
+    return parsed_json
+
+
+async def ascore_profile_with_gemini(
+    offer_parsed: Dict[str, Any],
+    cv_parsed: Dict[str, Any],
+    api_key: str,
+    model_name: str = "gemini-1.5-flash"
+) -> Dict[str, Any]:
+    """
+    Variante asyncio de score_profile_with_gemini (même prompt, même cache).
+    """
+    cache = get_score_cache()
+    version = f"{model_name}-{_get_prompt_version()}"
+    profile_key, offer_key = payload_hash(cv_parsed), payload_hash(offer_parsed)
+    cached = cache.get("gemini", version, profile_key, offer_key)
+    if cached is not None:
+        return cached
+
+    prompt = build_compat_prompt(offer_parsed, cv_parsed)
+    raw_output = await agenerate_with_gemini(prompt, api_key, model_name)
+    parsed_json = extract_json_from_output(raw_output)
+    cache.set("gemini", version, profile_key, offer_key, parsed_json)
     return parsed_json
 
 
+# Champs de l'analyse envoyés au client dès qu'ils sont complets (mode streaming)
+STREAMED_SCORE_FIELDS = ("overall_score", "scores", "summary")
+
+
+def stream_profile_score_with_gemini(
+    offer_parsed: Dict[str, Any],
+    cv_parsed: Dict[str, Any],
+    api_key: str,
+    model_name: str = "gemini-1.5-flash"
+) -> Iterator[Dict[str, Any]]:
+    """
+    Variante streaming de score_profile_with_gemini. Émet des événements :
+    - {"event": "partial", "field": "overall_score" | "scores.<nom>" | "summary", "value": ...}
+      dès que la valeur est complète dans le flux (les scores précèdent les
+      listes de points forts/lacunes dans le schéma),
+    - {"event": "result", "analysis": {...}, "cached": bool} : l'analyse
+      complète, parsée par extract_json_from_output et mise en cache.
+    Une analyse déjà en cache est émise directement (événement "result").
+    """
+    cache = get_score_cache()
+    version = f"{model_name}-{_get_prompt_version()}"
+    profile_key, offer_key = payload_hash(cv_parsed), payload_hash(offer_parsed)
+    cached = cache.get("gemini", version, profile_key, offer_key)
+    if cached is not None:
+        yield {"event": "result", "analysis": cached, "cached": True}
+        return
+
+    prompt = build_compat_prompt(offer_parsed, cv_parsed)
+    parser = IncrementalJSONParser()
+    chunks = []
+    for text in generate_with_gemini_stream(prompt, api_key, model_name):
+        chunks.append(text)
+        for path, value in parser.feed(text):
+            if path[0] in STREAMED_SCORE_FIELDS and len(path) <= 2:
+                yield {"event": "partial", "field": ".".join(map(str, path)), "value": value}
+
+    parsed_json = extract_json_from_output("".join(chunks))
+    cache.set("gemini", version, profile_key, offer_key, parsed_json)
+    yield {"event": "result", "analysis": parsed_json, "cached": False}
+
+
+def score_profile_with_gemini_batch(
+    offers: Dict[Any, Dict[str, Any]],
+    cv_parsed: Dict[str, Any],
+    api_key: str,
+    model_name: str = "gemini-1.5-flash"
+) -> Dict[Any, Dict[str, Any]]:
+    """
+    Version par lots de score_profile_with_gemini : un CV contre plusieurs
+    offres, en aussi peu d'appels que le budget de tokens le permet (cf.
+    split_compat_batches). Les analyses ont le même schéma qu'en mode unitaire
+    et partagent son cache.
+
+    Une offre absente ou invalide dans la réponse d'un lot est réanalysée
+    seule. Une offre dont l'analyse échoue malgré tout est absente du
+    résultat (avertissement dans les logs).
+
+    Args:
+        offers (dict): {id: offre parsée}.
+        cv_parsed (dict): Le profil parsé.
+        api_key (str): Clé Gemini.
+        model_name (str): Modèle Gemini.
+
+    Returns:
+        dict: {id: analyse}, dans l'ordre des offres reçues.
+    """
+    cache = get_score_cache()
+    version = f"{model_name}-{_get_prompt_version()}"
+    profile_key = payload_hash(cv_parsed)
+    offer_keys = {offer_id: payload_hash(offer) for offer_id, offer in offers.items()}
+    cached = cache.get_many("gemini", version, profile_key, list(set(offer_keys.values())))
+
+    # Une seule analyse par contenu d'offre, même si plusieurs ids le partagent
+    pending = {}
+    for offer_id, key in offer_keys.items():
+        if key not in cached and key not in pending:
+            pending[key] = offers[offer_id]
+
+    computed = {}
+    batches = split_compat_batches(pending, cv_parsed)
+    if len(batches) == 1:
+        computed.update(_analyze_batch(batches[0], cv_parsed, api_key, model_name))
+    elif batches:
+        with ThreadPoolExecutor(max_workers=min(len(batches), COMPAT_BATCH_CONCURRENCY)) as executor:
+            # Chaque lot garde le contexte de l'appelant (budget de temps de l'endpoint)
+            contexts = [contextvars.copy_context() for _ in batches]
+            for analyses in executor.map(
+                lambda batch, context: context.run(_analyze_batch, batch, cv_parsed, api_key, model_name), batches, contexts
+            ):
+                computed.update(analyses)
+    cache.set_many("gemini", version, profile_key, computed)
+
+    results = {**cached, **computed}
+    return {offer_id: results[key] for offer_id, key in offer_keys.items() if key in results}
+
+
+def split_compat_batches(offers: Dict[Any, Dict[str, Any]], cv_parsed: Dict[str, Any]) -> List[Dict[Any, Dict[str, Any]]]:
+    """
+    Découpe {id: offre} en lots dont le prompt estimé tient dans
+    COMPAT_BATCH_MAX_PROMPT_TOKENS (CV et gabarit compris), avec au plus
+    COMPAT_BATCH_MAX_OFFERS offres par lot. Une offre trop longue à elle
+    seule forme son propre lot.
+    """
+    base_tokens = estimate_tokens(build_compat_batch_prompt([], cv_parsed))
+    batches, batch, batch_tokens = [], {}, base_tokens
+    for offer_id, offer in offers.items():
+        # Séparateur + JSON indenté de l'offre
+        tokens = estimate_tokens(json.dumps(offer, ensure_ascii=False, indent=2)) + 10
+        if batch and (len(batch) >= COMPAT_BATCH_MAX_OFFERS or batch_tokens + tokens > COMPAT_BATCH_MAX_PROMPT_TOKENS):
+            batches.append(batch)
+            batch, batch_tokens = {}, base_tokens
+        batch[offer_id] = offer
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def estimate_tokens(text: str) -> int:
+    """Nombre de tokens estimé d'un texte (sans appel au tokenizer)."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def _analyze_batch(batch: Dict[Any, Dict[str, Any]], cv_parsed: Dict[str, Any], api_key: str, model_name: str) -> Dict[Any, Dict[str, Any]]:
+    """
+    Analyse d'un lot en un appel ; repli sur l'appel unitaire pour les offres
+    manquantes de la réponse (ou pour tout le lot si elle est illisible).
+    """
+    keys = list(batch.keys())
+    analyses = {}
+    if len(keys) > 1:
+        prompt = build_compat_batch_prompt([batch[key] for key in keys], cv_parsed)
+        try:
+            raw_output = generate_with_gemini(prompt, api_key, model_name, max_output_tokens=COMPAT_BATCH_OUTPUT_TOKENS_PER_OFFER * len(keys))
+            entries = extract_json_from_output(raw_output).get("analyses", [])
+        except Exception as e:
+            print(f"[WARN] Analyse Gemini par lot ({len(keys)} offres) impossible, repli unitaire : {e}")
+            entries = []
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or "overall_score" not in entry:
+                continue
+            index = entry.pop("offer_index", None)
+            if isinstance(index, int) and 0 <= index < len(keys) and keys[index] not in analyses:
+                analyses[keys[index]] = entry
+
+    for key in keys:
+        if key in analyses:
+            continue
+        try:
+            prompt = build_compat_prompt(batch[key], cv_parsed)
+            analyses[key] = extract_json_from_output(generate_with_gemini(prompt, api_key, model_name))
+        except Exception as e:
+            print(f"[WARN] Analyse Gemini d'une offre impossible : {e}")
+    return analyses
+
+
+_prompt_version = None
+
+
+def _get_prompt_version() -> str:
+    """
+    Empreinte des gabarits de prompt (construits sur des entrées vides) :
+    toute modification d'un prompt invalide les analyses mises en cache.
+    """
+    global _prompt_version
+    if _prompt_version is None:
+        templates = build_compat_prompt({}, {}) + build_compat_batch_prompt([{}], {})
+        _prompt_version = hashlib.sha256(templates.encode("utf-8")).hexdigest()[:12]
+    return _prompt_version
+
+
 # ============================================================================
 # 5. DEMO EN LOCAL
 # ============================================================================
@@ -312,6 +632,9 @@ def compute_heuristic_score(offer_parsed: Dict[str, Any], cv_parsed: Dict[str, A
     Basé sur :
     1. La couverture des Hard Skills (70%)
     2. La présence des mots-clés du titre de l'offre dans le CV (30%)
+
+    Si l'offre n'a pas été parsée par Gemini (pas de "hard_skills"), ses
+    compétences sont extraites localement du texte (gazetteer).
     """
     # Helper pour normaliser (minuscules, sans espaces inutiles)
     def normalize_set(items):
@@ -319,7 +642,7 @@ def compute_heuristic_score(offer_parsed: Dict[str, Any], cv_parsed: Dict[str, A
         return {str(i).lower().strip() for i in items if i}
 
     # 1. Extraction des données
-    offer_skills = normalize_set(offer_parsed.get("hard_skills", []))
+    offer_skills = normalize_set(offer_parsed.get("hard_skills") or _extracted_offer_skills(offer_parsed))
     
     cv_skills_data = cv_parsed.get("skills", {})
     # Gestion robuste si skills est une liste ou un dict
@@ -344,9 +667,7 @@ def compute_heuristic_score(offer_parsed: Dict[str, Any], cv_parsed: Dict[str, A
     offer_title = str(offer_parsed.get("title", "")).lower()
     
     if offer_title:
-        # Mots vides à ignorer pour ne garder que les mots importants
-        stop_words = {"h/f", "(h/f)", "f/h", "m/f", "-", "de", "le", "la", "les", "et", "ou", "pour", "stage", "alternance", "cdi", "cdd"}
-        offer_keywords = {w for w in offer_title.split() if w not in stop_words and len(w) > 2}
+        offer_keywords = {w for w in offer_title.split() if w not in _TITLE_STOP_WORDS and len(w) > 2}
         
         # Construction du corpus CV (Résumé + Titres expériences)
         cv_text = str(cv_parsed.get("raw_summary", "")).lower()
@@ -367,4 +688,112 @@ def compute_heuristic_score(offer_parsed: Dict[str, Any], cv_parsed: Dict[str, A
     else:
         final_score = (skill_score * 0.7) + (title_score * 0.3)
 
-    return int(min(100, max(0, final_score)))
\ No newline at end of file
+    return int(min(100, max(0, final_score)))
+
+
+def compute_heuristic_scores(cv_parsed: Dict[str, Any], offers: Dict[Any, Dict[str, Any]]) -> Dict[Any, int]:
+    """
+    Version par lots de compute_heuristic_score (mêmes scores) : un CV contre
+    un deck d'offres.
+
+    Le côté CV (compétences normalisées, texte résumé + titres d'expériences)
+    est préparé une seule fois, et le score de titre est calculé une fois par
+    titre distinct du deck (les titres se répètent beaucoup d'une offre à
+    l'autre).
+
+    Args:
+        cv_parsed (dict): Le profil parsé.
+        offers (dict): {id: offre parsée ou brute}.
+
+    Returns:
+        dict: {id: score (0-100)}, dans l'ordre des offres reçues.
+    """
+    cv_skills = _normalize_skill_set(_profile_skills(cv_parsed))
+    cv_text = None
+    title_scores = {}
+
+    scores = {}
+    for offer_id, offer in offers.items():
+        offer_skills = _normalize_skill_set(offer.get("hard_skills") or _extracted_offer_skills(offer))
+        if offer_skills:
+            skill_score = (len(offer_skills & cv_skills) / len(offer_skills)) * 100
+        else:
+            skill_score = 50.0
+
+        offer_title = str(offer.get("title", "")).lower()
+        title_score = title_scores.get(offer_title)
+        if title_score is None:
+            title_score = 0.0
+            offer_keywords = {w for w in offer_title.split() if w not in _TITLE_STOP_WORDS and len(w) > 2}
+            if offer_keywords:
+                if cv_text is None:
+                    cv_text = _cv_text(cv_parsed)
+                title_score = (sum(1 for w in offer_keywords if w in cv_text) / len(offer_keywords)) * 100
+            title_scores[offer_title] = title_score
+
+        if not offer_skills:
+            final_score = title_score
+        elif not offer_title:
+            final_score = skill_score
+        else:
+            final_score = (skill_score * 0.7) + (title_score * 0.3)
+        scores[offer_id] = int(min(100, max(0, final_score)))
+    return scores
+
+
+# Mots vides du titre à ignorer pour ne garder que les mots importants
+_TITLE_STOP_WORDS = {"h/f", "(h/f)", "f/h", "m/f", "-", "de", "le", "la", "les", "et", "ou", "pour", "stage", "alternance", "cdi", "cdd"}
+
+
+def _normalize_skill_set(items) -> set:
+    """Compétences en minuscules, sans espaces inutiles (cf. compute_heuristic_score)."""
+    if not items:
+        return set()
+    return {str(i).lower().strip() for i in items if i}
+
+
+def _profile_skills(cv_parsed: Dict[str, Any]) -> list:
+    """Compétences techniques déclarées d'un profil parsé."""
+    skills = cv_parsed.get("skills", {})
+    # Gestion robuste si skills est une liste ou un dict
+    if isinstance(skills, dict):
+        return skills.get("hard_skills", [])
+    if isinstance(skills, list):
+        return skills
+    return []
+
+
+def _cv_text(cv_parsed: Dict[str, Any]) -> str:
+    """Corpus CV du score de titre : résumé + titres d'expériences, en minuscules."""
+    cv_text = str(cv_parsed.get("raw_summary", "")).lower()
+    experiences = cv_parsed.get("professional_experiences", [])
+    if isinstance(experiences, list):
+        for exp in experiences:
+            cv_text += " " + str(exp.get("title", "")).lower()
+    return cv_text
+
+
+def _extracted_offer_skills(offer_parsed: Dict[str, Any]) -> tuple:
+    """
+    Compétences extraites du texte d'une offre non parsée (gazetteer),
+    mémorisées par contenu (champs lus par extract_offer_skills) : une offre
+    du deck est scorée contre de nombreux CV.
+    """
+    raw = offer_parsed.get("raw")
+    missions, requirements = offer_parsed.get("missions"), offer_parsed.get("requirements")
+    key = (
+        offer_parsed.get("title"),
+        offer_parsed.get("description"),
+        raw.get("description") if isinstance(raw, dict) else None,
+        tuple(map(str, missions)) if isinstance(missions, list) else None,
+        tuple(map(str, requirements)) if isinstance(requirements, list) else None,
+    )
+    try:
+        skills = _offer_skills_cache.get(key)
+    except TypeError:
+        # Champ non hachable (ex. description structurée) : pas de mémo
+        return tuple(extract_offer_skills(offer_parsed))
+    if skills is None:
+        skills = tuple(extract_offer_skills(offer_parsed))
+        _offer_skills_cache.set(key, skills)
+    return skills
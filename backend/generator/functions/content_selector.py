@@ -3,7 +3,11 @@ import json
 import re
 from typing import Dict, Any, List
 from dotenv import load_dotenv
-from google import genai
+
+try:
+    from .llm_gateway import generate_content
+except ImportError:
+    from llm_gateway import generate_content
 
 load_dotenv()
 
@@ -16,11 +20,7 @@ load_dotenv()
 # ============================================================================
 
 def _generate_content(prompt: str, api_key: str, model_name: str) -> str:
-    client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt
-    )
+    response = generate_content(prompt, api_key, model_name, caller="content_selector")
     return response.text.strip()
 
 def _extract_json(output: str) -> Any:
@@ -41,12 +41,16 @@ import re
 import datetime
 
 from dotenv import load_dotenv
-from google import genai
 from docx import Document
 from docx.shared import Pt
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from pyhere import here
 
+try:
+    from .llm_gateway import generate_content, agenerate_content
+except ImportError:
+    from llm_gateway import generate_content, agenerate_content
+
 load_dotenv()
 
 # ============================================================================
@@ -270,19 +274,11 @@ def generate_letter_structure_with_gemini(
     model_name: str = "gemini-1.5-flash"
 ) -> Dict[str, Any]:
     # 1. Préparation des indices
-    contact = pick_contact_info(cv_parsed)
-    city_hint = city_override or contact["city"] or "Paris"
-    date_hint = date_override or french_date()
-    gender_label = "masculin" if gender.upper() == "M" else "féminin"
-    
-    client = genai.Client(api_key=api_key)
+    city_hint, date_hint, gender_label = _letter_hints(cv_parsed, gender, city_override, date_override)
 
     # 2. Appel 1 : Header & Meta
     prompt_header = build_header_prompt(offer_parsed, cv_parsed, city_hint, date_hint, reference)
-    resp_header = client.models.generate_content(
-        model=model_name,
-        contents=prompt_header
-    )
+    resp_header = generate_content(prompt_header, api_key, model_name, caller="cover_letter_generator")
     json_header = extract_json_from_output(resp_header.text)
 
     # Récupération de l'objet pour le contexte du body
@@ -290,12 +286,50 @@ def generate_letter_structure_with_gemini(
 
     # 3. Appel 2 : Body
     prompt_body = build_body_prompt(offer_parsed, cv_parsed, gender_label, objet_line)
-    resp_body = client.models.generate_content(
-        model=model_name,
-        contents=prompt_body
-    )
+    resp_body = generate_content(prompt_body, api_key, model_name, caller="cover_letter_generator")
     json_body = extract_json_from_output(resp_body.text)
 
+    return _merge_letter_chunks(json_header, json_body)
+
+
+async def agenerate_letter_structure_with_gemini(
+    offer_parsed: Dict[str, Any],
+    cv_parsed: Dict[str, Any],
+    gender: str = "M",
+    reference: Optional[str] = None,
+    city_override: Optional[str] = None,
+    date_override: Optional[str] = None,
+    api_key: str = "",
+    model_name: str = "gemini-1.5-flash"
+) -> Dict[str, Any]:
+    """
+    Variante asyncio de generate_letter_structure_with_gemini (mêmes prompts).
+    """
+    city_hint, date_hint, gender_label = _letter_hints(cv_parsed, gender, city_override, date_override)
+
+    prompt_header = build_header_prompt(offer_parsed, cv_parsed, city_hint, date_hint, reference)
+    resp_header = await agenerate_content(prompt_header, api_key, model_name, caller="cover_letter_generator")
+    json_header = extract_json_from_output(resp_header.text)
+
+    # Le corps dépend de l'objet généré dans l'en-tête : appels séquentiels
+    prompt_body = build_body_prompt(offer_parsed, cv_parsed, gender_label, json_header.get("objet_line", ""))
+    resp_body = await agenerate_content(prompt_body, api_key, model_name, caller="cover_letter_generator")
+    json_body = extract_json_from_output(resp_body.text)
+
+    return _merge_letter_chunks(json_header, json_body)
+
+
+def _letter_hints(cv_parsed: Dict[str, Any], gender: str, city_override: Optional[str], date_override: Optional[str]) -> tuple:
+    """Ville, date et genre grammatical passés aux prompts."""
+    contact = pick_contact_info(cv_parsed)
+    city_hint = city_override or contact["city"] or "Paris"
+    date_hint = date_override or french_date()
+    gender_label = "masculin" if gender.upper() == "M" else "féminin"
+    return city_hint, date_hint, gender_label
+
+
+def _merge_letter_chunks(json_header: Dict[str, Any], json_body: Dict[str, Any]) -> Dict[str, Any]:
+    """Fusion et nettoyage des réponses d'en-tête et de corps."""
     # 4. Fusion
     full_json = {**json_header, **json_body}
 
@@ -547,9 +581,6 @@ def generate_personalized_cover_letter_docx_and_pdf(
         "chunks": {...}  # Contenu structuré pour le frontend
       }
     """
-    os.makedirs(output_dir, exist_ok=True)
-    docx_path = os.path.join(output_dir, docx_filename)
-
     # 1) Génération des chunks via Gemini
     chunks = generate_letter_structure_with_gemini(
         offer_parsed=offer_parsed,
@@ -562,6 +593,23 @@ def generate_personalized_cover_letter_docx_and_pdf(
         model_name=model_name
     )
 
+    # 2) et 3) DOCX et PDF
+    return render_cover_letter_files(chunks, output_dir, docx_filename, pdf_filename)
+
+
+def render_cover_letter_files(
+    chunks: Dict[str, Any],
+    output_dir: str = ".",
+    docx_filename: str = "lettre_motivation_gemini.docx",
+    pdf_filename: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Rendu (sans appel à Gemini) d'une lettre déjà générée : DOCX, puis PDF
+    via HTML. Retourne {"docx_path", "pdf_path", "chunks"}.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    docx_path = os.path.join(output_dir, docx_filename)
+
     # 2) Génération du DOCX
     docx_path = build_cover_letter_docx_from_chunks(chunks, output_path=docx_path)
 
@@ -21,9 +21,13 @@ import re
 from typing import Dict, Any, Optional
 
 from dotenv import load_dotenv
-from google import genai
 from google.genai import types
 
+try:
+    from .llm_gateway import generate_content, agenerate_content
+except ImportError:
+    from llm_gateway import generate_content, agenerate_content
+
 load_dotenv()
 
 # ============================================================================
@@ -229,15 +233,25 @@ def generate_with_gemini(prompt: str, api_key: str, model_name: str) -> str:
     """
     Call Gemini with the given prompt and return the raw text output.
     """
-    client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt,
-        config=types.GenerateContentConfig(
-            temperature=0.1,
-            max_output_tokens=8192,
-        ),
-    )
+    response = generate_content(prompt, api_key, model_name, config=_PARSING_CONFIG, caller="cv_parsing")
+    return _response_text(response)
+
+
+async def agenerate_with_gemini(prompt: str, api_key: str, model_name: str) -> str:
+    """
+    Asyncio variant of generate_with_gemini.
+    """
+    response = await agenerate_content(prompt, api_key, model_name, config=_PARSING_CONFIG, caller="cv_parsing")
+    return _response_text(response)
+
+
+_PARSING_CONFIG = types.GenerateContentConfig(
+    temperature=0.1,
+    max_output_tokens=8192,
+)
+
+
+def _response_text(response) -> str:
     # Selon la version de la lib, le texte peut être accessible via .text ou parts
     try:
         return response.text
@@ -305,6 +319,15 @@ def parse_cv_with_gemini(cv_text: str, api_key: str, model_name: str = "gemini-1
     return parsed_json
 
 
+async def aparse_cv_with_gemini(cv_text: str, api_key: str, model_name: str = "gemini-1.5-flash", current_profile: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Asyncio variant of parse_cv_with_gemini (same prompt and parsing).
+    """
+    prompt = build_cv_parsing_prompt(cv_text, current_profile)
+    raw_output = await agenerate_with_gemini(prompt, api_key, model_name)
+    return extract_json_from_output(raw_output)
+
+
 # ============================================================================
 # 5. DEMO EN LIGNE DE COMMANDE (OPTIONNEL)
 # ============================================================================
@@ -3,7 +3,11 @@ import os
 import re
 from typing import Dict, Any, List
 from dotenv import load_dotenv
-from google import genai
+
+try:
+    from .llm_gateway import generate_content, agenerate_content
+except ImportError:
+    from llm_gateway import generate_content, agenerate_content
 
 load_dotenv()
 
@@ -16,11 +20,7 @@ load_dotenv()
 # ============================================================================
 
 def _generate_with_gemini(prompt: str, api_key: str, model_name: str) -> str:
-    client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt
-    )
+    response = generate_content(prompt, api_key, model_name, caller="experience_generator")
     return response.text.strip()
 
 def _extract_json(output: str) -> Dict[str, Any]:
@@ -49,13 +49,11 @@ def _extract_json(output: str) -> Dict[str, Any]:
 # 3. GENERATEUR UNIQUE (ONE-SHOT)
 # ============================================================================
 
-def generate_full_cv_content(offer_parsed: Dict[str, Any], user_data: Dict[str, Any], api_key: str, model_name: str = "gemini-2.5-flash") -> Dict[str, Any]:
+def build_cv_content_prompt(offer_parsed: Dict[str, Any], user_data: Dict[str, Any]) -> str:
     """
-    Génère l'intégralité du contenu du CV en un seul appel API pour garantir
-    la cohérence, réduire la latence et optimiser les coûts.
+    Construit le prompt de génération du contenu du CV.
     """
-    
-    prompt = f"""
+    return f"""
 Tu es un expert en recrutement et optimisation de CV (ATS Friendly).
 Ton rôle est de réécrire les données de l'utilisateur pour qu'elles matchent parfaitement avec l'offre d'emploi.
 
@@ -113,9 +111,24 @@ Retourne UNIQUEMENT un objet JSON avec cette structure exacte :
   "interests": [{{ "label": "Loisir", "sentence": "Description valorisant une soft skill" }}]
 }}
 """
+
+def generate_full_cv_content(offer_parsed: Dict[str, Any], user_data: Dict[str, Any], api_key: str, model_name: str = "gemini-2.5-flash") -> Dict[str, Any]:
+    """
+    Génère l'intégralité du contenu du CV en un seul appel API pour garantir
+    la cohérence, réduire la latence et optimiser les coûts.
+    """
+    prompt = build_cv_content_prompt(offer_parsed, user_data)
     raw_response = _generate_with_gemini(prompt, api_key, model_name)
     return _extract_json(raw_response)
 
+async def agenerate_full_cv_content(offer_parsed: Dict[str, Any], user_data: Dict[str, Any], api_key: str, model_name: str = "gemini-2.5-flash") -> Dict[str, Any]:
+    """
+    Variante asyncio de generate_full_cv_content.
+    """
+    prompt = build_cv_content_prompt(offer_parsed, user_data)
+    response = await agenerate_content(prompt, api_key, model_name, caller="experience_generator")
+    return _extract_json(response.text.strip())
+
 # ============================================================================
 # 4. EXECUTION
 # ============================================================================
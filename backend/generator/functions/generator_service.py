@@ -1,7 +1,7 @@
 import os
 import json
 import uuid
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from dotenv import load_dotenv
 
 # Chargement des variables d'environnement
@@ -11,17 +11,19 @@ load_dotenv()
 try:
     from .cv_parsing import parse_cv_with_gemini, extract_text_from_file
     from .job_offer_parser import parse_job_offer_gemini
-    from .compatibility import score_profile_with_gemini, compute_heuristic_score
+    from .compatibility import score_profile_with_gemini, score_profile_with_gemini_batch, stream_profile_score_with_gemini, compute_heuristic_score, compute_heuristic_scores
     from .experience_generator import generate_full_cv_content
     from .cv_generator import generate_cv_html, convert_html_to_pdf
     from .cover_letter_generator import generate_personalized_cover_letter_docx_and_pdf
+    from .skill_extractor import extract_offer_skills
 except ImportError:
     from cv_parsing import parse_cv_with_gemini, extract_text_from_file
     from job_offer_parser import parse_job_offer_gemini
-    from compatibility import score_profile_with_gemini, compute_heuristic_score
+    from compatibility import score_profile_with_gemini, score_profile_with_gemini_batch, stream_profile_score_with_gemini, compute_heuristic_score, compute_heuristic_scores
     from experience_generator import generate_full_cv_content
     from cv_generator import generate_cv_html, convert_html_to_pdf
     from cover_letter_generator import generate_personalized_cover_letter_docx_and_pdf
+    from skill_extractor import extract_offer_skills
 
 class JobSwipeGeneratorService:
     """
@@ -61,7 +63,19 @@ class JobSwipeGeneratorService:
         results['offer_parsed'] = offer_parsed
 
         # 2. Génération Contenu CV (One-Shot)
-        user_data = {
+        user_data = self.build_cv_user_data(cv_parsed)
+        generated_content = generate_full_cv_content(offer_parsed, user_data, api_key=api_key, model_name=model_name)
+        results['generated_content'] = generated_content
+
+        # 3. Rendu PDF du CV
+        results['paths'] = self.render_cv_files(cv_parsed, generated_content)
+        return results
+
+    def build_cv_user_data(self, cv_parsed: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Données sources du profil envoyées à la génération du contenu du CV.
+        """
+        return {
             "profile": {"summary": cv_parsed.get("raw_summary")},
             "experiences": cv_parsed.get("professional_experiences", []),
             "projects": cv_parsed.get("academic_projects", []),
@@ -69,10 +83,12 @@ class JobSwipeGeneratorService:
             "skills": cv_parsed.get("skills", {}),
             "interests": cv_parsed.get("interests", [])
         }
-        generated_content = generate_full_cv_content(offer_parsed, user_data, api_key=api_key, model_name=model_name)
-        results['generated_content'] = generated_content
 
-        # 3. Rendu PDF du CV
+    def render_cv_files(self, cv_parsed: Dict[str, Any], generated_content: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Rendu HTML + PDF du CV généré (sans appel à Gemini). Ajoute
+        "contact_info" au contenu généré et retourne les chemins des fichiers.
+        """
         full_cv_content = {
             "cv_title": {"cv_title": generated_content.get("cv_title")},
             "objective": {"objective": generated_content.get("objective")},
@@ -114,11 +130,10 @@ class JobSwipeGeneratorService:
             f.write(html_cv)
         
         convert_html_to_pdf(html_cv, pdf_path)
-        results['paths'] = {
+        return {
             'cv_html': html_path,
             'cv_pdf': pdf_path
         }
-        return results
 
     def process_motivation(
         self, 
@@ -167,6 +182,32 @@ class JobSwipeGeneratorService:
         compatibility = score_profile_with_gemini(offer_data, cv_data, api_key=api_key, model_name=model_name)
         return compatibility
 
+    def process_scoring_stream(
+        self,
+        cv_data: Dict[str, Any],
+        offer_data: Dict[str, Any],
+        api_key: str,
+        model_name: str
+    ):
+        """
+        Calcule le score de compatibilité via Gemini en streaming : itérateur
+        d'événements (scores partiels, puis analyse complète).
+        """
+        return stream_profile_score_with_gemini(offer_data, cv_data, api_key=api_key, model_name=model_name)
+
+    def process_scoring_batch(
+        self,
+        cv_data: Dict[str, Any],
+        offers: Dict[Any, Dict[str, Any]],
+        api_key: str,
+        model_name: str
+    ) -> Dict[Any, Dict[str, Any]]:
+        """
+        Calcule les scores de compatibilité d'un CV contre plusieurs offres via
+        Gemini, plusieurs offres par appel. Retourne {id: analyse}.
+        """
+        return score_profile_with_gemini_batch(offers, cv_data, api_key=api_key, model_name=model_name)
+
     def compute_fast_score(
         self, 
         cv_data: Dict[str, Any],
@@ -177,6 +218,22 @@ class JobSwipeGeneratorService:
         """
         return compute_heuristic_score(offer_data, cv_data)
 
+    def compute_fast_scores(
+        self, 
+        cv_data: Dict[str, Any],
+        offers: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """
+        Calcule les scores heuristiques d'un deck d'offres {id: offre} en un passage.
+        """
+        return compute_heuristic_scores(cv_data, offers)
+
+    def extract_offer_skills(self, offer_data: Dict[str, Any]) -> List[str]:
+        """
+        Extrait localement (sans Gemini) les compétences techniques d'une offre brute.
+        """
+        return extract_offer_skills(offer_data)
+
     def parse_only_offer(self, offer_text: str, api_key: str, model_name: str) -> Dict[str, Any]:
         """
         Parse uniquement le texte d'une offre d'emploi.
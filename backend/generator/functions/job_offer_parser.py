@@ -20,7 +20,11 @@ import re
 from typing import Dict, Any
 
 from dotenv import load_dotenv
-from google import genai
+
+try:
+    from .llm_gateway import generate_content, agenerate_content
+except ImportError:
+    from llm_gateway import generate_content, agenerate_content
 
 load_dotenv()
 
@@ -146,15 +150,19 @@ def generate_with_gemini(prompt: str, api_key: str, model_name: str) -> str:
     """
     Envoie un prompt à Gemini et renvoie le texte généré.
     """
-    client = genai.Client(api_key=api_key)
-    response = client.models.generate_content(
-        model=model_name,
-        contents=prompt
-    )
+    response = generate_content(prompt, api_key, model_name, caller="job_offer_parser")
     # response.text contient généralement la réponse combinée
     return response.text.strip()
 
 
+async def agenerate_with_gemini(prompt: str, api_key: str, model_name: str) -> str:
+    """
+    Variante asyncio de generate_with_gemini.
+    """
+    response = await agenerate_content(prompt, api_key, model_name, caller="job_offer_parser")
+    return response.text.strip()
+
+
 # ============================================================================
 # 4. FONCTION PRINCIPALE : parse_job_offer_gemini
 # ============================================================================
@@ -173,6 +181,16 @@ def parse_job_offer_gemini(offer_text: str, api_key: str, model_name: str = "gem
     return parsed_json
 
 
+async def aparse_job_offer_gemini(offer_text: str, api_key: str, model_name: str = "gemini-1.5-flash") -> Dict[str, Any]:
+    """
+    Variante asyncio de parse_job_offer_gemini (même prompt, même parsing).
+    """
+    language = detect_language(offer_text)
+    prompt = build_parsing_prompt(offer_text, language)
+    raw_output = await agenerate_with_gemini(prompt, api_key, model_name)
+    return extract_json_from_output(raw_output)
+
+
 # ============================================================================
 # 5. DEMO EN LIGNE DE COMMANDE
 # ============================================================================
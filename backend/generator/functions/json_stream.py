@@ -0,0 +1,127 @@
+"""
+json_stream.py
+
+Parseur JSON incrémental pour les réponses streamées des LLM.
+
+Le texte arrive par morceaux (tokens Gemini) ; chaque valeur scalaire
+(nombre, chaîne, booléen, null) est signalée dès qu'elle est complète, avec
+son chemin dans le document, sans attendre la fin de la réponse :
+
+    parser = IncrementalJSONParser()
+    for chunk in stream:
+        for path, value in parser.feed(chunk):
+            ...  # ("overall_score",) -> 72, ("scores", "skills_match") -> 80
+
+Tolérances alignées sur extract_json_from_output (compatibility.py) : le texte
+avant la première accolade (```json, etc.) est ignoré, et un nombre suivi de
+"%" ou de "/100" vaut ce nombre. Le document complet reste à parser par
+extract_json_from_output une fois le flux terminé.
+"""
+
+import re
+import json
+from typing import Any, List, Tuple
+
+_NUMBER_PREFIX = re.compile(r"^-?\d+(?:\.\d+)?")
+
+
+class IncrementalJSONParser:
+    """
+    Automate caractère par caractère : pile des conteneurs ouverts (objets et
+    tableaux), clé courante de chaque objet, chaîne ou scalaire en cours.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.done = False
+        # Chaque niveau : [type ("obj" | "arr"), clé ou index courant, valeur attendue]
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._buffer = []
+        self._scalar = []
+
+    def feed(self, text: str) -> List[Tuple[tuple, Any]]:
+        """
+        Ajoute un morceau de texte et retourne les valeurs scalaires complétées
+        par ce morceau : [(chemin, valeur), ...].
+        """
+        values = []
+        for char in text:
+            if self.done:
+                break
+            if not self.started:
+                if char == "{":
+                    self.started = True
+                    self._stack.append(["obj", None, False])
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._buffer.append(char)
+                elif char == "\\":
+                    self._escape = True
+                    self._buffer.append(char)
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(values)
+                else:
+                    self._buffer.append(char)
+                continue
+
+            if char == '"':
+                top = self._stack[-1]
+                self._in_string = True
+                self._string_is_key = top[0] == "obj" and not top[2]
+                self._buffer = []
+            elif char in "{[":
+                self._stack.append(["obj" if char == "{" else "arr", None if char == "{" else 0, False])
+            elif char in "}]":
+                self._flush_scalar(values)
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                else:
+                    self._stack[-1][2] = False
+            elif char == ":":
+                self._stack[-1][2] = True
+            elif char == ",":
+                self._flush_scalar(values)
+                top = self._stack[-1]
+                if top[0] == "arr":
+                    top[1] += 1
+                else:
+                    top[2] = False
+            elif not char.isspace() or self._scalar:
+                self._scalar.append(char)
+        return values
+
+    def _path(self) -> tuple:
+        return tuple(level[1] for level in self._stack)
+
+    def _end_string(self, values: list):
+        raw = "".join(self._buffer)
+        try:
+            text = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            text = raw
+        if self._string_is_key:
+            self._stack[-1][1] = text
+        else:
+            values.append((self._path(), text))
+            self._stack[-1][2] = False
+
+    def _flush_scalar(self, values: list):
+        raw = "".join(self._scalar).strip()
+        self._scalar = []
+        if not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            # Ex : 75% ou 75/100 (cf. extract_json_from_output)
+            match = _NUMBER_PREFIX.match(raw)
+            value = json.loads(match.group(0)) if match else raw
+        values.append((self._path(), value))
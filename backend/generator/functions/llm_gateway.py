@@ -0,0 +1,684 @@
+"""
+llm_gateway.py
+
+Point de passage unique des appels Gemini du générateur (parsing CV et
+offres, compatibilité, sélection de contenu, expériences, lettre de
+motivation).
+
+- Un client genai par clé API, réutilisé d'un appel à l'autre : les
+  connexions HTTP restent ouvertes (keep-alive) au lieu de refaire une
+  poignée de main TLS à chaque requête. Le pool est borné (LLM_POOL_MAX_CLIENTS,
+  le client utilisé le plus anciennement est évincé en premier) et les
+  clients inactifs depuis LLM_POOL_IDLE_SECONDS sont évincés. Un client évincé
+  est fermé (connexions synchrones et asyncio) dès qu'aucun appel ne l'utilise.
+- Appels synchrones, streamés ou asyncio (client.aio, pour les endpoints
+  async qui ne doivent pas bloquer la boucle d'événements).
+- Politique d'appel commune (llm_policy.py) : reprises avec backoff et
+  jitter sur les erreurs transitoires, hedging optionnel au-delà du p95,
+  budget de temps de l'endpoint en cours, limite de débit par clé API (file
+  d'attente, profondeur exposée dans /metrics).
+- Regroupement des appels identiques en cours (singleflight) : un double
+  appel (double tap, nouveau rendu du front) pendant qu'une requête
+  identique (même clé, modèle, prompt et config) attend sa réponse partage
+  cette requête au lieu d'en envoyer une seconde.
+- Latence de chaque tentative, par module appelant et par modèle (p50/p95/p99
+  sur une fenêtre glissante), reprises et hedges, exposés dans /metrics.
+
+Les clés API ne sont jamais conservées en clair hors des clients : le pool
+et les statistiques les identifient par une empreinte.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import contextvars
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import httpx
+from google import genai
+
+try:
+    from .llm_policy import (
+        LLM_RETRY_MAX_ATTEMPTS, LLM_HEDGE, LLM_RATE_LIMIT_PER_MINUTE, LLM_RATE_LIMIT_BURST,
+        LLMBudgetExceeded, TokenBucket,
+        remaining_seconds, is_retryable, backoff_seconds, hedge_delay_seconds, with_timeout,
+    )
+except ImportError:
+    from llm_policy import (
+        LLM_RETRY_MAX_ATTEMPTS, LLM_HEDGE, LLM_RATE_LIMIT_PER_MINUTE, LLM_RATE_LIMIT_BURST,
+        LLMBudgetExceeded, TokenBucket,
+        remaining_seconds, is_retryable, backoff_seconds, hedge_delay_seconds, with_timeout,
+    )
+
+# Nombre maximum de clients (donc de clés API) gardés ouverts
+LLM_POOL_MAX_CLIENTS = int(os.getenv("LLM_POOL_MAX_CLIENTS", "32"))
+
+# Un client inutilisé depuis ce délai (secondes) est évincé du pool
+LLM_POOL_IDLE_SECONDS = float(os.getenv("LLM_POOL_IDLE_SECONDS", "300"))
+
+# Connexions keep-alive par client et durée de vie d'une connexion inactive
+LLM_POOL_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_POOL_KEEPALIVE_CONNECTIONS", "10"))
+LLM_POOL_KEEPALIVE_SECONDS = float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", "120"))
+
+# URL de base de l'API (proxy, serveur factice des tests de charge) ; vide = API Gemini
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "")
+
+# Latences conservées par (module, modèle) pour les percentiles
+LLM_LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", "1024"))
+
+# Threads des appels synchrones quand le hedging est actif (requête initiale
+# et requête de secours tournent en parallèle)
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "32"))
+
+
+def _key_fingerprint(api_key: str) -> str:
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:12]
+
+
+def _flight_key(fingerprint: str, model_name: str, prompt, config) -> str:
+    """Empreinte d'un appel : clé API, modèle, prompt et config."""
+    if hasattr(config, "model_dump"):
+        config = config.model_dump(mode="json", exclude_none=True)
+    payload = json.dumps([fingerprint, model_name, prompt, config], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """Appel synchrone en cours, partagé par les appelants identiques."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _percentile(values: list, q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _LatencyStats:
+    """
+    Compteurs et fenêtre de latences d'un couple (module, modèle). "calls"
+    compte les requêtes HTTP (tentatives et hedges compris).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.budget_exceeded = 0
+        self.latencies_ms = deque(maxlen=LLM_LATENCY_WINDOW)
+
+    def snapshot(self) -> dict:
+        latencies = list(self.latencies_ms)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "rate_limited": self.rate_limited,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "budget_exceeded": self.budget_exceeded,
+            "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else None,
+            "p50_ms": _percentile(latencies, 0.50),
+            "p95_ms": _percentile(latencies, 0.95),
+            "p99_ms": _percentile(latencies, 0.99),
+        }
+
+
+class LLMGateway:
+    """
+    Pool de clients genai par clé API, avec éviction LRU et sur inactivité.
+    """
+
+    def __init__(self, max_clients: int = LLM_POOL_MAX_CLIENTS, idle_seconds: float = LLM_POOL_IDLE_SECONDS):
+        self.max_clients = max_clients
+        self.idle_seconds = idle_seconds
+        # empreinte de la clé -> (client, dernier usage)
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._hedge_executor = None
+        # Appels en cours (singleflight) : empreinte -> _Flight (synchrone)
+        # ou Task (asyncio, boucle d'événements incluse dans l'empreinte)
+        self._flights = {}
+        self._aflights = {}
+        # empreinte de la clé -> TokenBucket
+        self._buckets = {}
+        # Appels en cours par client (id du client -> nombre), clients évincés
+        # encore utilisés (fermés à la fin de leur dernier appel) et clients
+        # dont les connexions asyncio restent à fermer depuis une boucle
+        self._leases = {}
+        self._retiring = {}
+        self._pending_aclose = []
+        self._closing_tasks = set()
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+
+    def _new_client(self, api_key: str):
+        limits = httpx.Limits(
+            max_keepalive_connections=LLM_POOL_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=LLM_POOL_KEEPALIVE_SECONDS,
+        )
+        # Même pool keep-alive pour les appels synchrones et asynchrones (client.aio)
+        http_options = {"client_args": {"limits": limits}, "async_client_args": {"limits": limits}}
+        if LLM_BASE_URL:
+            http_options["base_url"] = LLM_BASE_URL
+        return genai.Client(api_key=api_key, http_options=http_options)
+
+    def get_client(self, api_key: str):
+        """Client genai de la clé (créé au premier appel, puis réutilisé)."""
+        return self._checkout(api_key, lease=False)
+
+    def _checkout(self, api_key: str, lease: bool):
+        fingerprint = _key_fingerprint(api_key)
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            # Éviction des clients inactifs (les plus anciens sont en tête)
+            while self._clients:
+                oldest, (_, last_used) = next(iter(self._clients.items()))
+                if now - last_used < self.idle_seconds:
+                    break
+                evicted.append(self._clients.pop(oldest)[0])
+                self._buckets.pop(oldest, None)
+
+            entry = self._clients.pop(fingerprint, None)
+            if entry is not None:
+                client = entry[0]
+                self.reused += 1
+            else:
+                client = self._new_client(api_key)
+                self.created += 1
+                while len(self._clients) >= self.max_clients:
+                    oldest, (old_client, _) = self._clients.popitem(last=False)
+                    self._buckets.pop(oldest, None)
+                    evicted.append(old_client)
+            self._clients[fingerprint] = (client, now)
+            if lease:
+                self._leases[id(client)] = self._leases.get(id(client), 0) + 1
+            self.evicted += len(evicted)
+            # Un client évincé encore utilisé par un appel est fermé à la fin de celui-ci
+            to_close = [c for c in evicted if not self._leases.get(id(c))]
+            self._retiring.update((id(c), c) for c in evicted if self._leases.get(id(c)))
+        for old_client in to_close:
+            self._retire(old_client)
+        return client
+
+    @contextmanager
+    def _leased(self, api_key: str):
+        """Client de la clé, protégé de la fermeture pendant l'appel."""
+        client = self._checkout(api_key, lease=True)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                count = self._leases.pop(id(client)) - 1
+                if count:
+                    self._leases[id(client)] = count
+                retired = None if count else self._retiring.pop(id(client), None)
+            if retired is not None:
+                self._retire(retired)
+
+    def _retire(self, client):
+        """
+        Ferme un client évincé : connexions synchrones tout de suite, connexions
+        asyncio dans la boucle en cours, ou au prochain appel asyncio.
+        """
+        _close_client(client)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            with self._lock:
+                self._pending_aclose.append(client)
+            return
+        task = loop.create_task(_aclose_client(client))
+        self._closing_tasks.add(task)
+        task.add_done_callback(self._closing_tasks.discard)
+
+    async def _drain_pending_aclose(self):
+        with self._lock:
+            clients, self._pending_aclose = self._pending_aclose, []
+        for client in clients:
+            await _aclose_client(client)
+
+    def generate_content(self, prompt, api_key: str, model_name: str, config: Any = None, caller: str = "default"):
+        """
+        client.models.generate_content via le pool, avec la politique d'appel
+        (reprises, hedging, budget, limite de débit) ; chaque tentative est
+        chronométrée par (caller, modèle). Un appel identique déjà en cours
+        est partagé.
+        """
+        key = _flight_key(_key_fingerprint(api_key), model_name, prompt, config)
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self._stats_for(caller, model_name).coalesced += 1
+
+        if not leader:
+            remaining = remaining_seconds()
+            if not flight.done.wait(timeout=None if remaining is None else max(0.0, remaining)):
+                self._count(caller, model_name, "budget_exceeded")
+                raise LLMBudgetExceeded(f"Budget de temps épuisé en attendant un appel Gemini identique ({caller})")
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = self._call(prompt, api_key, model_name, config, caller)
+            return flight.response
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def agenerate_content(self, prompt, api_key: str, model_name: str, config: Any = None, caller: str = "default"):
+        """
+        Variante asyncio de generate_content (client.aio) : n'occupe pas de
+        thread pendant l'attente de la réponse. L'appel partagé tourne dans
+        une tâche protégée : l'annulation d'un des appelants (client
+        déconnecté) n'interrompt pas les autres.
+        """
+        loop = asyncio.get_running_loop()
+        key = (id(loop), _flight_key(_key_fingerprint(api_key), model_name, prompt, config))
+        with self._lock:
+            task = self._aflights.get(key)
+            leader = task is None
+            if leader:
+                task = self._aflights[key] = asyncio.ensure_future(self._acall(prompt, api_key, model_name, config, caller))
+                task.add_done_callback(lambda done: self._land(key, done))
+            else:
+                self._stats_for(caller, model_name).coalesced += 1
+
+        remaining = None if leader else remaining_seconds()
+        if remaining is None:
+            return await asyncio.shield(task)
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout=max(0.0, remaining))
+        except asyncio.TimeoutError:
+            if task.done():
+                raise
+            self._count(caller, model_name, "budget_exceeded")
+            raise LLMBudgetExceeded(f"Budget de temps épuisé en attendant un appel Gemini identique ({caller})")
+
+    def _land(self, key, task: asyncio.Task):
+        """Fin d'un appel asyncio partagé : retiré des appels en cours."""
+        with self._lock:
+            self._aflights.pop(key, None)
+        # Erreur consommée même si tous les appelants ont été annulés
+        if not task.cancelled():
+            task.exception()
+
+    def _call(self, prompt, api_key: str, model_name: str, config: Any, caller: str):
+        with self._leased(api_key) as client:
+
+            def attempt(timeout: Optional[float]):
+                return client.models.generate_content(model=model_name, contents=prompt, config=with_timeout(config, timeout))
+
+            for n in range(LLM_RETRY_MAX_ATTEMPTS):
+                try:
+                    if LLM_HEDGE:
+                        return self._hedged(attempt, api_key, caller, model_name)
+                    return self._timed(attempt, api_key, caller, model_name)
+                except Exception as e:
+                    delay = self._retry_delay(e, n, caller, model_name)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+
+    async def _acall(self, prompt, api_key: str, model_name: str, config: Any, caller: str):
+        # Clients évincés hors de toute boucle : leurs connexions asyncio sont fermées ici
+        if self._pending_aclose:
+            await self._drain_pending_aclose()
+        with self._leased(api_key) as client:
+
+            async def attempt(timeout: Optional[float]):
+                return await client.aio.models.generate_content(model=model_name, contents=prompt, config=with_timeout(config, timeout))
+
+            for n in range(LLM_RETRY_MAX_ATTEMPTS):
+                try:
+                    if LLM_HEDGE:
+                        return await self._ahedged(attempt, api_key, caller, model_name)
+                    return await self._atimed(attempt, api_key, caller, model_name)
+                except Exception as e:
+                    delay = self._retry_delay(e, n, caller, model_name)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+
+    def generate_content_stream(self, prompt, api_key: str, model_name: str, config: Any = None, caller: str = "default") -> Iterator[Any]:
+        """
+        client.models.generate_content_stream via le pool. Les reprises ne
+        portent que sur l'ouverture du flux (avant le premier morceau : rien
+        n'a encore été transmis à l'appelant) ; pas de hedging ni de
+        regroupement. La latence mesurée va jusqu'au dernier morceau reçu.
+        """
+        with self._leased(api_key) as client:
+            # LLM_RETRY_MAX_ATTEMPTS >= 1 : la boucle s'achève sur un break ou une exception
+            for n in range(LLM_RETRY_MAX_ATTEMPTS):
+                self._throttle(api_key, caller, model_name)
+                timeout = self._check_budget(caller, model_name)
+                start = time.perf_counter()
+                try:
+                    chunks = client.models.generate_content_stream(model=model_name, contents=prompt, config=with_timeout(config, timeout))
+                    first = next(chunks, None)
+                except Exception as e:
+                    self._record(caller, model_name, start, error=True)
+                    delay = self._retry_delay(e, n, caller, model_name)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    continue
+                break
+
+            try:
+                if first is not None:
+                    yield first
+                for chunk in chunks:
+                    yield chunk
+            except Exception:
+                self._record(caller, model_name, start, error=True)
+                raise
+            self._record(caller, model_name, start)
+
+    def _bucket(self, api_key: str) -> Optional[TokenBucket]:
+        if LLM_RATE_LIMIT_PER_MINUTE <= 0:
+            return None
+        fingerprint = _key_fingerprint(api_key)
+        with self._lock:
+            bucket = self._buckets.get(fingerprint)
+            if bucket is None:
+                bucket = self._buckets[fingerprint] = TokenBucket(LLM_RATE_LIMIT_PER_MINUTE, LLM_RATE_LIMIT_BURST)
+        return bucket
+
+    def _reserve(self, bucket: TokenBucket, caller: str, model_name: str) -> float:
+        """Attente imposée par la limite de débit ; erreur si elle dépasse le budget."""
+        wait = bucket.reserve()
+        if wait <= 0:
+            return 0.0
+        remaining = remaining_seconds()
+        if remaining is not None and wait >= remaining:
+            bucket.release()
+            self._count(caller, model_name, "budget_exceeded")
+            raise LLMBudgetExceeded(f"Budget de temps insuffisant pour la file d'attente de la clé API ({caller})")
+        self._count(caller, model_name, "rate_limited")
+        return wait
+
+    def _throttle(self, api_key: str, caller: str, model_name: str):
+        """Attend son tour dans la file de la clé API (limite de débit)."""
+        bucket = self._bucket(api_key)
+        if bucket is None:
+            return
+        wait = self._reserve(bucket, caller, model_name)
+        if wait:
+            bucket.enter_queue()
+            try:
+                time.sleep(wait)
+            finally:
+                bucket.leave_queue()
+
+    async def _athrottle(self, api_key: str, caller: str, model_name: str):
+        bucket = self._bucket(api_key)
+        if bucket is None:
+            return
+        wait = self._reserve(bucket, caller, model_name)
+        if wait:
+            bucket.enter_queue()
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                bucket.release()
+                raise
+            finally:
+                bucket.leave_queue()
+
+    def _check_budget(self, caller: str, model_name: str) -> Optional[float]:
+        """Temps restant du budget de l'endpoint (None = illimité) ; erreur s'il est épuisé."""
+        remaining = remaining_seconds()
+        if remaining is not None and remaining <= 0:
+            self._count(caller, model_name, "budget_exceeded")
+            raise LLMBudgetExceeded(f"Budget de temps épuisé avant l'appel Gemini ({caller})")
+        return remaining
+
+    def _retry_delay(self, error: Exception, attempt: int, caller: str, model_name: str) -> Optional[float]:
+        """Attente avant la reprise, ou None si l'erreur doit remonter."""
+        if not is_retryable(error) or attempt + 1 >= LLM_RETRY_MAX_ATTEMPTS:
+            return None
+        delay = backoff_seconds(attempt)
+        remaining = remaining_seconds()
+        if remaining is not None and delay >= remaining:
+            self._count(caller, model_name, "budget_exceeded")
+            return None
+        self._count(caller, model_name, "retries")
+        print(f"[WARN] Appel Gemini ({caller}) en échec, nouvelle tentative dans {delay * 1000:.0f} ms : {error}")
+        return delay
+
+    def _hedge_delay(self, caller: str, model_name: str) -> float:
+        with self._lock:
+            stats = self._latency.get((caller, model_name))
+            latencies = list(stats.latencies_ms) if stats else []
+        return hedge_delay_seconds(_percentile(latencies, 0.95), len(latencies))
+
+    def _timed(self, attempt: Callable, api_key: str, caller: str, model_name: str):
+        # L'attente dans la file de la clé n'entre pas dans la latence mesurée
+        self._throttle(api_key, caller, model_name)
+        timeout = self._check_budget(caller, model_name)
+        start = time.perf_counter()
+        try:
+            response = attempt(timeout)
+        except Exception:
+            self._record(caller, model_name, start, error=True)
+            raise
+        self._record(caller, model_name, start)
+        return response
+
+    async def _atimed(self, attempt: Callable, api_key: str, caller: str, model_name: str):
+        await self._athrottle(api_key, caller, model_name)
+        timeout = self._check_budget(caller, model_name)
+        start = time.perf_counter()
+        try:
+            response = await attempt(timeout)
+        except Exception:
+            self._record(caller, model_name, start, error=True)
+            raise
+        self._record(caller, model_name, start)
+        return response
+
+    def _hedged(self, attempt: Callable, api_key: str, caller: str, model_name: str):
+        """
+        Requête initiale, puis requête de secours si aucune réponse n'est
+        arrivée après le délai de hedge : la première réponse valide gagne.
+        La requête perdante ne peut pas être interrompue, elle se termine en
+        arrière-plan (bornée par le délai HTTP).
+        """
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+        executor = self._hedge_executor
+
+        # Les threads du pool reprennent le contexte de l'appelant (budget)
+        primary = executor.submit(contextvars.copy_context().run, self._timed, attempt, api_key, caller, model_name)
+        done, pending = wait([primary], timeout=self._hedge_delay(caller, model_name))
+        hedge = None
+        if not done:
+            hedge = executor.submit(contextvars.copy_context().run, self._timed, attempt, api_key, caller, model_name)
+            self._count(caller, model_name, "hedges_fired")
+            pending = {primary, hedge}
+
+        error = None
+        while True:
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count(caller, model_name, "hedges_won")
+                    return future.result()
+                error = future.exception()
+            if not pending:
+                raise error
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+    async def _ahedged(self, attempt: Callable, api_key: str, caller: str, model_name: str):
+        """Variante asyncio de _hedged : la requête perdante est annulée."""
+        primary = asyncio.ensure_future(self._atimed(attempt, api_key, caller, model_name))
+        done, pending = await asyncio.wait([primary], timeout=self._hedge_delay(caller, model_name))
+        hedge = None
+        if not done:
+            hedge = asyncio.ensure_future(self._atimed(attempt, api_key, caller, model_name))
+            self._count(caller, model_name, "hedges_fired")
+            pending = {primary, hedge}
+
+        error = None
+        try:
+            while True:
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._count(caller, model_name, "hedges_won")
+                        return task.result()
+                    error = task.exception()
+                if not pending:
+                    raise error
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for task in pending:
+                task.cancel()
+            # Erreur éventuelle de la requête perdante : consommée, pas remontée
+            for task in (primary, hedge):
+                if task is not None and task.done() and not task.cancelled():
+                    task.exception()
+
+    def _stats_for(self, caller: str, model_name: str) -> _LatencyStats:
+        # Appelé sous self._lock
+        stats = self._latency.get((caller, model_name))
+        if stats is None:
+            stats = self._latency[(caller, model_name)] = _LatencyStats()
+        return stats
+
+    def _count(self, caller: str, model_name: str, counter: str):
+        with self._lock:
+            stats = self._stats_for(caller, model_name)
+            setattr(stats, counter, getattr(stats, counter) + 1)
+
+    def _record(self, caller: str, model_name: str, start: float, error: bool = False):
+        elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+        with self._lock:
+            stats = self._stats_for(caller, model_name)
+            stats.calls += 1
+            if error:
+                stats.errors += 1
+            else:
+                stats.latencies_ms.append(elapsed_ms)
+
+    def close(self):
+        """Ferme tous les clients (arrêt de l'application)."""
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()]
+            self.evicted += len(clients)
+            self._clients.clear()
+            # Clients évincés encore en cours d'appel : fermés aussi à l'arrêt
+            clients.extend(self._retiring.values())
+            self._retiring.clear()
+            executor, self._hedge_executor = self._hedge_executor, None
+        for client in clients:
+            _close_client(client)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def aclose(self):
+        """Ferme tous les clients, connexions asyncio comprises."""
+        await self._drain_pending_aclose()
+        with self._lock:
+            clients = [client for client, _ in self._clients.values()]
+        for client in clients:
+            await _aclose_client(client)
+        self.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "clients": len(self._clients),
+                "max_clients": self.max_clients,
+                "created": self.created,
+                "reused": self.reused,
+                "evicted": self.evicted,
+                "rate_limit": {
+                    "per_minute": LLM_RATE_LIMIT_PER_MINUTE,
+                    "burst": LLM_RATE_LIMIT_BURST,
+                    # Requêtes en attente d'un jeton, toutes clés confondues
+                    "queue_depth": sum(bucket.queued for bucket in self._buckets.values()),
+                    "queued_keys": sum(1 for bucket in self._buckets.values() if bucket.queued),
+                },
+                "in_flight": len(self._flights) + len(self._aflights),
+                "calls": {
+                    f"{caller}/{model_name}": stats.snapshot()
+                    for (caller, model_name), stats in sorted(self._latency.items())
+                },
+            }
+
+
+def _close_client(client):
+    try:
+        client.close()
+    except Exception as e:
+        print(f"[WARN] Fermeture d'un client Gemini impossible : {e}")
+
+
+async def _aclose_client(client):
+    try:
+        await client.aio.aclose()
+    except Exception as e:
+        print(f"[WARN] Fermeture d'un client Gemini asyncio impossible : {e}")
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Passerelle partagée (singleton)."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+
+def generate_content(prompt, api_key: str, model_name: str, config: Any = None, caller: str = "default"):
+    """Raccourci : appel Gemini via la passerelle partagée (réponse brute du SDK)."""
+    return get_llm_gateway().generate_content(prompt, api_key, model_name, config=config, caller=caller)
+
+
+async def agenerate_content(prompt, api_key: str, model_name: str, config: Any = None, caller: str = "default"):
+    """Raccourci : appel Gemini asyncio via la passerelle partagée (réponse brute du SDK)."""
+    return await get_llm_gateway().agenerate_content(prompt, api_key, model_name, config=config, caller=caller)
+
+
+def generate_content_stream(prompt, api_key: str, model_name: str, config: Any = None, caller: str = "default") -> Iterator[Any]:
+    """Raccourci : appel Gemini streamé via la passerelle partagée."""
+    return get_llm_gateway().generate_content_stream(prompt, api_key, model_name, config=config, caller=caller)
+
+
+def get_llm_gateway_stats() -> Dict[str, Any]:
+    return get_llm_gateway().stats()
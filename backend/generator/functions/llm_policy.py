@@ -0,0 +1,181 @@
+"""
+llm_policy.py
+
+Politique d'appel des requêtes Gemini, appliquée par la passerelle
+(llm_gateway.py) :
+
+- Reprise avec backoff exponentiel et jitter complet sur les erreurs
+  transitoires (429, 5xx, coupures réseau, délais dépassés) : l'attente avant
+  la tentative n est tirée uniformément dans [0, min(max, base * 2^n)].
+- Hedging optionnel (LLM_HEDGE=1) : si la réponse tarde au-delà du p95 des
+  latences récentes du même (module, modèle), une requête identique est
+  envoyée en parallèle et la première réponse valide l'emporte.
+- Budget de temps par endpoint (llm_budget) : les appels faits pendant la
+  requête HTTP ne dépassent pas l'échéance (délai HTTP par tentative réduit,
+  pas de nouvelle tentative si l'attente dépasserait le budget).
+- Limite de débit par clé API (TokenBucket) : au-delà, les requêtes sont
+  mises en file d'attente plutôt que rejetées.
+"""
+
+import os
+import time
+import random
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+import httpx
+from google.genai import errors as genai_errors
+from google.genai import types
+
+# Tentatives au total (1 = pas de reprise, au moins 1) et bornes du backoff (ms)
+LLM_RETRY_MAX_ATTEMPTS = max(1, int(os.getenv("LLM_RETRY_MAX_ATTEMPTS", "3")))
+LLM_RETRY_BASE_MS = float(os.getenv("LLM_RETRY_BASE_MS", "250"))
+LLM_RETRY_MAX_MS = float(os.getenv("LLM_RETRY_MAX_MS", "4000"))
+
+# Hedging : désactivé par défaut (double le coût des requêtes lentes)
+LLM_HEDGE = os.getenv("LLM_HEDGE", "0") == "1"
+# Délai avant la requête de secours : p95 récent, borné, ou valeur par défaut
+# tant que l'historique compte moins de LLM_HEDGE_MIN_SAMPLES appels
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_DEFAULT_DELAY_MS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_MS", "5000"))
+LLM_HEDGE_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "300"))
+
+# Débit par clé API (requêtes par minute, 0 = illimité) et rafale autorisée
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", "60"))
+LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+
+# Statuts HTTP qui justifient une nouvelle tentative
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Budgets par endpoint (ms), surchargeables par LLM_ENDPOINT_BUDGETS_MS :
+# "generate-cover-letter=45000,score-application=15000"
+DEFAULT_ENDPOINT_BUDGETS_MS = {
+    "generate-cv": 60000,
+    "generate-cover-letter": 60000,
+    "score-application": 30000,
+    "score-application-batch": 90000,
+    "parse-job": 30000,
+    "parse-cv-upload": 45000,
+}
+
+
+def _parse_budgets(value: str) -> dict:
+    budgets = dict(DEFAULT_ENDPOINT_BUDGETS_MS)
+    for item in value.split(","):
+        if "=" in item:
+            name, ms = item.split("=", 1)
+            budgets[name.strip()] = float(ms)
+    return budgets
+
+
+ENDPOINT_BUDGETS_MS = _parse_budgets(os.getenv("LLM_ENDPOINT_BUDGETS_MS", ""))
+
+# Échéance (time.monotonic) de la requête en cours, None = pas de budget
+_deadline: ContextVar[Optional[float]] = ContextVar("llm_deadline", default=None)
+
+
+class LLMBudgetExceeded(TimeoutError):
+    """Le budget de temps de l'endpoint est épuisé."""
+
+
+@contextmanager
+def llm_budget(endpoint: str, budget_ms: Optional[float] = None):
+    """
+    Limite la durée cumulée des appels Gemini faits dans le bloc (contexte
+    asyncio ou thread courant). Un budget imbriqué ne peut pas allonger
+    l'échéance déjà en place.
+    """
+    budget_ms = ENDPOINT_BUDGETS_MS.get(endpoint) if budget_ms is None else budget_ms
+    if not budget_ms:
+        yield
+        return
+    deadline = time.monotonic() + budget_ms / 1000
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_seconds() -> Optional[float]:
+    """Temps restant avant l'échéance du budget courant (None = illimité)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def is_retryable(error: Exception) -> bool:
+    """Erreur transitoire : quota, erreur serveur, réseau ou délai dépassé."""
+    if isinstance(error, LLMBudgetExceeded):
+        return False
+    if isinstance(error, genai_errors.APIError):
+        return error.code in RETRYABLE_STATUS
+    return isinstance(error, (httpx.TransportError, TimeoutError))
+
+
+def backoff_seconds(attempt: int) -> float:
+    """Attente avant la reprise n° `attempt` (0 = première reprise), jitter complet."""
+    return random.uniform(0, min(LLM_RETRY_MAX_MS, LLM_RETRY_BASE_MS * (2 ** attempt))) / 1000
+
+
+def hedge_delay_seconds(p95_ms: Optional[float], samples: int) -> float:
+    """Délai avant la requête de secours, d'après le p95 des latences récentes."""
+    if p95_ms is None or samples < LLM_HEDGE_MIN_SAMPLES:
+        return LLM_HEDGE_DEFAULT_DELAY_MS / 1000
+    return max(LLM_HEDGE_MIN_DELAY_MS, p95_ms) / 1000
+
+
+def with_timeout(config, timeout_s: Optional[float]):
+    """
+    Config de l'appel avec un délai HTTP (ms) ne dépassant pas le budget
+    restant ; la config d'origine n'est pas modifiée.
+    """
+    if timeout_s is None:
+        return config
+    http_options = types.HttpOptions(timeout=max(1, int(timeout_s * 1000)))
+    if config is None:
+        return types.GenerateContentConfig(http_options=http_options)
+    if isinstance(config, dict):
+        return {**config, "http_options": http_options}
+    return config.model_copy(update={"http_options": http_options})
+
+
+class TokenBucket:
+    """
+    Seau à jetons d'une clé API : `burst` requêtes immédiates, puis
+    `per_minute` requêtes par minute. reserve() prend un jeton (le solde
+    peut devenir négatif) et retourne l'attente avant de pouvoir envoyer la
+    requête : les appelants sont servis dans l'ordre d'arrivée, sans échec.
+    """
+
+    def __init__(self, per_minute: float = LLM_RATE_LIMIT_PER_MINUTE, burst: int = LLM_RATE_LIMIT_BURST):
+        self.rate = per_minute / 60
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.queued = 0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Prend un jeton ; retourne l'attente (secondes) avant l'envoi."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def release(self):
+        """Rend un jeton réservé mais inutilisé (requête abandonnée)."""
+        with self._lock:
+            self.tokens = min(self.burst, self.tokens + 1)
+
+    def enter_queue(self):
+        with self._lock:
+            self.queued += 1
+
+    def leave_queue(self):
+        with self._lock:
+            self.queued -= 1
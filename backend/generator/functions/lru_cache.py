@@ -0,0 +1,107 @@
+"""
+lru_cache.py
+
+Cache LRU en mémoire, thread-safe, avec expiration (TTL) et plafond mémoire.
+"""
+
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Cache LRU borné en nombre d'entrées et en octets, avec TTL optionnel.
+
+    Args:
+        max_entries (int): Nombre maximum d'entrées.
+        max_bytes (int): Taille maximale estimée (0 = pas de plafond).
+        ttl (float): Durée de vie d'une entrée en secondes (0 = pas d'expiration).
+        sizeof (callable): Estimation de la taille d'une valeur en octets
+            (défaut : nbytes pour les tableaux NumPy, sinon sys.getsizeof).
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 0, ttl: float = 0, sizeof=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof or _default_sizeof
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, size, expires_at = entry
+            if expires_at and expires_at < time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        size = self._sizeof(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes and size > self.max_bytes:
+                return
+            expires_at = time.monotonic() + self.ttl if self.ttl else 0
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def pop(self, key) -> bool:
+        """Invalide une entrée. Retourne True si elle existait."""
+        with self._lock:
+            if key not in self._data:
+                return False
+            self._remove(key)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def _default_sizeof(value) -> int:
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        # Tableau NumPy : données + en-tête de l'objet
+        return int(nbytes) + 112
+    return sys.getsizeof(value)
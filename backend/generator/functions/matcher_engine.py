@@ -5,9 +5,22 @@ Moteur de matching NLP utilisant spaCy et Scikit-Learn.
 Ce module est indépendant de l'API Gemini et fonctionne en local.
 """
 
+import os
+import re
+import json
+import time
+import hashlib
+import atexit
+import threading
+import multiprocessing
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 try:
     import spacy
-    import spacy.cli
     import numpy as np
     from sklearn.metrics.pairwise import cosine_similarity
     from sklearn.feature_extraction.text import CountVectorizer
@@ -17,26 +30,405 @@ except ImportError:
     cosine_similarity = None
     CountVectorizer = None
 
+try:
+    import fcntl
+except ImportError:
+    # Windows : pas de verrou inter-processus (un seul worker attendu)
+    fcntl = None
+
+# Imports robustes (gère l'exécution directe ou via package)
+try:
+    from .vector_store import OfferVectorStore, content_key
+    from .ann_index import IVFIndex
+    from .bm25_index import BM25Index, term_counts
+    from .lru_cache import LRUCache
+    from .score_cache import get_score_cache, GENERATOR_DATA_DIR
+    from .quantization import check_dtype, quantize_rows, quantized_scores
+    from .skill_vocabulary import canonicalize_skills
+    from .skill_extractor import get_gazetteer_version
+except ImportError:
+    from vector_store import OfferVectorStore, content_key
+    from ann_index import IVFIndex
+    from bm25_index import BM25Index, term_counts
+    from lru_cache import LRUCache
+    from score_cache import get_score_cache, GENERATOR_DATA_DIR
+    from quantization import check_dtype, quantize_rows, quantized_scores
+    from skill_vocabulary import canonicalize_skills
+    from skill_extractor import get_gazetteer_version
+
 # ============================================================================
 # MOTEUR NLP (RESUME MATCHER) - SPA CY & SCIKIT-LEARN
 # ============================================================================
 
+# Nom du paquet (ou chemin) du modèle spaCy
+SPACY_MODEL = os.getenv("SPACY_MODEL", "fr_core_news_sm")
+
 _nlp_model = None
+_vector_disabled_pipes = None
+_model_lock = threading.Lock()
+
+# Après un échec de chargement du modèle, nouvel essai après ce délai (secondes)
+SPACY_RETRY_SECONDS = float(os.getenv("SPACY_RETRY_SECONDS", "30"))
+_model_failed_at = None
+
+# État du moteur exposé par le endpoint de readiness
+_engine_state = {
+    "status": "cold",  # cold | loading | warm | error
+    "model": SPACY_MODEL,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "error": None,
+}
+
+# Taille des lots envoyés à nlp.pipe lors de la vectorisation des offres
+DEFAULT_BATCH_SIZE = int(os.getenv("MATCHER_BATCH_SIZE", "64"))
+
+# Composants inutiles à la lemmatisation (le lemmatizer français n'a besoin
+# que du morphologizer)
+_LEMMA_UNNEEDED_PIPES = ("parser", "ner", "senter")
+
+# Composants qui remplissent doc.tensor (utilisé par doc.vector quand le modèle
+# n'embarque pas de word vectors, comme fr_core_news_sm)
+_TENSOR_PIPES = ("tok2vec",)
+
+# Textes longs (offre ou CV de 30 pages collés) : au-delà de MATCHER_CHUNK_CHARS
+# caractères, le texte est découpé en fenêtres de phrases traitées en lot ; au-delà
+# de MATCHER_MAX_TEXT_CHARS, il est tronqué. MATCHER_TEXT_BUDGET_MS borne le temps
+# passé par lot de MATCHER_BATCH_SIZE textes : une fois dépassé, seule la première
+# fenêtre des textes suivants est traitée (0 = pas de budget). Ces vecteurs partiels
+# ne sont ni persistés ni mis en cache, et l'indexation n'applique pas de budget.
+MAX_TEXT_CHARS = int(os.getenv("MATCHER_MAX_TEXT_CHARS", "20000"))
+CHUNK_CHARS = int(os.getenv("MATCHER_CHUNK_CHARS", "2000"))
+TEXT_BUDGET_MS = float(os.getenv("MATCHER_TEXT_BUDGET_MS", "1000"))
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?;])\s+|\n+")
+
+# Pool de processus pour les très gros lots : spaCy garde le GIL, un seul
+# cœur travaille sinon. En dessous du seuil, la vectorisation reste locale.
+POOL_THRESHOLD = int(os.getenv("MATCHER_POOL_THRESHOLD", "512"))
+POOL_WORKERS = int(os.getenv("MATCHER_POOL_WORKERS", str(max(1, (os.cpu_count() or 1) - 1))))
+_pool = None
+_pool_lock = threading.Lock()
+
+# Démarrage du pool pendant le warm-up (sinon au premier gros lot)
+POOL_WARMUP = os.getenv("MATCHER_POOL_WARMUP", "0") == "1"
+
+# Révision du moteur : à incrémenter si le calcul des vecteurs change
+# (invalide le magasin de vecteurs persistant)
+ENGINE_REVISION = "3"
+
+# Magasin persistant des vecteurs d'offres (chaîne vide pour le désactiver)
+OFFER_VECTOR_STORE_DIR = os.getenv("OFFER_VECTOR_STORE_DIR", os.path.join(GENERATOR_DATA_DIR, "vector_store"))
+# Après un échec d'ouverture, nouvel essai après ce délai (secondes, 0 = jamais)
+OFFER_VECTOR_STORE_RETRY_SECONDS = float(os.getenv("OFFER_VECTOR_STORE_RETRY_SECONDS", "0"))
+# Nombre maximum de vecteurs sur disque (0 = pas de borne) : au-delà, compactage
+# (cf. vector_store.py)
+OFFER_VECTOR_STORE_MAX_VECTORS = int(os.getenv("OFFER_VECTOR_STORE_MAX_VECTORS", "200000"))
+_offer_store = None
+_offer_store_failed_at = None
+
+# Index ANN du corpus d'offres ingérées (persisté si OFFER_INDEX_PATH est défini,
+# et rechargé par chaque worker quand le fichier change)
+OFFER_INDEX_PATH = os.getenv("OFFER_INDEX_PATH", "")
+OFFER_INDEX_N_PROBE = int(os.getenv("OFFER_INDEX_N_PROBE", "8"))
+OFFER_INDEX_FILTER_FIELDS = ("contract_type", "location", "company", "niveau", "famille", "secteur")
+_offer_index = None
+_offer_index_version = None
+_offer_index_lock = threading.Lock()
+
+# Stockage des vecteurs en mémoire (index d'offres, matrice des profils) :
+# float32, float16 ou int8 avec échelle par ligne (cf. quantization.py)
+VECTOR_DTYPE = check_dtype(os.getenv("MATCHER_VECTOR_DTYPE", "float32"))
+
+# Index BM25 des offres (moteur lexical, alimenté au fil des requêtes, borné par
+# éviction LRU). Un score BM25 s est ramené entre 0 et 1 par s / (s + saturation).
+# idf et longueur moyenne viennent des offres vues par ce worker : les scores ne
+# sont comparables qu'au sein d'une même réponse (cf. bm25_index.py).
+BM25_MAX_DOCS = int(os.getenv("MATCHER_BM25_MAX_DOCS", "50000"))
+BM25_SATURATION = float(os.getenv("MATCHER_BM25_SATURATION", "10"))
+_bm25_index = BM25Index(max_docs=BM25_MAX_DOCS)
+
+# Moteurs de scoring sélectionnables par requête
+ENGINES = ("spacy", "bm25")
+
+# Analyse des mots-clés manquants : stop words, analyseur et vocabulaire partagés
+NGRAM_CACHE_SIZE = int(os.getenv("KEYWORD_CACHE_SIZE", "4096"))
+NGRAM_VOCAB_MAX = int(os.getenv("KEYWORD_VOCAB_MAX", "500000"))
+_stop_words = None
+_ngram_analyzer = None
+_ngram_vocabulary = None
+
+# Cache des vecteurs de CV (le profil change rarement entre deux swipes)
+_profile_vector_cache = LRUCache(
+    max_entries=int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("PROFILE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    ttl=float(os.getenv("PROFILE_CACHE_TTL", "3600")),
+)
+_profile_cache_keys = {}  # profile_id -> clé courante, pour invalider à l'édition
+_profile_cache_lock = threading.Lock()
+
+# Matrice des vecteurs de profils (matching inverse offre -> profils), persistée
+# dans PROFILE_MATRIX_PATH et rechargée par chaque worker quand le fichier
+# change. Chaîne vide : matrice en mémoire, propre au processus (un seul
+# worker uvicorn, perdue au redémarrage).
+PROFILE_MATRIX_PATH = os.getenv("PROFILE_MATRIX_PATH", os.path.join(GENERATOR_DATA_DIR, "profile_matrix.npz"))
+_profile_matrix = None
+_profile_matrix_version = None
+_profile_lock = threading.Lock()
+
+# Statistiques cumulées de la vectorisation par lots
+_vectorize_stats = {
+    "batches": 0,
+    "pooled_batches": 0,
+    "texts": 0,
+    "seconds": 0.0,
+    "last_batch_size": 0,
+    "last_offers_per_sec": 0.0,
+    "chunked_texts": 0,
+    "truncated_texts": 0,
+    "budget_skipped_chunks": 0,
+    "pool_restarts": 0,
+}
 
 def _get_spacy_model():
-    """Charge le modèle spaCy en mémoire (singleton)."""
-    global _nlp_model
-    if _nlp_model is None and spacy is not None:
-        try:
-            # Tente de charger le modèle, sinon essaie de le télécharger
-            if not spacy.util.is_package("fr_core_news_sm"):
-                print("[INFO] Modèle 'fr_core_news_sm' introuvable. Tentative de téléchargement...")
-                spacy.cli.download("fr_core_news_sm")
-            _nlp_model = spacy.load("fr_core_news_sm")
-        except Exception as e:
-            print(f"[ERROR] Impossible de charger spaCy 'fr_core_news_sm': {e}")
+    """
+    Charge le modèle spaCy en mémoire (singleton, protégé par un verrou pour
+    que des requêtes simultanées ne le chargent pas deux fois).
+    Aucun téléchargement n'est tenté ici : le modèle doit être installé au
+    déploiement (python -m spacy download fr_core_news_sm). Après un échec,
+    le chargement est retenté au plus toutes les SPACY_RETRY_SECONDS
+    (modèle installé après le démarrage, erreur passagère).
+    """
+    global _nlp_model, _model_failed_at
+    if _nlp_model is not None or spacy is None:
+        return _nlp_model
+    if _model_failed_at is not None and time.monotonic() - _model_failed_at < SPACY_RETRY_SECONDS:
+        return None
+    with _model_lock:
+        retry_due = _model_failed_at is None or time.monotonic() - _model_failed_at >= SPACY_RETRY_SECONDS
+        if _nlp_model is None and retry_due:
+            _engine_state["status"] = "loading"
+            start = time.perf_counter()
+            try:
+                _nlp_model = spacy.load(SPACY_MODEL)
+                _engine_state["load_seconds"] = round(time.perf_counter() - start, 3)
+                _engine_state["status"] = "cold"
+                _engine_state["error"] = None
+                _model_failed_at = None
+            except Exception as e:
+                _model_failed_at = time.monotonic()
+                _engine_state["status"] = "error"
+                _engine_state["error"] = str(e)
+                print(f"[ERROR] Impossible de charger spaCy '{SPACY_MODEL}' (nouvel essai dans {SPACY_RETRY_SECONDS:.0f} s) : {e}")
+                print(f"[ERROR] Installez le modèle au déploiement : python -m spacy download {SPACY_MODEL}")
     return _nlp_model
 
+def warm_up(warm_pool: bool = False) -> dict:
+    """
+    Prépare le moteur avant d'accepter du trafic : chargement du modèle,
+    première inférence (initialisations paresseuses de spaCy), ouverture du
+    magasin de vecteurs et de l'index d'offres, et éventuellement démarrage
+    du pool de processus.
+    
+    Returns:
+        dict: L'état du moteur (cf. get_readiness).
+    """
+    start = time.perf_counter()
+    nlp = _get_spacy_model()
+    if nlp is None:
+        if spacy is None:
+            _engine_state["status"] = "error"
+            _engine_state["error"] = "spaCy n'est pas installé"
+        return get_readiness()
+
+    vectorize_text_spacy("Développeur Python en alternance, équipe data.")
+    preprocess_text_spacy("Développeur Python en alternance.")
+    _get_offer_store()
+    try:
+        _get_offer_index()
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Index d'offres illisible ({OFFER_INDEX_PATH}) : {e}")
+    if warm_pool:
+        pool = _get_pool()
+        if pool is not None:
+            # Une tâche par worker : chacun charge son modèle maintenant
+            try:
+                list(pool.map(_pool_vectorize, [["offre"]] * POOL_WORKERS, [1] * POOL_WORKERS))
+            except BrokenProcessPool as e:
+                print(f"[WARN] Pool de vectorisation cassé pendant le warm-up : {e}")
+                _reset_pool(pool)
+
+    _engine_state["warmup_seconds"] = round(time.perf_counter() - start, 3)
+    _engine_state["status"] = "warm"
+    return get_readiness()
+
+def get_readiness() -> dict:
+    """
+    État du moteur : cold / loading / warm / error, temps de chargement.
+    """
+    return {**_engine_state, "ready": _engine_state["status"] == "warm"}
+
+def _get_vector_disabled_pipes(nlp) -> list[str]:
+    """
+    Liste des composants inutiles au calcul de doc.vector.
+    - Modèle avec word vectors (md/lg) : doc.vector = moyenne des vecteurs statiques,
+      aucun composant n'est nécessaire.
+    - Modèle sans word vectors (sm) : doc.vector = moyenne de doc.tensor, seul
+      le tok2vec est conservé (parser, NER, lemmatizer... sont désactivés).
+    """
+    global _vector_disabled_pipes
+    if _vector_disabled_pipes is None:
+        if nlp.vocab.vectors.size > 0:
+            _vector_disabled_pipes = list(nlp.pipe_names)
+        else:
+            _vector_disabled_pipes = [name for name in nlp.pipe_names if name not in _TENSOR_PIPES]
+    return _vector_disabled_pipes
+
+def get_engine_version() -> str:
+    """
+    Version du moteur de vectorisation (modèle spaCy + révision du code).
+    """
+    nlp = _get_spacy_model()
+    if not nlp:
+        return f"none-r{ENGINE_REVISION}"
+    return f"{nlp.meta.get('lang', 'xx')}_{nlp.meta.get('name', 'model')}-{nlp.meta.get('version', '0')}-r{ENGINE_REVISION}"
+
+def _get_offer_store():
+    """
+    Ouvre le magasin de vecteurs d'offres (singleton), None s'il est désactivé.
+    Un échec d'ouverture est mémorisé : pas de nouvel essai avant
+    OFFER_VECTOR_STORE_RETRY_SECONDS (jamais si 0).
+    """
+    global _offer_store, _offer_store_failed_at
+    if _offer_store is not None or not OFFER_VECTOR_STORE_DIR or np is None:
+        return _offer_store
+    if _offer_store_failed_at is not None and (
+        OFFER_VECTOR_STORE_RETRY_SECONDS <= 0
+        or time.monotonic() - _offer_store_failed_at < OFFER_VECTOR_STORE_RETRY_SECONDS
+    ):
+        return None
+    probe = vectorize_text_spacy("offre")
+    if probe is None:
+        return None
+    try:
+        _offer_store = OfferVectorStore(
+            OFFER_VECTOR_STORE_DIR, get_engine_version(), dim=probe.shape[0], max_rows=OFFER_VECTOR_STORE_MAX_VECTORS
+        )
+        _offer_store_failed_at = None
+    except (OSError, ValueError) as e:
+        _offer_store_failed_at = time.monotonic()
+        print(f"[WARN] Magasin de vecteurs indisponible ({OFFER_VECTOR_STORE_DIR}) : {e}")
+    return _offer_store
+
+def _clean_tokens(doc) -> list[str]:
+    # Filtrage : pas de stop words, pas de ponctuation, pas d'espaces
+    # (forme minuscule si le modèle n'a pas de lemmatizer)
+    return [
+        token.lemma_ or token.lower_ for token in doc 
+        if not token.is_stop and not token.is_punct and not token.is_space
+    ]
+
+def _split_text(text: str) -> list[str]:
+    """
+    Découpe un texte long en fenêtres de phrases consécutives d'au plus
+    MATCHER_CHUNK_CHARS caractères, après troncature à MATCHER_MAX_TEXT_CHARS.
+    Un texte court est renvoyé tel quel (une seule fenêtre).
+    """
+    if MAX_TEXT_CHARS and len(text) > MAX_TEXT_CHARS:
+        cut = text.rfind(" ", 0, MAX_TEXT_CHARS)
+        text = text[:cut if cut > 0 else MAX_TEXT_CHARS]
+        _vectorize_stats["truncated_texts"] += 1
+    if not CHUNK_CHARS or len(text) <= CHUNK_CHARS:
+        return [text]
+
+    sentences = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        # Phrase plus longue qu'une fenêtre (liste sans ponctuation...) : coupe aux espaces
+        while len(sentence) > CHUNK_CHARS:
+            cut = sentence.rfind(" ", 0, CHUNK_CHARS)
+            cut = cut if cut > 0 else CHUNK_CHARS
+            sentences.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if sentence:
+            sentences.append(sentence)
+
+    windows = []
+    current = ""
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > CHUNK_CHARS:
+            windows.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        windows.append(current)
+    _vectorize_stats["chunked_texts"] += 1
+    return windows or [text[:CHUNK_CHARS]]
+
+def _pipe_chunked(nlp, texts: list[str], batch_size: int, disable: list[str], partial: set = None, budget: bool = True):
+    """
+    Passe des textes non vides dans nlp.pipe, les textes longs étant découpés
+    en fenêtres (cf. _split_text), toutes traitées dans le même flux de lots.
+    Passé le budget de temps (si `budget`), seule la première fenêtre des
+    textes restants est traitée et leur indice est ajouté à `partial`.
+    
+    Yields:
+        tuple[int, Doc]: (indice du texte, doc de la fenêtre), dans l'ordre.
+    """
+    n_batches = -(-len(texts) // batch_size)
+    deadline = time.perf_counter() + TEXT_BUDGET_MS / 1000 * n_batches if budget and TEXT_BUDGET_MS > 0 else None
+    owners = []
+
+    def windows():
+        for i, text in enumerate(texts):
+            chunks = _split_text(text)
+            for j, chunk in enumerate(chunks):
+                if j and deadline is not None and time.perf_counter() > deadline:
+                    _vectorize_stats["budget_skipped_chunks"] += len(chunks) - j
+                    if partial is not None:
+                        partial.add(i)
+                    break
+                owners.append(i)
+                yield chunk
+
+    # nlp.pipe consomme le générateur avant de rendre les docs : owners[k] est connu
+    for k, doc in enumerate(nlp.pipe(windows(), batch_size=batch_size, disable=disable)):
+        yield owners[k], doc
+
+def _chunked_vectors(nlp, texts: list[str], batch_size: int, partial: set = None, budget: bool = True) -> list:
+    """
+    Vecteurs de textes non vides. Les vecteurs des fenêtres d'un texte long sont
+    moyennés avec une pondération par leur nombre de tokens (doc.vector étant
+    une moyenne par token, on retrouve le vecteur du texte entier).
+    Les indices des textes tronqués par le budget sont ajoutés à `partial`.
+    """
+    parts = [[] for _ in texts]
+    for i, doc in _pipe_chunked(nlp, texts, batch_size, _get_vector_disabled_pipes(nlp), partial, budget):
+        parts[i].append((doc.vector, len(doc)))
+
+    vectors = []
+    for chunks in parts:
+        if len(chunks) == 1:
+            vectors.append(chunks[0][0])
+            continue
+        weights = [length for _, length in chunks]
+        if not sum(weights):
+            vectors.append(chunks[0][0])
+            continue
+        vectors.append(np.average([vec for vec, _ in chunks], axis=0, weights=weights).astype(chunks[0][0].dtype))
+    return vectors
+
+def _chunked_tokens(nlp, texts: list[str], batch_size: int, partial: set = None) -> list[list[str]]:
+    """
+    Lemmes nettoyés de textes non vides (fenêtres concaténées dans l'ordre).
+    Les indices des textes tronqués par le budget sont ajoutés à `partial`.
+    """
+    tokens = [[] for _ in texts]
+    disable = [name for name in _LEMMA_UNNEEDED_PIPES if name in nlp.pipe_names]
+    for i, doc in _pipe_chunked(nlp, [text.lower() for text in texts], batch_size, disable, partial):
+        tokens[i].extend(_clean_tokens(doc))
+    return tokens
+
 def preprocess_text_spacy(text: str) -> list[str]:
     """
     1. FONCTION PREPROCESS
@@ -44,6 +436,7 @@ def preprocess_text_spacy(text: str) -> list[str]:
     - Mise en minuscule
     - Retrait de la ponctuation et des stop words
     - Lemmatisation
+    Les textes longs sont traités par fenêtres de phrases (cf. _split_text).
     
     Args:
         text (str): Le texte brut (CV ou Offre).
@@ -55,21 +448,35 @@ def preprocess_text_spacy(text: str) -> list[str]:
     if not nlp or not text:
         return []
     
-    doc = nlp(text.lower())
-    
-    # Filtrage : pas de stop words, pas de ponctuation, pas d'espaces
-    clean_tokens = [
-        token.lemma_ for token in doc 
-        if not token.is_stop and not token.is_punct and not token.is_space
-    ]
-    
-    return clean_tokens
+    return _chunked_tokens(nlp, [text], DEFAULT_BATCH_SIZE)[0]
+
+def preprocess_texts_spacy(texts: list[str], batch_size: int = None, partial: set = None) -> list[list[str]]:
+    """
+    1b. FONCTION PREPROCESS (PAR LOTS)
+    Comme preprocess_text_spacy, en un seul passage nlp.pipe. Les indices des
+    textes dont des fenêtres ont été ignorées (budget) sont ajoutés à `partial`.
+    """
+    nlp = _get_spacy_model()
+    tokens = [[] for _ in texts]
+    positions = [i for i, text in enumerate(texts) if text]
+    if not nlp or not positions:
+        return tokens
+
+    skipped = set()
+    results = _chunked_tokens(nlp, [texts[i] for i in positions], batch_size or DEFAULT_BATCH_SIZE, skipped)
+    for i, doc_tokens in zip(positions, results):
+        tokens[i] = doc_tokens
+    if partial is not None:
+        partial.update(positions[j] for j in skipped)
+    return tokens
 
 def vectorize_text_spacy(text: str):
     """
     2. FONCTION VECTORIZE
     Prend le texte et retourne le "Document Vector".
     Ce vecteur est la moyenne des embeddings de chaque mot (word vectors fournis par spaCy).
+    Les textes longs sont vectorisés par fenêtres de phrases, dont les vecteurs
+    sont moyennés (pondérés par leur longueur) : latence et mémoire bornées.
     
     Args:
         text (str): Le texte brut.
@@ -81,9 +488,185 @@ def vectorize_text_spacy(text: str):
     if not nlp or not text:
         return None
         
-    doc = nlp(text)
-    # doc.vector est une propriété de spaCy qui retourne la moyenne des vecteurs des mots
-    return doc.vector
+    return _chunked_vectors(nlp, [text], DEFAULT_BATCH_SIZE)[0]
+
+def vectorize_texts_spacy(texts: list[str], batch_size: int = None, partial: set = None, budget: bool = True) -> list:
+    """
+    2b. FONCTION VECTORIZE (PAR LOTS)
+    Vectorise une liste de textes en un seul passage via nlp.pipe, avec le
+    pipeline réduit aux seuls composants nécessaires à doc.vector (les textes
+    longs sont découpés en fenêtres, cf. vectorize_text_spacy).
+    Au-delà de MATCHER_POOL_THRESHOLD textes, le lot est réparti sur un pool
+    de processus persistant (résultats réassemblés dans l'ordre).
+    Met à jour les statistiques de débit (offres/s) consultables via
+    get_vectorization_stats().
+    
+    Args:
+        texts (list[str]): Les textes bruts.
+        batch_size (int): Taille des lots passés à nlp.pipe (défaut : MATCHER_BATCH_SIZE).
+        partial (set): Reçoit les indices des textes dont des fenêtres ont été
+            ignorées faute de budget (vecteur partiel, à ne pas persister).
+        budget (bool): Applique MATCHER_TEXT_BUDGET_MS (False pour l'indexation).
+        
+    Returns:
+        list[numpy.ndarray | None]: Un vecteur par texte, dans le même ordre
+        (None pour les textes vides ou si le modèle est indisponible).
+    """
+    nlp = _get_spacy_model()
+    vectors = [None] * len(texts)
+    if not nlp:
+        return vectors
+
+    # On ne passe à spaCy que les textes non vides, en gardant leur position
+    positions = [i for i, text in enumerate(texts) if text]
+    if not positions:
+        return vectors
+
+    start = time.perf_counter()
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    skipped = set()
+    pool = _get_pool() if len(positions) >= POOL_THRESHOLD else None
+    results = None
+    if pool is not None:
+        # Découpage en parts contiguës, map() rend les résultats dans l'ordre
+        n_shards = POOL_WORKERS * 2
+        shard_size = -(-len(positions) // n_shards)
+        shards = [positions[i:i + shard_size] for i in range(0, len(positions), shard_size)]
+        try:
+            results = list(pool.map(
+                _pool_vectorize,
+                [[texts[i] for i in shard] for shard in shards],
+                [batch_size] * len(shards),
+                [budget] * len(shards),
+            ))
+        except BrokenProcessPool as e:
+            # Worker tué (OOM, crash du modèle) : pool recréé au prochain gros
+            # lot, celui-ci est vectorisé dans le processus
+            print(f"[WARN] Pool de vectorisation cassé, repli local : {e}")
+            _reset_pool(pool)
+    if results is not None:
+        for shard, (shard_vectors, shard_skipped) in zip(shards, results):
+            for i, vec in zip(shard, shard_vectors):
+                vectors[i] = vec
+            skipped.update(shard[j] for j in shard_skipped)
+        _vectorize_stats["pooled_batches"] += 1
+    else:
+        local_skipped = set()
+        for i, vec in zip(positions, _chunked_vectors(nlp, [texts[i] for i in positions], batch_size, local_skipped, budget)):
+            vectors[i] = vec
+        skipped.update(positions[j] for j in local_skipped)
+    elapsed = time.perf_counter() - start
+    if partial is not None:
+        partial.update(skipped)
+
+    _vectorize_stats["batches"] += 1
+    _vectorize_stats["texts"] += len(positions)
+    _vectorize_stats["seconds"] += elapsed
+    _vectorize_stats["last_batch_size"] = len(positions)
+    _vectorize_stats["last_offers_per_sec"] = round(len(positions) / elapsed, 1) if elapsed > 0 else 0.0
+    return vectors
+
+def _get_pool():
+    """
+    Pool de processus persistant (singleton), None si désactivé (MATCHER_POOL_WORKERS <= 1).
+    Les workers sont lancés en 'spawn' (sûr avec les threads d'uvicorn) et
+    chargent chacun le modèle spaCy une fois pour toutes.
+    """
+    global _pool
+    if POOL_WORKERS <= 1:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_get_spacy_model,
+            )
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+def _reset_pool(pool):
+    """
+    Abandonne un pool cassé (BrokenProcessPool) : le prochain appel à
+    _get_pool en crée un nouveau.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _vectorize_stats["pool_restarts"] += 1
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def _pool_vectorize(texts: list[str], batch_size: int, budget: bool = True) -> tuple[list, list[int]]:
+    """
+    Tâche exécutée dans un worker du pool : vectorise une part du lot.
+    Retourne aussi les indices (dans la part) des vecteurs partiels.
+    """
+    nlp = _get_spacy_model()
+    if not nlp:
+        return [None] * len(texts), []
+    skipped = set()
+    vectors = _chunked_vectors(nlp, texts, batch_size, skipped, budget)
+    return vectors, sorted(skipped)
+
+def vectorize_offers_cached(texts: list[str], batch_size: int = None, partial: set = None, budget: bool = True) -> list:
+    """
+    Vectorise des textes d'offres en passant par le magasin persistant :
+    seules les offres jamais vues sont envoyées à spaCy, puis enregistrées
+    (sauf les vecteurs partiels, tronqués par le budget de temps).
+    
+    Args:
+        texts (list[str]): Les textes des offres.
+        batch_size (int): Taille des lots spaCy (défaut : MATCHER_BATCH_SIZE).
+        partial (set): Reçoit les indices des vecteurs partiels (cf. vectorize_texts_spacy).
+        budget (bool): Applique MATCHER_TEXT_BUDGET_MS (False pour l'indexation).
+        
+    Returns:
+        list[numpy.ndarray | None]: Un vecteur par texte, dans le même ordre.
+    """
+    store = _get_offer_store()
+    if store is None:
+        return vectorize_texts_spacy(texts, batch_size=batch_size, partial=partial, budget=budget)
+
+    version = store.engine_version
+    keys = [content_key(text, version) if text else None for text in texts]
+    found = store.get_many(list({key for key in keys if key}))
+
+    vectors = [found.get(key) if key else None for key in keys]
+    missing = [i for i, key in enumerate(keys) if key and key not in found]
+    if missing:
+        skipped = set()
+        computed = vectorize_texts_spacy([texts[i] for i in missing], batch_size=batch_size, partial=skipped, budget=budget)
+        new_vectors = {}
+        for j, (i, vec) in enumerate(zip(missing, computed)):
+            vectors[i] = vec
+            if j in skipped:
+                if partial is not None:
+                    partial.add(i)
+            elif vec is not None:
+                new_vectors[keys[i]] = vec
+        try:
+            store.add_many(new_vectors)
+        except OSError as e:
+            print(f"[WARN] Écriture du magasin de vecteurs impossible : {e}")
+    return vectors
+
+def get_offer_store_stats() -> dict:
+    """
+    Retourne les statistiques du magasin de vecteurs d'offres.
+    """
+    if _offer_store is None:
+        return {"enabled": bool(OFFER_VECTOR_STORE_DIR), "vectors": 0, "failed": _offer_store_failed_at is not None}
+    return {"enabled": True, **_offer_store.stats()}
+
+def get_vectorization_stats() -> dict:
+    """
+    Retourne les statistiques de débit de la vectorisation par lots.
+    """
+    stats = dict(_vectorize_stats)
+    stats["seconds"] = round(stats["seconds"], 3)
+    stats["avg_offers_per_sec"] = round(stats["texts"] / _vectorize_stats["seconds"], 1) if _vectorize_stats["seconds"] > 0 else 0.0
+    return stats
 
 def calculate_cosine_similarity_spacy(vec_a, vec_b) -> float:
     """
@@ -112,6 +695,260 @@ def calculate_cosine_similarity_spacy(vec_a, vec_b) -> float:
     # Retourne un float entre 0.0 et 1.0 arrondi à 2 décimales
     return round(float(max(0.0, min(1.0, similarity_score))), 2)
 
+def normalize_vectors(vectors):
+    """
+    Empile des vecteurs dans une matrice float32 et normalise chaque ligne (norme L2).
+    Les lignes nulles restent nulles (leur similarité vaudra 0).
+    
+    Args:
+        vectors (list[numpy.ndarray] | numpy.ndarray): Vecteurs de même dimension.
+        
+    Returns:
+        numpy.ndarray: Matrice (n, dim) float32 normalisée.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def cosine_scores(query_vec, normalized_matrix):
+    """
+    3b. FONCTION COSINE_SIMILARITY (VECTORISÉE)
+    Similarité cosinus entre un vecteur et toutes les lignes d'une matrice
+    déjà normalisée (cf. normalize_vectors), en un seul produit matriciel.
+    
+    Args:
+        query_vec (numpy.ndarray): Vecteur requête (CV ou offre), non normalisé.
+        normalized_matrix (numpy.ndarray): Matrice (n, dim) normalisée.
+        
+    Returns:
+        numpy.ndarray: Scores (n,) bornés entre 0.0 et 1.0.
+    """
+    query = normalize_vectors(query_vec)[0]
+    scores = normalized_matrix @ query
+    return np.clip(scores, 0.0, 1.0)
+
+def top_k_indices(scores, k: int = None):
+    """
+    Indices des k meilleurs scores, triés par score décroissant.
+    Utilise argpartition (O(n)) avant de ne trier que les k retenus.
+    """
+    n = len(scores)
+    if k is None or k >= n:
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+class VectorMatrix:
+    """
+    Matrice de vecteurs normalisés adressés par id, avec mise à jour en place.
+    La capacité double à chaque agrandissement pour amortir les ajouts, et une
+    suppression déplace la dernière ligne dans le trou (la matrice reste dense).
+    Les lignes sont stockées au format `dtype` (float32, float16 ou int8).
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024, dtype: str = "float32"):
+        self.dim = dim
+        self.dtype = check_dtype(dtype)
+        self._data, self._scales = quantize_rows(np.zeros((capacity, dim), dtype=np.float32), self.dtype)
+        self._ids = []
+        self._rows = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id) -> bool:
+        return item_id in self._rows
+
+    def upsert(self, ids: list, vectors):
+        """Ajoute ou remplace des vecteurs (normalisés puis quantifiés au passage)."""
+        if not len(ids):
+            return
+        block, scales = quantize_rows(normalize_vectors(vectors), self.dtype)
+        for i, item_id in enumerate(ids):
+            row = self._rows.get(item_id)
+            if row is None:
+                row = len(self._ids)
+                if row == len(self._data):
+                    self._grow()
+                self._ids.append(item_id)
+                self._rows[item_id] = row
+            self._data[row] = block[i]
+            if scales is not None:
+                self._scales[row] = scales[i]
+
+    def _grow(self):
+        rows = len(self._data)
+        grown = np.zeros((2 * rows, self.dim), dtype=self._data.dtype)
+        grown[:rows] = self._data
+        self._data = grown
+        if self._scales is not None:
+            self._scales = np.concatenate([self._scales, np.ones(rows, dtype=np.float32)])
+
+    def remove(self, ids: list):
+        """Supprime des vecteurs (les ids inconnus sont ignorés)."""
+        for item_id in ids:
+            row = self._rows.pop(item_id, None)
+            if row is None:
+                continue
+            last = len(self._ids) - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._data[row] = self._data[last]
+                if self._scales is not None:
+                    self._scales[row] = self._scales[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+
+    def top_k(self, query_vec, k: int = None) -> list[tuple]:
+        """[(id, score), ...] des k lignes les plus proches de query_vec (cosinus)."""
+        if not self._ids:
+            return []
+        n = len(self._ids)
+        query = normalize_vectors(query_vec)[0]
+        scales = None if self._scales is None else self._scales[:n]
+        scores = np.clip(quantized_scores(self._data[:n], scales, query), 0.0, 1.0)
+        return [(self._ids[i], round(float(scores[i]), 2)) for i in top_k_indices(scores, k)]
+
+    def nbytes(self) -> int:
+        """Mémoire occupée par les vecteurs (capacité comprise)."""
+        return int(self._data.nbytes + (0 if self._scales is None else self._scales.nbytes))
+
+    def save(self, path: str, version: str = ""):
+        """
+        Sauvegarde les lignes occupées (format .npz, sans pickle, écriture
+        atomique), avec la version du moteur qui a calculé les vecteurs.
+        Les ids entiers sont relus en int, tous les autres en str.
+        """
+        n = len(self._ids)
+        arrays = {
+            "version": np.array(version),
+            "data": self._data[:n],
+            "ids": np.array([str(i) for i in self._ids], dtype=str),
+            "int_ids": np.array([isinstance(i, (int, np.integer)) and not isinstance(i, bool) for i in self._ids], dtype=bool),
+            "dim": np.array(self.dim),
+            "dtype": np.array(self.dtype),
+        }
+        if self._scales is not None:
+            arrays["scales"] = self._scales[:n]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Nom temporaire propre à l'écriture : plusieurs processus peuvent sauvegarder
+        tmp_path = f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> tuple["VectorMatrix", str]:
+        """Relit une matrice sauvegardée. Retourne (matrice, version du moteur)."""
+        data = np.load(path, allow_pickle=False)
+        n = len(data["ids"])
+        matrix = cls(int(data["dim"]), capacity=max(n, 1), dtype=str(data["dtype"]))
+        matrix._data[:n] = data["data"]
+        if matrix._scales is not None and "scales" in data:
+            matrix._scales[:n] = data["scales"]
+        matrix._ids = [int(i) if is_int else i for i, is_int in zip(data["ids"].tolist(), data["int_ids"])]
+        matrix._rows = {item_id: row for row, item_id in enumerate(matrix._ids)}
+        return matrix, str(data["version"])
+
+def _get_stop_words():
+    """Stop words français du modèle spaCy, calculés une seule fois."""
+    global _stop_words
+    if _stop_words is None:
+        nlp = _get_spacy_model()
+        # Si le modèle est absent, aucun filtrage n'est fait (fallback)
+        _stop_words = sorted(nlp.Defaults.stop_words) if nlp else None
+    return _stop_words
+
+def _get_ngram_analyzer():
+    """
+    Analyseur bigrammes/trigrammes partagé (même découpage que CountVectorizer),
+    construit une seule fois.
+    """
+    global _ngram_analyzer
+    if _ngram_analyzer is None:
+        _ngram_analyzer = CountVectorizer(ngram_range=(2, 3), stop_words=_get_stop_words()).build_analyzer()
+    return _ngram_analyzer
+
+class _NgramVocabulary:
+    """
+    Vocabulaire partagé n-gram -> id, avec cache LRU des ensembles d'ids par texte.
+    Une fois plein, il est remplacé par un neuf (cf. _get_ngram_vocabulary) :
+    les analyses en cours gardent l'ancien, leurs ids restent cohérents.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.terms = []
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    def ngram_ids(self, text: str) -> frozenset:
+        with self.lock:
+            cached = self.cache.get(text)
+            if cached is not None:
+                self.cache.move_to_end(text)
+                return cached
+
+        ngrams = _get_ngram_analyzer()(text)
+        with self.lock:
+            ids = []
+            for ngram in ngrams:
+                ngram_id = self.ids.get(ngram)
+                if ngram_id is None:
+                    ngram_id = len(self.terms)
+                    self.ids[ngram] = ngram_id
+                    self.terms.append(ngram)
+                ids.append(ngram_id)
+            ids = frozenset(ids)
+            self.cache[text] = ids
+            if len(self.cache) > NGRAM_CACHE_SIZE:
+                self.cache.popitem(last=False)
+            return ids
+
+def _get_ngram_vocabulary() -> _NgramVocabulary:
+    """Vocabulaire n-gram courant (remplacé quand il dépasse NGRAM_VOCAB_MAX)."""
+    global _ngram_vocabulary
+    if _ngram_vocabulary is None or len(_ngram_vocabulary.ids) > NGRAM_VOCAB_MAX:
+        _ngram_vocabulary = _NgramVocabulary()
+    return _ngram_vocabulary
+
+def analyze_missing_keywords_batch(cv_input, offers_dict: dict, limit: int = 10) -> dict:
+    """
+    4b. FONCTION KEYWORD_ANALYSIS (PAR LOTS)
+    Mots-clés (bigrammes et trigrammes) de chaque offre absents du CV, pour
+    un CV et N offres en un seul passage : les n-grams du CV sont extraits une
+    fois, ceux des offres sont mis en cache, et la comparaison se fait par
+    différence d'ensembles d'ids sur un vocabulaire partagé.
+    
+    Args:
+        cv_input (str | dict): Le texte du CV ou un dictionnaire de profil structuré.
+        offers_dict (dict): Dictionnaire d'offres {id: "texte"} ou {id: {...}}.
+        limit (int): Nombre maximum de mots-clés par offre.
+        
+    Returns:
+        dict: {id: {"missing_keywords": [...]}} (ordre alphabétique, comme l'analyse unitaire).
+    """
+    cv_text = _build_cv_text(cv_input)
+    results = {key: {"missing_keywords": []} for key in offers_dict}
+    if CountVectorizer is None or not cv_text:
+        return results
+
+    vocabulary = _get_ngram_vocabulary()
+    cv_ids = vocabulary.ngram_ids(cv_text)
+    for key, value in offers_dict.items():
+        job_desc = _build_offer_text(value)
+        if not job_desc:
+            continue
+        missing_ids = vocabulary.ngram_ids(job_desc) - cv_ids
+        missing = sorted(vocabulary.terms[i] for i in missing_ids)
+        results[key] = {"missing_keywords": missing[:limit]}
+    return results
+
 def analyze_missing_keywords_spacy(cv_text: str, job_desc: str) -> dict:
     """
     4. FONCTION KEYWORD_ANALYSIS
@@ -128,105 +965,552 @@ def analyze_missing_keywords_spacy(cv_text: str, job_desc: str) -> dict:
     if CountVectorizer is None or not cv_text or not job_desc:
         return {"missing_keywords": []}
     
-    # Récupération des stop words français depuis le modèle spaCy
-    nlp = _get_spacy_model()
-    stop_words = list(nlp.Defaults.stop_words) if nlp else None
+    return analyze_missing_keywords_batch(cv_text, {"offer": job_desc})["offer"]
+
+def _file_version(path: str):
+    # os.replace crée un nouvel inode : (inode, mtime en ns) change à chaque sauvegarde
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+def _offer_index_file_version():
+    return _file_version(OFFER_INDEX_PATH)
+
+def _get_offer_index(dim: int = None):
+    """
+    Retourne l'index ANN des offres, rechargé depuis OFFER_INDEX_PATH si un autre
+    worker l'a mis à jour. Crée un index vide si `dim` est fourni.
+    """
+    global _offer_index, _offer_index_version
+    if OFFER_INDEX_PATH and os.path.exists(OFFER_INDEX_PATH):
+        version = _offer_index_file_version()
+        if version != _offer_index_version:
+            _offer_index = IVFIndex.load(OFFER_INDEX_PATH)
+            _offer_index_version = version
+    if _offer_index is None and dim is not None:
+        _offer_index = IVFIndex(dim, n_probe=OFFER_INDEX_N_PROBE, filter_fields=OFFER_INDEX_FILTER_FIELDS, dtype=VECTOR_DTYPE)
+    return _offer_index
+
+def index_offers(offers_dict: dict, batch_size: int = None) -> int:
+    """
+    8. FONCTION INDEXATION
+    Ajoute des offres au corpus interrogeable par search() (une offre déjà
+    indexée avec le même id est remplacée).
     
-    # Configuration pour extraire bigrammes et trigrammes, en ignorant les stop words
-    # Si stop_words est None, aucun filtrage n'est fait (fallback)
-    vectorizer = CountVectorizer(ngram_range=(2, 3), stop_words=stop_words)
+    Args:
+        offers_dict (dict): Dictionnaire d'offres {id: {...}} ; les champs de
+            OFFER_INDEX_FILTER_FIELDS deviennent filtrables.
+        batch_size (int): Taille des lots spaCy (défaut : MATCHER_BATCH_SIZE).
+        
+    Returns:
+        int: Nombre d'offres indexées (les offres sans texte sont ignorées).
+    """
+    keys = list(offers_dict.keys())
+    offer_vecs = vectorize_offers_cached([_build_offer_text(offers_dict[key]) for key in keys], batch_size=batch_size, budget=False)
+    present = [i for i, vec in enumerate(offer_vecs) if vec is not None]
+    if not present:
+        return 0
+
+    with _offer_index_lock, _offer_index_file_lock():
+        # Rechargement, ajout et sauvegarde sous le verrou de fichier : les
+        # offres ajoutées entre-temps par un autre worker ne sont pas écrasées
+        index = _get_offer_index(dim=offer_vecs[present[0]].shape[0])
+        index.add(
+            [keys[i] for i in present],
+            np.vstack([offer_vecs[i] for i in present]),
+            [offers_dict[keys[i]] if isinstance(offers_dict[keys[i]], dict) else {} for i in present],
+        )
+        # Entraînement et compactage ici, pas pendant une recherche
+        index.maintain()
+        if OFFER_INDEX_PATH:
+            global _offer_index_version
+            index.save(OFFER_INDEX_PATH)
+            _offer_index_version = _offer_index_file_version()
+    return len(present)
+
+def _offer_index_file_lock():
+    """Verrou inter-processus (fcntl) sur OFFER_INDEX_PATH, sans effet sans fichier."""
+    return _file_lock(OFFER_INDEX_PATH)
+
+@contextmanager
+def _file_lock(path: str):
+    """Verrou inter-processus (fcntl) sur `path`, sans effet sans fichier."""
+    if not path or fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def search(cv_vector, k: int = 10, filters: dict = None, n_probe: int = None, exact: bool = False) -> list[tuple]:
+    """
+    9. FONCTION RECHERCHE CORPUS
+    Cherche les k offres du corpus indexé les plus proches d'un vecteur de CV
+    (index IVF approché, ou brute-force si exact=True).
     
-    try:
-        # On fit sur l'offre pour connaître le vocabulaire cible
-        vectorizer.fit([job_desc])
-        job_features = vectorizer.get_feature_names_out()
+    Args:
+        cv_vector (numpy.ndarray): Vecteur du CV (cf. vectorize_text_spacy).
+        k (int): Nombre d'offres à retourner.
+        filters (dict): {champ: valeur | [valeurs]} parmi OFFER_INDEX_FILTER_FIELDS.
+        n_probe (int): Cellules visitées, plus élevé = meilleur rappel (défaut : OFFER_INDEX_N_PROBE).
+        exact (bool): Recherche exhaustive (référence de rappel).
         
-        # On transforme le CV pour voir ce qu'il contient de ce vocabulaire
-        cv_vector = vectorizer.transform([cv_text])
-        cv_features_mask = cv_vector.toarray()[0]
+    Returns:
+        list[tuple]: [(id, score), ...] triés par score décroissant.
+    """
+    if cv_vector is None:
+        return []
+    with _offer_index_lock:
+        index = _get_offer_index()
+        if index is None:
+            return []
+        if exact:
+            return index.exact_search(cv_vector, k, filters)
+        return index.search(cv_vector, k, filters, n_probe=n_probe)
+
+def get_offer_index_stats() -> dict:
+    """
+    Retourne les statistiques de l'index ANN du corpus d'offres.
+    """
+    if _offer_index is None:
+        return {"vectors": 0, "trained": False}
+    return _offer_index.stats()
+
+def _build_cv_text(cv_input) -> str:
+    """
+    Construit le texte du CV à vectoriser depuis un texte brut ou un profil structuré.
+    """
+    if isinstance(cv_input, str):
+        return cv_input
+    if not isinstance(cv_input, dict):
+        return ""
+
+    # Construction d'un texte riche depuis le profil structuré
+    parts = []
+    if cv_input.get("raw_summary"):
+        parts.append(cv_input["raw_summary"])
+    
+    # Ajout des compétences
+    skills = cv_input.get("skills", {})
+    if isinstance(skills, dict):
+        parts.extend(canonicalize_skills(skills.get("hard_skills", [])))
+        parts.extend(skills.get("soft_skills", []))
+    elif isinstance(skills, list):
+         parts.extend(canonicalize_skills(skills))
+    
+    # Ajout des expériences
+    for exp in cv_input.get("professional_experiences", []):
+        if isinstance(exp, dict):
+            if exp.get("title"): parts.append(exp["title"])
+            if exp.get("description"): parts.append(exp["description"])
         
-        missing_keywords = []
-        for i, feature_name in enumerate(job_features):
-            # Si le n-gram est présent dans l'offre mais absent du CV
-            if cv_features_mask[i] == 0:
-                missing_keywords.append(feature_name)
+    return " ".join([str(p) for p in parts if p])
+
+def _canonical_profile(cv_input):
+    """
+    Champs du profil utilisés par le matching (cf. _build_cv_text), sous une
+    forme canonique : l'ordre des clés et les champs annexes n'influent pas.
+    """
+    if not isinstance(cv_input, dict):
+        return {"text": cv_input if isinstance(cv_input, str) else ""}
+    skills = cv_input.get("skills", {})
+    if isinstance(skills, dict):
+        skills = [skills.get("hard_skills", []), skills.get("soft_skills", [])]
+    experiences = [
+        [exp.get("title"), exp.get("description")]
+        for exp in cv_input.get("professional_experiences", [])
+        if isinstance(exp, dict)
+    ]
+    return {"raw_summary": cv_input.get("raw_summary"), "skills": skills, "experiences": experiences}
+
+def profile_hash(cv_input) -> str:
+    """
+    Hash canonique des champs du profil utilisés par le matching, préfixé
+    par la version du moteur et celle du gazetteer (le texte vectorisé passe
+    par canonicalize_skills) : un changement de l'un ou de l'autre invalide
+    les caches.
+    """
+    payload = json.dumps(_canonical_profile(cv_input), ensure_ascii=False, sort_keys=True, default=str)
+    version = f"{get_engine_version()}-{get_gazetteer_version()}"
+    return hashlib.sha256(f"{version}\0{payload}".encode("utf-8")).hexdigest()
+
+def _profile_id(cv_input):
+    if isinstance(cv_input, dict):
+        return cv_input.get("id") or cv_input.get("user_id")
+    return None
+
+def vectorize_cv(cv_input):
+    """
+    Vecteur du CV (texte brut ou profil structuré), mis en cache (LRU + TTL)
+    par hash canonique du profil. Si le profil porte un id, la version
+    précédente de ce profil est invalidée dès qu'il change.
+    """
+    return _vectorize_cv(cv_input)[0]
+
+def _vectorize_cv(cv_input):
+    """
+    Comme vectorize_cv, en indiquant si le vecteur est partiel (fenêtres
+    ignorées faute de budget) : il n'est alors pas mis en cache.
+    
+    Returns:
+        tuple[numpy.ndarray | None, bool]: Le vecteur et son caractère partiel.
+    """
+    key = profile_hash(cv_input)
+    cached = _profile_vector_cache.get(key)
+    if cached is not None:
+        return cached, False
+
+    skipped = set()
+    vec = vectorize_texts_spacy([_build_cv_text(cv_input)], partial=skipped)[0]
+    if skipped:
+        return vec, True
+    if vec is not None:
+        _profile_vector_cache.set(key, vec)
+        profile_id = _profile_id(cv_input)
+        if profile_id is not None:
+            with _profile_cache_lock:
+                previous = _profile_cache_keys.get(profile_id)
+                _profile_cache_keys[profile_id] = key
+            if previous is not None and previous != key:
+                _profile_vector_cache.pop(previous)
+    return vec, False
+
+def invalidate_profile(cv_input=None, profile_id=None) -> bool:
+    """
+    Invalide le vecteur en cache d'un profil (à appeler quand il est édité),
+    soit par son contenu, soit par son id.
+    
+    Returns:
+        bool: True si une entrée a été supprimée.
+    """
+    removed = False
+    if cv_input is not None:
+        removed = _profile_vector_cache.pop(profile_hash(cv_input))
+        profile_id = profile_id or _profile_id(cv_input)
+    if profile_id is not None:
+        with _profile_cache_lock:
+            key = _profile_cache_keys.pop(profile_id, None)
+        if key is not None:
+            removed = _profile_vector_cache.pop(key) or removed
+    return removed
+
+def get_profile_cache_stats() -> dict:
+    """
+    Retourne les statistiques du cache des vecteurs de CV.
+    """
+    return _profile_vector_cache.stats()
+
+def _build_offer_text(value) -> str:
+    """
+    Construit le texte d'une offre à vectoriser (description en priorité).
+    """
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, dict):
+        return ""
+
+    # Priorité à la description
+    text_offre = value.get("description", "")
+    # Si pas de description, on concatène ce qu'on trouve
+    if not text_offre:
+        parts = [value.get("title", ""), value.get("company_name", "")]
+        parts.extend(canonicalize_skills(value.get("hard_skills")) if isinstance(value.get("hard_skills"), list) else [])
+        text_offre = " ".join([str(p) for p in parts if p])
+    return text_offre
+
+def _score_offers(cv_input, offers_dict: dict, batch_size: int = None):
+    """
+    Vectorise le CV et les offres puis calcule tous les scores en un seul
+    produit matriciel.
+    
+    Returns:
+        tuple[list, numpy.ndarray | None]: Les ids des offres et leurs scores
+        (None si le CV n'a pas pu être vectorisé).
+    """
+    keys = list(offers_dict.keys())
+    offer_texts = [_build_offer_text(offers_dict[key]) for key in keys]
+    return keys, _score_offer_texts(cv_input, offer_texts, batch_size=batch_size)
+
+def _score_offer_texts(cv_input, offer_texts: list, batch_size: int = None):
+    """
+    Scores cosinus CV/offres, lus d'abord dans le cache de scores (clé :
+    version du moteur, hash du profil, hash de contenu de l'offre). Seules
+    les offres absentes du cache sont vectorisées puis scorées.
+    
+    Returns:
+        numpy.ndarray | None: Un score par texte (None si le CV n'a pas pu
+        être vectorisé).
+    """
+    if np is None:
+        return None
+    version = get_engine_version()
+    profile_key = profile_hash(cv_input)
+    offer_keys = [content_key(text, version) if text else None for text in offer_texts]
+    cache = get_score_cache()
+    cached = cache.get_many("spacy", version, profile_key, list({key for key in offer_keys if key}))
+
+    scores = np.zeros(len(offer_texts), dtype=np.float32)
+    missing = []
+    for i, key in enumerate(offer_keys):
+        if key is None:
+            continue
+        if key in cached:
+            scores[i] = cached[key]
+        else:
+            missing.append(i)
+    if not missing:
+        return scores
+
+    # 1-2. Construction du texte du CV et vectorisation (une seule fois)
+    cv_vec, cv_partial = _vectorize_cv(cv_input)
+    if cv_vec is None:
+        return None
+
+    # 3. Vectorisation des offres par lots (les offres déjà vues sont lues sur disque)
+    skipped = set()
+    offer_vecs = vectorize_offers_cached([offer_texts[i] for i in missing], batch_size=batch_size, partial=skipped)
+
+    # 4. Scores : une matrice float32 normalisée une fois, un seul matmul
+    present = [i for i, vec in zip(missing, offer_vecs) if vec is not None]
+    if present:
+        matrix = normalize_vectors([vec for vec in offer_vecs if vec is not None])
+        scores[present] = cosine_scores(cv_vec, matrix)
+        # Les scores calculés sur un vecteur partiel ne sont pas mis en cache
+        if not cv_partial:
+            complete = [i for j, (i, vec) in enumerate(zip(missing, offer_vecs)) if vec is not None and j not in skipped]
+            cache.set_many("spacy", version, profile_key, {offer_keys[i]: float(scores[i]) for i in complete})
+    return scores
+
+def _score_offers_bm25(cv_input, offers_dict: dict, batch_size: int = None):
+    """
+    Score lexical BM25 : les offres inédites sont lemmatisées et ajoutées à
+    l'index, puis seules les offres demandées sont scorées contre les lemmes
+    du CV. Les scores sont ramenés entre 0 et 1 par saturation fixe
+    (s / (s + MATCHER_BM25_SATURATION)). Toutes les offres du lot sont
+    indexées avant le scoring : les scores d'un même appel partagent les
+    mêmes statistiques de corpus, ceux de deux appels (ou de deux workers)
+    ne sont pas comparables.
+    
+    Returns:
+        tuple[list, numpy.ndarray | None]: Les ids des offres et leurs scores.
+    """
+    keys = list(offers_dict.keys())
+    if np is None:
+        return keys, None
+
+    # 1. Comptes de termes des offres (les inédites sont lemmatisées puis indexées)
+    version = get_engine_version()
+    offer_texts = [_build_offer_text(offers_dict[key]) for key in keys]
+    doc_keys = [content_key(text, version) if text else None for text in offer_texts]
+    docs = _bm25_index.get_many(doc_keys)
+    missing = [i for i, doc_key in enumerate(doc_keys) if doc_key and docs[i] is None]
+    if missing:
+        skipped = set()
+        tokens = preprocess_texts_spacy([offer_texts[i] for i in missing], batch_size=batch_size, partial=skipped)
+        for j, (i, doc_tokens) in enumerate(zip(missing, tokens)):
+            # Une offre tronquée par le budget de temps est scorée sans être indexée
+            docs[i] = term_counts(doc_tokens) if j in skipped else _bm25_index.add(doc_keys[i], doc_tokens)
+
+    # 2. Scores des offres demandées
+    scores = np.zeros(len(keys), dtype=np.float32)
+    present = [i for i, doc in enumerate(docs) if doc]
+    if present:
+        cv_tokens = preprocess_text_spacy(_build_cv_text(cv_input))
+        raw = _bm25_index.score(cv_tokens, [docs[i] for i in present])
+        scores[present] = raw / (raw + max(BM25_SATURATION, 1e-6))
+    return keys, scores
+
+def get_bm25_stats() -> dict:
+    """
+    Retourne les statistiques de l'index BM25.
+    """
+    return _bm25_index.stats()
+
+def rank_offers(cv_input, offers_dict: dict, k: int = None, batch_size: int = None, engine: str = "spacy") -> list[tuple]:
+    """
+    7. FONCTION RANKING
+    Classe les offres par compatibilité avec le CV.
+    
+    Args:
+        cv_input (str | dict): Le texte du CV ou un dictionnaire de profil structuré.
+        offers_dict (dict): Dictionnaire d'offres {id: "texte"} ou {id: {...}}.
+        k (int): Nombre d'offres à retourner (toutes si None).
+        batch_size (int): Taille des lots spaCy (défaut : MATCHER_BATCH_SIZE).
+        engine (str): "spacy" (similarité sémantique des doc vectors) ou
+            "bm25" (pertinence lexicale, saturée par MATCHER_BM25_SATURATION ;
+            scores comparables au sein d'un même appel seulement).
         
-        # On retourne les 10 premiers manquants
-        return {"missing_keywords": missing_keywords[:10]}
+    Returns:
+        list[tuple]: [(id, score), ...] triés par score décroissant,
+        score entre 0.0 et 1.0 arrondi à 2 décimales.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur inconnu : '{engine}' (disponibles : {', '.join(ENGINES)}).")
+    scorer = _score_offers_bm25 if engine == "bm25" else _score_offers
+    keys, scores = scorer(cv_input, offers_dict, batch_size=batch_size)
+    if scores is None:
+        return [(key, 0) for key in keys[:k]]
+
+    return [(keys[i], round(float(scores[i]), 2)) for i in top_k_indices(scores, k)]
+
+def iter_offer_scores(cv_input, offers_dict: dict, chunk_size: int = None, engine: str = "spacy"):
+    """
+    6b. FONCTION BATCH MATCHING (STREAMING)
+    Comme batch_match_offers, mais produit les scores lot par lot (dans
+    l'ordre des offres reçues) pour pouvoir les envoyer au client au fur et à
+    mesure. Arrêter l'itération interrompt le travail restant.
+    
+    Args:
+        cv_input (str | dict): Le texte du CV ou un dictionnaire de profil structuré.
+        offers_dict (dict): Dictionnaire d'offres {id: "texte"} ou {id: {...}}.
+        chunk_size (int): Nombre d'offres par lot (défaut : MATCHER_BATCH_SIZE).
+        engine (str): "spacy" ou "bm25" (cf. rank_offers ; les lots BM25 sont
+            scorés l'un après l'autre, leurs scores ne sont comparables qu'au
+            sein d'un même lot).
         
-    except ValueError:
-        return {"missing_keywords": []}
+    Yields:
+        list[tuple]: [(id, score), ...] pour chaque lot.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Moteur inconnu : '{engine}' (disponibles : {', '.join(ENGINES)}).")
+    keys = list(offers_dict.keys())
+    chunk_size = chunk_size or DEFAULT_BATCH_SIZE
+
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start:start + chunk_size]
+        if engine == "bm25":
+            _, scores = _score_offers_bm25(cv_input, {key: offers_dict[key] for key in chunk}, batch_size=chunk_size)
+        else:
+            scores = _score_offer_texts(cv_input, [_build_offer_text(offers_dict[key]) for key in chunk], batch_size=chunk_size)
+        if scores is None:
+            yield [(key, 0) for key in chunk]
+            continue
+        yield [(key, round(float(score), 2)) for key, score in zip(chunk, scores)]
 
-def batch_match_offers(cv_input, offers_dict: dict) -> dict:
+def batch_match_offers(cv_input, offers_dict: dict, batch_size: int = None) -> dict:
     """
     6. FONCTION BATCH MATCHING
     Calcule le score de matching pour un dictionnaire d'offres par rapport à un CV.
-    Optimisé pour ne vectoriser le CV qu'une seule fois.
+    Optimisé pour ne vectoriser le CV qu'une seule fois et les offres inédites
+    en un seul passage nlp.pipe (les autres viennent du magasin persistant).
     
     Args:
         cv_input (str | dict): Le texte du CV ou un dictionnaire de profil structuré.
         offers_dict (dict): Dictionnaire d'offres {id: "texte"} ou {id: {"description": "texte", ...}}.
+        batch_size (int): Taille des lots spaCy (défaut : MATCHER_BATCH_SIZE).
         
     Returns:
-        dict: Dictionnaire {id: score}.
+        dict: Dictionnaire {id: score}, dans l'ordre des offres reçues.
     """
-    # 1. Extraction/Construction du texte du CV
-    cv_text = ""
-    if isinstance(cv_input, str):
-        cv_text = cv_input
-    elif isinstance(cv_input, dict):
-        # Construction d'un texte riche depuis le profil structuré
-        parts = []
-        if cv_input.get("raw_summary"):
-            parts.append(cv_input["raw_summary"])
-        
-        # Ajout des compétences
-        skills = cv_input.get("skills", {})
-        if isinstance(skills, dict):
-            parts.extend(skills.get("hard_skills", []))
-            parts.extend(skills.get("soft_skills", []))
-        elif isinstance(skills, list):
-             parts.extend(skills)
-        
-        # Ajout des expériences
-        for exp in cv_input.get("professional_experiences", []):
-            if isinstance(exp, dict):
-                if exp.get("title"): parts.append(exp["title"])
-                if exp.get("description"): parts.append(exp["description"])
-            
-        cv_text = " ".join([str(p) for p in parts if p])
-    
-    scores = {}
-    
-    # 2. Vectorisation du CV (une seule fois)
-    cv_vec = vectorize_text_spacy(cv_text)
-    
-    if cv_vec is None:
-        return {k: 0 for k in offers_dict}
+    keys, scores = _score_offers(cv_input, offers_dict, batch_size=batch_size)
+    if scores is None:
+        return {k: 0 for k in keys}
 
-    # 3. Boucle sur les offres
-    for key, value in offers_dict.items():
-        text_offre = ""
-        if isinstance(value, str):
-            text_offre = value
-        elif isinstance(value, dict):
-            # Priorité à la description
-            text_offre = value.get("description", "")
-            # Si pas de description, on concatène ce qu'on trouve
-            if not text_offre:
-                parts = [value.get("title", ""), value.get("company_name", "")]
-                parts.extend(value.get("hard_skills", []) if isinstance(value.get("hard_skills"), list) else [])
-                text_offre = " ".join([str(p) for p in parts if p])
+    return {key: round(float(score), 2) for key, score in zip(keys, scores)}
+
+def upsert_profiles(profiles_dict: dict, batch_size: int = None) -> int:
+    """
+    10. FONCTION INDEXATION PROFILS
+    Vectorise des profils et les ajoute (ou les remplace) dans la matrice
+    utilisée par le matching inverse (persistée dans PROFILE_MATRIX_PATH).
+    
+    Args:
+        profiles_dict (dict): Dictionnaire {profile_id: cv_data (texte ou profil structuré)}.
+        batch_size (int): Taille des lots spaCy (défaut : MATCHER_BATCH_SIZE).
         
-        if not text_offre:
-            scores[key] = 0
-            continue
-            
-        offer_vec = vectorize_text_spacy(text_offre)
-        score = calculate_cosine_similarity_spacy(cv_vec, offer_vec)
-        scores[key] = score
+    Returns:
+        int: Nombre de profils vectorisés (les profils vides sont retirés de la matrice).
+    """
+    keys = list(profiles_dict.keys())
+    vecs = vectorize_texts_spacy([_build_cv_text(profiles_dict[key]) for key in keys], batch_size=batch_size, budget=False)
+    present = [i for i, vec in enumerate(vecs) if vec is not None]
+
+    with _profile_lock, _file_lock(PROFILE_MATRIX_PATH):
+        # Rechargement, mise à jour et sauvegarde sous le verrou de fichier :
+        # les profils ajoutés entre-temps par un autre worker ne sont pas écrasés
+        matrix = _get_profile_matrix(dim=vecs[present[0]].shape[0] if present else None)
+        if matrix is None:
+            return 0
+        matrix.remove([keys[i] for i, vec in enumerate(vecs) if vec is None])
+        matrix.upsert([keys[i] for i in present], [vecs[i] for i in present])
+        _save_profile_matrix(matrix)
+    return len(present)
+
+def remove_profiles(profile_ids: list):
+    """
+    Retire des profils de la matrice du matching inverse.
+    """
+    if not profile_ids:
+        return
+    with _profile_lock, _file_lock(PROFILE_MATRIX_PATH):
+        matrix = _get_profile_matrix()
+        if matrix is not None and any(profile_id in matrix for profile_id in profile_ids):
+            matrix.remove(profile_ids)
+            _save_profile_matrix(matrix)
+
+def _get_profile_matrix(dim: int = None):
+    """
+    Retourne la matrice des profils (à appeler sous _profile_lock), rechargée
+    depuis PROFILE_MATRIX_PATH si un autre worker l'a mise à jour. Crée une
+    matrice vide si `dim` est fourni.
+    """
+    global _profile_matrix, _profile_matrix_version
+    if PROFILE_MATRIX_PATH and os.path.exists(PROFILE_MATRIX_PATH):
+        version = _file_version(PROFILE_MATRIX_PATH)
+        if version != _profile_matrix_version:
+            matrix, engine_version = VectorMatrix.load(PROFILE_MATRIX_PATH)
+            _profile_matrix_version = version
+            if engine_version == get_engine_version():
+                _profile_matrix = matrix
+            else:
+                # Vecteurs d'un autre modèle : incomparables, la matrice repart à vide
+                print(f"[WARN] Matrice de profils calculée par un autre moteur ({engine_version}), ignorée.")
+                _profile_matrix = None
+    if _profile_matrix is None and dim is not None:
+        _profile_matrix = VectorMatrix(dim, dtype=VECTOR_DTYPE)
+    return _profile_matrix
+
+def _save_profile_matrix(matrix: VectorMatrix):
+    """Sauvegarde la matrice des profils (à appeler sous les deux verrous)."""
+    global _profile_matrix_version
+    if PROFILE_MATRIX_PATH:
+        matrix.save(PROFILE_MATRIX_PATH, version=get_engine_version())
+        _profile_matrix_version = _file_version(PROFILE_MATRIX_PATH)
+
+def rank_profiles(offer, k: int = 50) -> list[tuple]:
+    """
+    11. FONCTION MATCHING INVERSE
+    Classe les profils indexés (cf. upsert_profiles) par compatibilité avec
+    une offre, en un seul produit matriciel.
+    
+    Args:
+        offer (str | dict): Le texte de l'offre ou l'offre structurée.
+        k (int): Nombre de profils à retourner (tous si None).
         
-    return scores
+    Returns:
+        list[tuple]: [(profile_id, score), ...] triés par score décroissant.
+    """
+    offer_vec = vectorize_text_spacy(_build_offer_text(offer))
+    if offer_vec is None:
+        return []
+    with _profile_lock:
+        matrix = _get_profile_matrix()
+        if matrix is None:
+            return []
+        return matrix.top_k(offer_vec, k)
+
+def get_profile_matrix_stats() -> dict:
+    """
+    Retourne la taille de la matrice des profils.
+    """
+    with _profile_lock:
+        matrix = _get_profile_matrix()
+    if matrix is None:
+        return {"profiles": 0, "dtype": VECTOR_DTYPE, "vector_bytes": 0}
+    return {"profiles": len(matrix), "dtype": matrix.dtype, "vector_bytes": matrix.nbytes()}
 
 def run_matcher_demo(cv_text: str, job_desc: str):
     """
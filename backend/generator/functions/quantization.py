@@ -0,0 +1,87 @@
+"""
+quantization.py
+
+Stockage quantifié des matrices de vecteurs normalisés (offres, profils).
+
+- "float32" : référence, 4 octets par composante.
+- "float16" : 2 octets par composante, erreur relative ~1e-3.
+- "int8"    : 1 octet par composante + une échelle float32 par ligne
+              (x ≈ q * scale, avec scale = max|x| / 127).
+
+Le scoring se fait directement sur la matrice quantifiée : elle est
+déquantifiée par blocs de lignes, jamais en entier, ce qui borne la mémoire
+temporaire.
+"""
+
+import os
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+VECTOR_DTYPES = ("float32", "float16", "int8")
+
+# Nombre de lignes déquantifiées à la fois pendant un scoring
+BLOCK_ROWS = int(os.getenv("MATCHER_QUANT_BLOCK_ROWS", "4096"))
+
+
+def check_dtype(dtype: str) -> str:
+    if dtype not in VECTOR_DTYPES:
+        raise ValueError(f"Type de stockage inconnu : '{dtype}' (valeurs possibles : {list(VECTOR_DTYPES)}).")
+    return dtype
+
+
+def quantize_rows(matrix, dtype: str):
+    """
+    Quantifie une matrice float32 (n, dim).
+
+    Returns:
+        tuple[numpy.ndarray, numpy.ndarray | None]: Les données au format
+        demandé et les échelles par ligne (int8 seulement, None sinon).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if dtype == "float32":
+        return matrix, None
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    data = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return data, scales.astype(np.float32)
+
+
+def dequantize_rows(data, scales=None):
+    """Matrice float32 à partir de données quantifiées (cf. quantize_rows)."""
+    matrix = np.asarray(data, dtype=np.float32)
+    if scales is not None:
+        matrix = matrix * scales[:, None]
+    return matrix
+
+
+def quantized_scores(data, scales, query, rows=None):
+    """
+    Produits scalaires entre une requête float32 et des lignes d'une matrice
+    quantifiée, bloc par bloc.
+
+    Args:
+        data (numpy.ndarray): Matrice quantifiée (n, dim).
+        scales (numpy.ndarray | None): Échelles par ligne (int8).
+        query (numpy.ndarray): Vecteur requête (dim,), déjà normalisé.
+        rows (numpy.ndarray): Lignes à scorer (défaut : toutes).
+
+    Returns:
+        numpy.ndarray: Un score float32 par ligne.
+    """
+    if data.dtype == np.float32 and rows is None:
+        return data @ query
+    n = len(data) if rows is None else len(rows)
+    scores = np.empty(n, dtype=np.float32)
+    for start in range(0, n, BLOCK_ROWS):
+        stop = min(start + BLOCK_ROWS, n)
+        block_rows = slice(start, stop) if rows is None else rows[start:stop]
+        # Le produit se fait en float32 : l'échelle int8 s'applique après, par ligne
+        scores[start:stop] = data[block_rows].astype(np.float32) @ query
+        if scales is not None:
+            scores[start:stop] *= scales[block_rows]
+    return scores
@@ -0,0 +1,297 @@
+"""
+score_cache.py
+
+Cache persistant des scores (profil, offre), partagé entre sessions et workers.
+
+- Clé : (moteur, version du moteur/prompt, hash du profil, hash de l'offre).
+  Changer de modèle ou de prompt change la version : les anciens scores ne
+  sont plus jamais relus.
+- Deux niveaux : un LRU en mémoire devant une base SQLite locale en mode WAL
+  (lectures concurrentes entre workers, écritures sérialisées par SQLite).
+- Le niveau disque est borné : les entrées expirées puis les plus anciennes
+  (created_at) sont supprimées régulièrement au-delà de
+  SCORE_CACHE_MAX_DISK_ENTRIES.
+- Statistiques de hit-rate par moteur (mémoire, disque, miss).
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+
+try:
+    from .lru_cache import LRUCache
+except ImportError:
+    from lru_cache import LRUCache
+
+# Répertoire des données locales du générateur (hors du répertoire courant)
+GENERATOR_DATA_DIR = os.getenv(
+    "GENERATOR_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+)
+
+# Base SQLite du cache (chaîne vide : cache en mémoire uniquement)
+SCORE_CACHE_PATH = os.getenv("SCORE_CACHE_PATH", os.path.join(GENERATOR_DATA_DIR, "score_cache.sqlite3"))
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "50000"))
+# Nombre maximum de lignes du niveau disque (0 = illimité)
+SCORE_CACHE_MAX_DISK_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_DISK_ENTRIES", "500000"))
+# Élagage du niveau disque toutes les N lignes écrites par ce processus
+SCORE_CACHE_PRUNE_EVERY = int(os.getenv("SCORE_CACHE_PRUNE_EVERY", "5000"))
+# Durée de vie d'un score en secondes (0 = pas d'expiration)
+SCORE_CACHE_TTL = float(os.getenv("SCORE_CACHE_TTL", "0"))
+
+# Nombre maximum de paramètres par requête SQLite (limite historique : 999)
+_SQL_CHUNK = 500
+
+
+def payload_hash(payload) -> str:
+    """
+    Hash SHA-256 d'un objet JSON sous forme canonique (clés triées).
+    """
+    text = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    """
+    Cache à deux niveaux (LRU mémoire + SQLite WAL) de résultats de scoring.
+
+    Les valeurs sont des objets JSON (un score, ou l'analyse complète de Gemini).
+
+    Args:
+        path (str): Fichier SQLite (None ou "" : pas de niveau disque).
+        max_entries (int): Taille du LRU en mémoire.
+        ttl (float): Durée de vie d'une entrée en secondes (0 = pas d'expiration).
+        max_disk_entries (int): Lignes gardées sur disque (0 = illimité).
+        prune_every (int): Lignes écrites entre deux élagages du disque.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_entries: int = 50000,
+        ttl: float = 0,
+        max_disk_entries: int = 0,
+        prune_every: int = SCORE_CACHE_PRUNE_EVERY,
+    ):
+        self.path = path or None
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = max(1, prune_every)
+        self._written = 0
+        self.disk_pruned = 0
+        self._memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._engines = {}
+        self.disk_errors = 0
+
+        if self.path:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = self._connect()
+            if conn is not None:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS scores ("
+                    " engine TEXT NOT NULL, version TEXT NOT NULL,"
+                    " profile TEXT NOT NULL, offer TEXT NOT NULL,"
+                    " value TEXT NOT NULL, created_at REAL NOT NULL,"
+                    " PRIMARY KEY (engine, version, profile, offer)"
+                    ") WITHOUT ROWID"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS scores_created_at ON scores (created_at)")
+                conn.commit()
+                self.prune()
+
+    # ------------------------------------------------------------------
+    # Niveau disque
+    # ------------------------------------------------------------------
+
+    def _connect(self):
+        """Connexion SQLite propre au thread courant (None si indisponible)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None and self.path:
+            try:
+                conn = sqlite3.connect(self.path, timeout=5.0)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            except sqlite3.Error as e:
+                self._disk_error(e)
+                return None
+            self._local.conn = conn
+        return conn
+
+    def _disk_error(self, error):
+        # Le cache ne doit jamais faire échouer un scoring : on continue sans disque
+        self.disk_errors += 1
+        if self.disk_errors == 1:
+            print(f"[WARN] Cache de scores sur disque indisponible ({self.path}) : {error}")
+
+    def _read_disk(self, engine: str, version: str, profile: str, offers: list) -> dict:
+        conn = self._connect()
+        if conn is None or not offers:
+            return {}
+        found = {}
+        min_created = time.time() - self.ttl if self.ttl else 0
+        try:
+            for start in range(0, len(offers), _SQL_CHUNK):
+                chunk = offers[start:start + _SQL_CHUNK]
+                rows = conn.execute(
+                    "SELECT offer, value FROM scores"
+                    " WHERE engine = ? AND version = ? AND profile = ? AND created_at >= ?"
+                    f" AND offer IN ({','.join('?' * len(chunk))})",
+                    (engine, version, profile, min_created, *chunk),
+                ).fetchall()
+                for offer, value in rows:
+                    found[offer] = json.loads(value)
+        except (sqlite3.Error, ValueError) as e:
+            self._disk_error(e)
+        return found
+
+    def _write_disk(self, engine: str, version: str, profile: str, values: dict):
+        conn = self._connect()
+        if conn is None or not values:
+            return
+        now = time.time()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO scores (engine, version, profile, offer, value, created_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (engine, version, profile, offer, json.dumps(value, ensure_ascii=False), now)
+                        for offer, value in values.items()
+                    ],
+                )
+        except sqlite3.Error as e:
+            self._disk_error(e)
+            return
+
+        with self._stats_lock:
+            self._written += len(values)
+            due = self._written >= self.prune_every
+            if due:
+                self._written = 0
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Supprime du disque les entrées expirées, puis les plus anciennes
+        au-delà de max_disk_entries (jusqu'à 90 % de la limite, pour ne pas
+        élaguer à chaque écriture). Retourne le nombre de lignes supprimées.
+        """
+        conn = self._connect()
+        if conn is None or (not self.ttl and not self.max_disk_entries):
+            return 0
+        deleted = 0
+        try:
+            with conn:
+                if self.ttl:
+                    deleted += conn.execute("DELETE FROM scores WHERE created_at < ?", (time.time() - self.ttl,)).rowcount
+                if self.max_disk_entries:
+                    count = conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+                    if count > self.max_disk_entries:
+                        keep = int(self.max_disk_entries * 0.9)
+                        row = conn.execute(
+                            "SELECT created_at FROM scores ORDER BY created_at DESC LIMIT 1 OFFSET ?", (keep,)
+                        ).fetchone()
+                        if row is not None:
+                            deleted += conn.execute("DELETE FROM scores WHERE created_at <= ?", (row[0],)).rowcount
+        except sqlite3.Error as e:
+            self._disk_error(e)
+        with self._stats_lock:
+            self.disk_pruned += deleted
+        return deleted
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def get_many(self, engine: str, version: str, profile: str, offers: list) -> dict:
+        """
+        Scores en cache pour un profil et une liste de hash d'offres.
+
+        Returns:
+            dict: {hash d'offre: valeur} pour les seules offres trouvées.
+        """
+        found = {}
+        missing = []
+        for offer in offers:
+            value = self._memory.get((engine, version, profile, offer))
+            if value is None:
+                missing.append(offer)
+            else:
+                found[offer] = value
+        memory_hits = len(found)
+
+        from_disk = self._read_disk(engine, version, profile, missing)
+        for offer, value in from_disk.items():
+            self._memory.set((engine, version, profile, offer), value)
+        found.update(from_disk)
+
+        self._count(engine, memory_hits, len(from_disk), len(offers) - len(found))
+        return found
+
+    def get(self, engine: str, version: str, profile: str, offer: str, default=None):
+        return self.get_many(engine, version, profile, [offer]).get(offer, default)
+
+    def set_many(self, engine: str, version: str, profile: str, values: dict):
+        """
+        Enregistre des valeurs {hash d'offre: valeur} pour un profil.
+        """
+        for offer, value in values.items():
+            self._memory.set((engine, version, profile, offer), value)
+        self._write_disk(engine, version, profile, values)
+
+    def set(self, engine: str, version: str, profile: str, offer: str, value):
+        self.set_many(engine, version, profile, {offer: value})
+
+    def clear_memory(self):
+        """Vide le niveau mémoire (le niveau disque est conservé)."""
+        self._memory.clear()
+
+    def _count(self, engine: str, memory_hits: int, disk_hits: int, misses: int):
+        with self._stats_lock:
+            counters = self._engines.setdefault(engine, {"memory_hits": 0, "disk_hits": 0, "misses": 0})
+            counters["memory_hits"] += memory_hits
+            counters["disk_hits"] += disk_hits
+            counters["misses"] += misses
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            engines = {}
+            for engine, counters in self._engines.items():
+                total = sum(counters.values())
+                hits = counters["memory_hits"] + counters["disk_hits"]
+                engines[engine] = {**counters, "hit_rate": round(hits / total, 3) if total else 0.0}
+        memory = self._memory.stats()
+        return {
+            "disk_enabled": self.path is not None,
+            "disk_errors": self.disk_errors,
+            "disk_pruned": self.disk_pruned,
+            "memory_entries": memory["entries"],
+            "memory_evictions": memory["evictions"],
+            "engines": engines,
+        }
+
+
+_score_cache = None
+_score_cache_lock = threading.Lock()
+
+
+def get_score_cache() -> ScoreCache:
+    """Cache de scores partagé (singleton configuré par les variables SCORE_CACHE_*)."""
+    global _score_cache
+    if _score_cache is None:
+        with _score_cache_lock:
+            if _score_cache is None:
+                try:
+                    _score_cache = ScoreCache(
+                        SCORE_CACHE_PATH, SCORE_CACHE_MAX_ENTRIES, SCORE_CACHE_TTL, SCORE_CACHE_MAX_DISK_ENTRIES
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    print(f"[WARN] Cache de scores sur disque indisponible ({SCORE_CACHE_PATH}) : {e}")
+                    _score_cache = ScoreCache(None, SCORE_CACHE_MAX_ENTRIES, SCORE_CACHE_TTL)
+    return _score_cache
@@ -0,0 +1,186 @@
+"""
+skill_extractor.py
+
+Extraction locale (sans LLM) des compétences techniques d'un texte d'offre ou de CV.
+
+Le gazetteer (skills_gazetteer.py) est compilé une seule fois en automate
+d'Aho-Corasick : l'extraction parcourt ensuite le texte normalisé en une seule
+passe linéaire, quel que soit le nombre d'alias. Un alias n'est retenu que
+s'il est délimité par des frontières de mots.
+"""
+
+from __future__ import annotations
+
+import json
+import hashlib
+import unicodedata
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+try:
+    from .skills_gazetteer import SKILLS_GAZETTEER, AMBIGUOUS_NAMES, AMBIGUOUS_ALIASES
+except ImportError:
+    from skills_gazetteer import SKILLS_GAZETTEER, AMBIGUOUS_NAMES, AMBIGUOUS_ALIASES
+
+
+def normalize_skill_text(text: str) -> str:
+    """
+    Normalisation commune aux alias et aux textes : minuscules, accents
+    retirés, espaces fusionnés.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.split())
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum()
+
+
+class SkillAutomaton:
+    """
+    Automate d'Aho-Corasick sur les alias normalisés du gazetteer.
+    """
+
+    def __init__(self, gazetteer: Dict[str, List[str]], ambiguous_names: set = frozenset(), ambiguous_aliases: set = frozenset()):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # nœud -> [(longueur de l'alias, nom canonique)]
+        self.aliases = {}
+
+        for canonical, aliases in gazetteer.items():
+            names = list(aliases) if canonical in ambiguous_names else [canonical, *aliases]
+            for alias in names:
+                normalized = normalize_skill_text(alias)
+                if normalized in ambiguous_aliases:
+                    continue
+                if normalized and normalized not in self.aliases:
+                    self.aliases[normalized] = canonical
+                    self._insert(normalized, canonical)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str, canonical: str):
+        node = 0
+        for c in pattern:
+            nxt = self._goto[node].get(c)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][c] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = nxt
+        self._output[node].append((len(pattern), canonical))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and c not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(c, 0)
+                # Les sorties du suffixe le plus long sont héritées
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find(self, text: str) -> List[str]:
+        """
+        Noms canoniques trouvés dans un texte déjà normalisé, dans l'ordre
+        de première apparition, sans doublons.
+        """
+        found = {}
+        node = 0
+        n = len(text)
+        for i, c in enumerate(text):
+            while node and c not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(c, 0)
+            if not self._output[node]:
+                continue
+            after_ok = i + 1 == n or not _is_word_char(text[i + 1])
+            for length, canonical in self._output[node]:
+                start = i - length + 1
+                # Frontières de mots (un alias comme ".net" porte sa propre ponctuation)
+                before_ok = start == 0 or not _is_word_char(text[start - 1]) or not _is_word_char(text[start])
+                end_ok = after_ok or not _is_word_char(c)
+                if before_ok and end_ok and canonical not in found:
+                    found[canonical] = start
+        return sorted(found, key=found.get)
+
+
+_automaton: Optional[SkillAutomaton] = None
+_gazetteer_version: Optional[str] = None
+
+
+def _get_automaton() -> SkillAutomaton:
+    """Compile le gazetteer (singleton)."""
+    global _automaton
+    if _automaton is None:
+        _automaton = SkillAutomaton(SKILLS_GAZETTEER, AMBIGUOUS_NAMES, AMBIGUOUS_ALIASES)
+    return _automaton
+
+
+def get_gazetteer_version() -> str:
+    """
+    Empreinte courte du gazetteer : change dès qu'un alias est ajouté ou
+    retiré (utilisée pour invalider les scores mis en cache).
+    """
+    global _gazetteer_version
+    if _gazetteer_version is None:
+        payload = json.dumps([SKILLS_GAZETTEER, sorted(AMBIGUOUS_NAMES), sorted(AMBIGUOUS_ALIASES)], ensure_ascii=False, sort_keys=True)
+        _gazetteer_version = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+    return _gazetteer_version
+
+
+def extract_skills(text: str) -> List[str]:
+    """
+    Compétences (noms canoniques du gazetteer) citées dans un texte libre.
+    """
+    if not text:
+        return []
+    return _get_automaton().find(normalize_skill_text(text))
+
+
+def extract_offer_skills(offer: Dict[str, Any]) -> List[str]:
+    """
+    Compétences d'une offre brute (ex. Adzuna) à partir de son titre, de sa
+    description et, si présents, de ses missions et prérequis.
+    """
+    parts = [offer.get("title"), offer.get("description")]
+    raw = offer.get("raw")
+    if isinstance(raw, dict):
+        parts.append(raw.get("description"))
+    for field in ("missions", "requirements"):
+        value = offer.get(field)
+        if isinstance(value, list):
+            parts.extend(value)
+    return extract_skills("\n".join(str(p) for p in parts if p))
+
+
+# ============================================================================
+# DEMO / CONTRÔLE DES FAUX POSITIFS
+# ============================================================================
+
+if __name__ == "__main__":
+    # Phrases courantes d'offres françaises : aucune compétence ne doit en sortir
+    ordinary_sentences = [
+        "Ajoutez 500 ml de lait, le reste du temps vous travaillerez ts les jours.",
+        "Chaque node du réseau est surveillé, une torch est fournie pour le local technique.",
+        "Vous êtes agile, curieux et rigoureux ; le rest de l'équipe est basée à Lyon.",
+        "Le code est hébergé sur GitHub et GitLab, les transformers électriques sont vérifiés chaque mois.",
+        "C'est un poste en CDI, 16 Go de RAM fournis, tableau de bord hebdomadaire.",
+        "Acme SAS recrute un livreur, livraison express, station Shell à proximité.",
+        "Vous participerez à la R&D et au suivi des py-lônes du chantier.",
+    ]
+    for sentence in ordinary_sentences:
+        found = extract_skills(sentence)
+        assert not found, f"Faux positifs {found} dans : {sentence!r}"
+    print(f"[OK] {len(ordinary_sentences)} phrases courantes, aucune compétence extraite.")
+
+    demo_offer = (
+        "Développeur Full Stack (H/F) : Node.js, TypeScript, API REST, PyTorch, "
+        "scikit-learn, MLOps, méthodes agiles, langage C et Tableau Software."
+    )
+    print(f"[INFO] Compétences de la démo : {extract_skills(demo_offer)}")
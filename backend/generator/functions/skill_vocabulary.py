@@ -0,0 +1,136 @@
+"""
+skill_vocabulary.py
+
+Vocabulaire canonique des compétences, avec des ids entiers.
+
+- Chaque nom canonique du gazetteer (skills_gazetteer.py) reçoit un id stable
+  (ordre du gazetteer) ; tous ses alias ("python3", "py", "sklearn"...) sont
+  ramenés à cet id par une seule table précompilée (alias normalisé -> id).
+- Une compétence hors gazetteer reçoit un id à la volée (propre au processus,
+  jamais persisté) : deux écritures équivalentes ("Blender", " blender ")
+  partagent le même id.
+- canonicalize_skills ramène une liste de compétences à ses noms canoniques
+  (texte du matcher : "py" et "Python" y deviennent le même mot).
+
+Les compétences déclarées (hard_skills) restent la source de vérité ; un mémo
+"chaîne brute -> id" évite de renormaliser les écritures déjà vues.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Iterable
+
+try:
+    from .skills_gazetteer import SKILLS_GAZETTEER
+    from .skill_extractor import normalize_skill_text, get_gazetteer_version
+except ImportError:
+    from skills_gazetteer import SKILLS_GAZETTEER
+    from skill_extractor import normalize_skill_text, get_gazetteer_version
+
+# Nombre maximum de compétences hors gazetteer internées (au-delà, une
+# compétence inconnue n'a pas d'id : canonicalize_skills la garde telle quelle,
+# et le refus est compté dans les stats "overflows" exposées par /metrics)
+SKILL_VOCAB_MAX_UNKNOWN = int(os.getenv("SKILL_VOCAB_MAX_UNKNOWN", "200000"))
+
+# Taille maximale du mémo "chaîne brute -> id" (évite de renormaliser)
+SKILL_VOCAB_MEMO_SIZE = int(os.getenv("SKILL_VOCAB_MEMO_SIZE", "200000"))
+
+
+class SkillVocabulary:
+    """
+    Table alias normalisé -> id, et id -> nom affiché (canonique, ou première
+    écriture rencontrée pour une compétence hors gazetteer).
+    """
+
+    def __init__(self, gazetteer: Dict[str, List[str]]):
+        self.names = []
+        self._lookup = {}
+        for canonical, aliases in gazetteer.items():
+            skill_id = len(self.names)
+            self.names.append(canonical)
+            # Dans une liste de compétences, même les noms ambigus ("C", "Go") sont fiables
+            for alias in (canonical, *aliases):
+                self._lookup.setdefault(normalize_skill_text(alias), skill_id)
+        self.n_known = len(self.names)
+        self._memo = {}
+        self._lock = threading.Lock()
+        # Compétences inconnues refusées (vocabulaire plein), cf. stats()
+        self.overflows = 0
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def skill_id(self, name) -> Optional[int]:
+        """Id d'une compétence (alias ou nom canonique), interné si inconnu."""
+        skill_id = self._memo.get(name)
+        if skill_id is not None:
+            return skill_id
+        key = normalize_skill_text(str(name))
+        if not key:
+            return None
+        skill_id = self._lookup.get(key)
+        if skill_id is None:
+            with self._lock:
+                skill_id = self._lookup.get(key)
+                if skill_id is None:
+                    if len(self.names) - self.n_known >= SKILL_VOCAB_MAX_UNKNOWN:
+                        if not self.overflows:
+                            print(f"[WARN] Vocabulaire de compétences plein ({SKILL_VOCAB_MAX_UNKNOWN} inconnues), "
+                                  "les suivantes sont comptées dans overflows (/metrics).")
+                        self.overflows += 1
+                        return None
+                    skill_id = len(self.names)
+                    self.names.append(str(name).strip())
+                    self._lookup[key] = skill_id
+        if isinstance(name, str) and len(self._memo) < SKILL_VOCAB_MEMO_SIZE:
+            self._memo[name] = skill_id
+        return skill_id
+
+    def stats(self) -> dict:
+        return {
+            "version": get_gazetteer_version(),
+            "known": self.n_known,
+            "interned_unknown": len(self.names) - self.n_known,
+            "max_unknown": SKILL_VOCAB_MAX_UNKNOWN,
+            "overflows": self.overflows,
+            "aliases": len(self._lookup),
+        }
+
+
+_vocabulary: Optional[SkillVocabulary] = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_skill_vocabulary() -> SkillVocabulary:
+    """Vocabulaire partagé (singleton, compilé au premier appel)."""
+    global _vocabulary
+    if _vocabulary is None:
+        with _vocabulary_lock:
+            if _vocabulary is None:
+                _vocabulary = SkillVocabulary(SKILLS_GAZETTEER)
+    return _vocabulary
+
+
+def canonicalize_skills(names: Iterable) -> List[str]:
+    """
+    Noms canoniques, sans doublons, d'une liste de compétences
+    (ex. ["python3", "Py", "sklearn"] -> ["Python", "Scikit-learn"]).
+    Une compétence hors gazetteer garde son écriture d'origine.
+    """
+    if not names or isinstance(names, str):
+        return []
+    vocabulary = get_skill_vocabulary()
+    canonical = {}
+    for name in names:
+        if not name:
+            continue
+        skill_id = vocabulary.skill_id(name)
+        # Vocabulaire plein : la compétence est dédoublonnée sur sa forme normalisée
+        key = skill_id if skill_id is not None else normalize_skill_text(str(name))
+        if key != "" and key not in canonical:
+            canonical[key] = vocabulary.names[skill_id] if skill_id is not None and skill_id < vocabulary.n_known else str(name).strip()
+    return list(canonical.values())
+
+
+def get_skill_vocabulary_stats() -> dict:
+    return get_skill_vocabulary().stats()
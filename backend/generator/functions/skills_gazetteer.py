@@ -0,0 +1,144 @@
+"""
+skills_gazetteer.py
+
+Gazetteer des compétences techniques et outils : nom canonique -> alias.
+
+Les alias sont comparés après normalisation (minuscules, sans accents, espaces
+fusionnés) et uniquement sur des frontières de mots ; le nom canonique est
+lui-même un alias, sauf pour les noms ambigus en français (AMBIGUOUS_NAMES),
+reconnus seulement sous une forme explicite ("langage C", "Tableau Software").
+Les alias ambigus (AMBIGUOUS_ALIASES) ne servent qu'aux listes de compétences
+(hard_skills), jamais à l'extraction dans un texte libre.
+"""
+
+# Noms canoniques qui ne sont pas des alias : "c'est", "r&d", "16 Go de RAM",
+# "tableau de bord", "Acme SAS", "livraison express", "profil agile"...
+AMBIGUOUS_NAMES = {"C", "R", "Go", "Tableau", "SAS", "Express", "Agile"}
+
+# Alias fiables dans une liste de compétences mais pas dans un texte :
+# "500 ml", "node du réseau", "ts les jours", "torch" (lampe), "the rest of"...
+AMBIGUOUS_ALIASES = {"py", "ts", "node", "torch", "ml", "rest", "scikit", "transformers"}
+
+SKILLS_GAZETTEER = {
+    # Langages
+    "Python": ["python3", "python 3", "py"],
+    "Java": ["java 8", "java 11", "java 17", "jee", "j2ee"],
+    "JavaScript": ["js", "javascript es6", "es6", "ecmascript"],
+    "TypeScript": ["ts"],
+    "C": ["langage c", "c ansi"],
+    "C++": ["cpp", "c plus plus"],
+    "C#": ["csharp", "c sharp"],
+    "Go": ["golang"],
+    "Rust": [],
+    "PHP": [],
+    "Ruby": [],
+    "Kotlin": [],
+    "Swift": [],
+    "Scala": [],
+    "R": ["langage r", "rstudio", "r studio"],
+    "MATLAB": [],
+    "SQL": ["langage sql"],
+    "Bash": ["shell script", "shell scripting", "scripting shell", "scripts shell"],
+    "VBA": ["macros excel"],
+    "HTML": ["html5"],
+    "CSS": ["css3"],
+    "SAS": ["sas base", "sas 9", "sas enterprise guide", "sas viya", "langage sas"],
+
+    # Frameworks et bibliothèques
+    "React": ["react.js", "reactjs"],
+    "React Native": [],
+    "Angular": ["angularjs", "angular.js"],
+    "Vue.js": ["vuejs", "vue 3"],
+    "Node.js": ["node", "nodejs", "node js"],
+    "Express": ["express.js", "expressjs", "express js"],
+    "Next.js": ["nextjs"],
+    "Django": ["django rest framework", "drf"],
+    "Flask": [],
+    "FastAPI": ["fast api"],
+    "Spring Boot": ["springboot"],
+    "Spring": ["spring framework"],
+    ".NET": ["dotnet", "asp.net", ".net core"],
+    "Symfony": [],
+    "Laravel": [],
+    "Tailwind CSS": ["tailwind", "tailwindcss"],
+    "Pandas": [],
+    "NumPy": ["numpy"],
+    "Scikit-learn": ["sklearn", "scikit learn", "scikit"],
+    "TensorFlow": ["tensor flow"],
+    "Keras": [],
+    "PyTorch": ["torch"],
+    "spaCy": [],
+    "Hugging Face": ["huggingface", "transformers"],
+    "LangChain": [],
+    "Matplotlib": [],
+    "Power BI": ["powerbi", "power-bi"],
+    "Tableau": ["tableau software", "tableau desktop"],
+    "Looker": ["looker studio", "google data studio"],
+    "Qlik": ["qlikview", "qlik sense"],
+
+    # Data / IA
+    "Machine Learning": ["apprentissage automatique", "ml", "ml engineer", "ingenieur ml", "modeles de ml", "mlops"],
+    "Deep Learning": ["apprentissage profond"],
+    "NLP": ["traitement du langage naturel", "natural language processing"],
+    "Computer Vision": ["vision par ordinateur"],
+    "LLM": ["llms", "large language models", "ia generative", "generative ai", "genai"],
+    "Data Visualization": ["dataviz", "data visualisation", "visualisation de donnees"],
+    "Statistiques": ["statistics", "statistique"],
+    "ETL": ["elt"],
+    "Spark": ["apache spark", "pyspark"],
+    "Hadoop": [],
+    "Kafka": ["apache kafka"],
+    "Airflow": ["apache airflow"],
+    "dbt": [],
+    "Databricks": [],
+    "Snowflake": [],
+    "BigQuery": ["big query"],
+
+    # Bases de données
+    "PostgreSQL": ["postgres", "postgre", "postgresql"],
+    "MySQL": ["mariadb"],
+    "MongoDB": ["mongo"],
+    "Oracle": ["oracle database", "pl/sql", "plsql"],
+    "SQL Server": ["mssql", "microsoft sql server"],
+    "Redis": [],
+    "Elasticsearch": ["elastic search", "elk"],
+    "NoSQL": [],
+
+    # Cloud / DevOps
+    "AWS": ["amazon web services"],
+    "Azure": ["microsoft azure"],
+    "GCP": ["google cloud", "google cloud platform"],
+    "Docker": [],
+    "Kubernetes": ["k8s"],
+    "Terraform": [],
+    "Ansible": [],
+    "Jenkins": [],
+    "GitLab CI": ["gitlab-ci", "gitlab ci/cd"],
+    "GitHub Actions": [],
+    "CI/CD": ["ci cd", "integration continue", "deploiement continu"],
+    "Git": [],
+    "Linux": ["unix", "ubuntu", "debian"],
+    "API REST": ["rest", "restful", "api rest", "apis rest", "rest api"],
+    "GraphQL": [],
+    "Microservices": ["micro-services", "micro services"],
+
+    # Outils et méthodes
+    "Excel": ["microsoft excel", "ms excel"],
+    "SAP": [],
+    "Salesforce": [],
+    "Jira": [],
+    "Confluence": [],
+    "Figma": [],
+    "Agile": ["methode agile", "methodes agiles", "methodologie agile", "methodologies agiles", "mode agile", "environnement agile"],
+    "Scrum": [],
+    "Kanban": [],
+    "UML": [],
+    "Tests unitaires": ["unit tests", "unit testing", "tdd"],
+    "SEO": ["referencement naturel"],
+    "Google Analytics": [],
+    "CRM": [],
+    "Photoshop": ["adobe photoshop"],
+    "AutoCAD": [],
+    "SolidWorks": [],
+    "Cybersécurité": ["cybersecurite", "cyber securite", "securite informatique", "cybersecurity"],
+}
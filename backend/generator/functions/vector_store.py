@@ -0,0 +1,324 @@
+"""
+vector_store.py
+
+Stockage persistant des vecteurs d'offres, adressé par contenu.
+
+- Clé : hash SHA-256 du texte normalisé de l'offre + version du moteur
+  (un changement de modèle spaCy invalide donc naturellement les vecteurs).
+- Stockage : une matrice float32 brute (vectors.f32) lue via numpy.memmap,
+  plus un index des clés (keys.txt, une clé par ligne, ligne i <-> vecteur i).
+- Les fichiers sont en ajout seul : tous les workers uvicorn mappent les mêmes
+  pages en lecture seule, les écritures sont sérialisées par un verrou fichier.
+- Taille bornée (max_rows) : quand un ajout dépasserait la borne, le magasin est
+  réécrit dans une nouvelle génération de fichiers (generation.json pointe vers
+  la courante) en ne gardant que les vecteurs lus ou écrits depuis le
+  compactage précédent (used.txt), au plus COMPACT_TARGET x max_rows, les plus
+  récemment utilisés d'abord. Les workers basculent sur la nouvelle génération à leur prochaine
+  relecture ; les anciens fichiers restent lisibles via leur memmap jusque-là.
+"""
+
+import os
+import json
+import hashlib
+import threading
+import unicodedata
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : pas de verrou inter-processus (un seul worker attendu)
+    fcntl = None
+
+
+# Après compactage, le magasin est ramené à cette fraction de max_rows (marge
+# avant le compactage suivant)
+COMPACT_TARGET = 0.75
+
+
+def normalize_offer_text(text: str) -> str:
+    """
+    Normalise un texte d'offre pour le hachage (Unicode NFC, espaces fusionnés).
+    La casse est conservée : elle influence le vecteur spaCy.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def content_key(text: str, engine_version: str) -> str:
+    """
+    Clé de contenu d'un texte pour une version de moteur donnée.
+    """
+    payload = f"{engine_version}\0{normalize_offer_text(text)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class OfferVectorStore:
+    """
+    Magasin de vecteurs sur disque, partagé entre processus.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    KEYS_FILE = "keys.txt"
+    USED_FILE = "used.txt"
+    META_FILE = "meta.json"
+    GENERATION_FILE = "generation.json"
+    LOCK_FILE = ".lock"
+
+    def __init__(self, directory: str, engine_version: str, dim: int, max_rows: int = 0):
+        self.engine_version = engine_version
+        self.dim = dim
+        self.max_rows = max_rows
+        # Un sous-dossier par version de moteur : jamais de mélange de dimensions
+        self.directory = os.path.join(directory, _safe_dirname(engine_version))
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index = {}
+        self._indexed_rows = 0
+        self._matrix = None
+        self._keys_offset = 0
+        # Génération courante des fichiers et clés déjà signalées dans used.txt
+        self._generation = 0
+        self._used = set()
+        self.hits = 0
+        self.misses = 0
+        self.compactions = 0
+
+        self._write_meta()
+        self._refresh()
+        if not self._generation:
+            open(self._path(self.USED_FILE), "a").close()
+
+    # ------------------------------------------------------------------
+    # Fichiers
+    # ------------------------------------------------------------------
+
+    def _path(self, name: str, generation: int = None) -> str:
+        """
+        Chemin d'un fichier ; vecteurs, clés et usages sont propres à une
+        génération (la génération 0 garde les noms d'origine).
+        """
+        generation = self._generation if generation is None else generation
+        if generation and name in (self.VECTORS_FILE, self.KEYS_FILE, self.USED_FILE):
+            stem, ext = os.path.splitext(name)
+            name = f"{stem}.{generation}{ext}"
+        return os.path.join(self.directory, name)
+
+    def _read_generation(self) -> int:
+        try:
+            with open(self._path(self.GENERATION_FILE), "r", encoding="utf-8") as f:
+                return int(json.load(f)["generation"])
+        except FileNotFoundError:
+            return 0
+
+    def _write_meta(self):
+        meta_path = self._path(self.META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("dim") != self.dim:
+                raise ValueError(
+                    f"Dimension incohérente dans {self.directory} : "
+                    f"{meta.get('dim')} sur disque, {self.dim} attendue."
+                )
+            return
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"engine_version": self.engine_version, "dim": self.dim}, f)
+
+    def _refresh(self):
+        """
+        Relit la fin de l'index et remappe la matrice si d'autres workers ont écrit
+        (ou rouvre tout si un compactage a changé de génération).
+        """
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self._index, self._indexed_rows, self._keys_offset = {}, 0, 0
+            self._matrix = None
+            self._used = set()
+        try:
+            self._read_files()
+        except FileNotFoundError:
+            # Génération supprimée entre-temps par un compactage : la relecture
+            # suivante bascule sur la nouvelle
+            pass
+
+    def _read_files(self):
+        keys_path = self._path(self.KEYS_FILE)
+        if os.path.exists(keys_path) and os.path.getsize(keys_path) > self._keys_offset:
+            with open(keys_path, "r", encoding="ascii") as f:
+                f.seek(self._keys_offset)
+                chunk = f.read()
+            # On ne consomme que les lignes complètes
+            complete = chunk[: chunk.rfind("\n") + 1]
+            for key in complete.splitlines():
+                self._index.setdefault(key, self._indexed_rows)
+                self._indexed_rows += 1
+            self._keys_offset += len(complete)
+
+        vectors_path = self._path(self.VECTORS_FILE)
+        rows_on_disk = os.path.getsize(vectors_path) // (4 * self.dim) if os.path.exists(vectors_path) else 0
+        rows = min(self._indexed_rows, rows_on_disk)
+        if rows and (self._matrix is None or self._matrix.shape[0] != rows):
+            self._matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    def get_many(self, keys: list[str]) -> dict:
+        """
+        Retourne {clé: vecteur} pour les clés présentes dans le magasin.
+        """
+        with self._lock:
+            if any(key not in self._index for key in keys):
+                self._refresh()
+            found = {}
+            rows = len(self)
+            for key in keys:
+                row = self._index.get(key)
+                if row is not None and row < rows:
+                    found[key] = np.array(self._matrix[row])
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            self._record_used(found)
+            return found
+
+    def _record_used(self, keys):
+        """
+        Signale dans used.txt les clés lues ou écrites pour la première fois
+        depuis le dernier compactage (elles seront gardées au suivant).
+        """
+        new_keys = [key for key in keys if key not in self._used]
+        if not new_keys:
+            return
+        self._used.update(new_keys)
+        try:
+            # Sans création : le fichier d'une génération compactée n'est pas recréé
+            fd = os.open(self._path(self.USED_FILE), os.O_WRONLY | os.O_APPEND)
+        except OSError:
+            return
+        try:
+            os.write(fd, "".join(f"{key}\n" for key in new_keys).encode("ascii"))
+        finally:
+            os.close(fd)
+
+    def add_many(self, vectors: dict):
+        """
+        Ajoute {clé: vecteur} au magasin (les clés déjà connues sont ignorées).
+        """
+        if not vectors:
+            return
+        with self._lock, open(self._path(self.LOCK_FILE), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Un autre worker a pu écrire les mêmes offres entre-temps
+                self._refresh()
+                new_keys = [key for key in vectors if key not in self._index]
+                if not new_keys:
+                    return
+                if self.max_rows and self._indexed_rows + len(new_keys) > self.max_rows:
+                    self._compact(len(new_keys))
+                # Lignes orphelines d'une écriture interrompue : on les écrase
+                vectors_path = self._path(self.VECTORS_FILE)
+                expected_size = self._indexed_rows * 4 * self.dim
+                if os.path.exists(vectors_path) and os.path.getsize(vectors_path) > expected_size:
+                    os.truncate(vectors_path, expected_size)
+
+                block = np.vstack([np.asarray(vectors[key], dtype=np.float32).reshape(1, -1) for key in new_keys])
+                if block.shape[1] != self.dim:
+                    raise ValueError(f"Vecteur de dimension {block.shape[1]}, {self.dim} attendue.")
+
+                # Vecteurs d'abord, clés ensuite : une clé ne pointe jamais vers une ligne absente
+                with open(vectors_path, "ab") as f:
+                    f.write(block.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self._path(self.KEYS_FILE), "a", encoding="ascii") as f:
+                    f.write("".join(f"{key}\n" for key in new_keys))
+                self._refresh()
+                self._record_used(new_keys)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _compact(self, incoming: int):
+        """
+        Réécrit le magasin dans une nouvelle génération (sous le verrou fichier),
+        en gardant les vecteurs lus ou écrits depuis le compactage précédent.
+        """
+        # Rang de la dernière utilisation de chaque clé dans le journal des usages
+        last_use = {key: -1 for key in self._used}
+        try:
+            with open(self._path(self.USED_FILE), "r", encoding="ascii") as f:
+                last_use.update((key, i) for i, key in enumerate(f.read().split()))
+        except FileNotFoundError:
+            pass
+
+        rows = len(self)
+        row_keys = [None] * rows
+        for key, row in self._index.items():
+            if row < rows:
+                row_keys[row] = key
+        keep = [row for row, key in enumerate(row_keys) if key is not None and key in last_use]
+        target = max(int(self.max_rows * COMPACT_TARGET) - incoming, 0)
+        if len(keep) > target:
+            keep = sorted(sorted(keep, key=lambda row: last_use[row_keys[row]])[len(keep) - target:])
+
+        old_generation, generation = self._generation, self._generation + 1
+        with open(self._path(self.VECTORS_FILE, generation), "wb") as f:
+            if keep:
+                f.write(np.ascontiguousarray(self._matrix[keep]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self._path(self.KEYS_FILE, generation), "w", encoding="ascii") as f:
+            f.write("".join(f"{row_keys[row]}\n" for row in keep))
+        open(self._path(self.USED_FILE, generation), "w").close()
+
+        # Bascule atomique : les workers suivent generation.json
+        generation_path = self._path(self.GENERATION_FILE)
+        tmp_path = f"{generation_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"generation": generation}, f)
+        os.replace(tmp_path, generation_path)
+        for name in (self.VECTORS_FILE, self.KEYS_FILE, self.USED_FILE):
+            try:
+                os.remove(self._path(name, old_generation))
+            except FileNotFoundError:
+                pass
+
+        print(f"[INFO] Magasin de vecteurs compacté : {rows} -> {len(keep)} vecteurs (génération {generation}).")
+        self.compactions += 1
+        self._refresh()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        disk_bytes = 0
+        for name in (self.VECTORS_FILE, self.KEYS_FILE, self.USED_FILE):
+            try:
+                disk_bytes += os.path.getsize(self._path(name))
+            except OSError:
+                pass
+        return {
+            "engine_version": self.engine_version,
+            "vectors": len(self),
+            "max_vectors": self.max_rows,
+            "disk_bytes": disk_bytes,
+            "generation": self._generation,
+            "compactions": self.compactions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+def _safe_dirname(name: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name)